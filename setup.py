@@ -9,6 +9,11 @@ setup(
     author='Alok Ranjan',
     author_email='alokranjan.ucer@gmail.com',
     # install_requires=get_requirements('requirements.txt'),
-    packages=find_packages()
+    packages=find_packages(),
+    entry_points={
+        "console_scripts": [
+            "bev-batch-reports=src.batch_reports:main",
+        ],
+    },
 
 )
\ No newline at end of file
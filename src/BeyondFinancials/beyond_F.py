@@ -7,8 +7,10 @@ from huggingface_hub import InferenceClient
 import json
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
+from src.llm_gateway import chat_completion_stream
+from src.streaming import render_stream
 from sqlalchemy import text
-from openai import AzureOpenAI 
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -1088,14 +1090,7 @@ def main_beyond_FR():
                     
         
         
-        query = text("SELECT [beyondFR] FROM prompt_valuation_reports WHERE id = :id")
-        params = {"id": 1}
-        data = fetch_query(query, params)
-        
-        if data:
-            user_prompt1 = data[0]['beyondFR']
-        else:
-            pass
+        user_prompt1 = get_prompt("beyondFR", user_prompt1)
             # st.session_state.user_prompt = default_prompt   
         #st.session_state.user_prompt = default_prompt
 
@@ -1109,18 +1104,8 @@ def main_beyond_FR():
     # Reset prompt button
     if st.button("Reset Prompt to Default"):
         #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text("""
-                UPDATE prompt_valuation_reports
-                SET [beyondFR] = :summary
-                WHERE id = :id
-            """)
-            params = {
-                "summary": user_prompt1,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt("beyondFR", user_prompt1)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -1128,12 +1113,10 @@ def main_beyond_FR():
         st.rerun()
 
     try:
-        query = text("SELECT [beyondFR] FROM prompt_valuation_reports WHERE id = :id")
-        params = {"id": 1}
-        data = fetch_query(query, params)
-        if data:
+        stored_prompt = get_prompt("beyondFR")
+        if stored_prompt is not None:
             st.write("beyondFR:")
-            st.write(data[0]["beyondFR"])
+            st.write(stored_prompt)
         else:
             st.warning("No report found.")
     except Exception as e:
@@ -1145,49 +1128,32 @@ def main_beyond_FR():
     if st.button("Beyond finanical Report", key="generate_report_button"):     
 
 
+        # Each report renders as it streams in; the returned text feeds the combined report
         st.markdown("P&NL Report")
-        reports_pnl = pnl_reports()
-        st.markdown(reports_pnl)
+        reports_pnl = render_stream(pnl_reports(stream=True))
 
         st.markdown("---")
 
         st.markdown("balance sheet Report")
-        reports_balane = balancesheet()
-        st.markdown(reports_balane)
+        reports_balane = render_stream(balancesheet(stream=True))
 
         st.markdown("---")
 
         st.markdown("Cash flow Report")
-        reports_cash = cashflow()
-        st.markdown(reports_cash)
+        reports_cash = render_stream(cashflow(stream=True))
         st.markdown("---")
 
 
 
         try:
-            client = AzureOpenAI(
-            azure_endpoint= os.getenv("ENDPOINT_URL"),
-            azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version="2025-01-01-preview"
-        )
-
             messages = [
                 {"role": "system", "content": "You are a financial report expert."},
                 {"role": "user", "content": user_prompt1 + " Using Profit & Loss report, balance sheet report and cahsh flow reports. Here is all reports porvided :: "
-                " Profit & Loss report:-> {reports_pnl}, --------- Balance Sheet report:-> {reports_balane}, --------- Cash Flow report:-> {reports_cash}"}
+                f" Profit & Loss report:-> {reports_pnl}, --------- Balance Sheet report:-> {reports_balane}, --------- Cash Flow report:-> {reports_cash}"}
             ]
 
-            response = client.chat.completions.create(
-                    model=os.getenv("DEPLOYMENT_NAME"),  # Use the deployment name instead of model name
-                    messages=messages,
-                    temperature=0.7
-                )
-
-            result = response.choices[0].message.content
-
             st.subheader("Generated Financial Report")
-            st.markdown(result, unsafe_allow_html=True)
+            result = render_stream(chat_completion_stream(messages, temperature=0.7))
 
 
 
@@ -4,11 +4,25 @@ from datetime import datetime
 from huggingface_hub import InferenceClient
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.comparables import DEFAULT_EV_EBITDA, MULTIPLES, comparable_analysis
+from src.llm_gateway import chat_completion, chat_completion_stream
+from src.report_tables import NARRATIVE_MAX_TOKENS, millions, multiple, narrative_messages, render_tables, saved_guidance, table, with_narrative
 from sqlalchemy import text
-from openai import AzureOpenAI 
 from dotenv import load_dotenv
 load_dotenv()
 
+CCA_TITLE = "Comparable Company Analysis (CCA)"
+CCA_INTRO = ("This report presents a valuation analysis using the Comparable Company Analysis (CCA) method. CCA "
+             "estimates a company's value by comparing it to similar publicly traded companies. "
+             "All values are in millions of USD.")
+MULTIPLE_LABELS = {"ev_ebitda": "EV/EBITDA", "ev_revenue": "EV/Revenue", "pe": "P/E"}
+METRIC_LABELS = {"ebitda": "EBITDA", "revenue": "Revenue", "net_income": "Net Income"}
+
+CCA_NARRATIVE = [
+    ("What this means to your Business", "what the valuation and the multiple imply, and how peer selection affects them"),
+    ("Conclusion", "a 2-3 line summary of the valuation"),
+]
+
 class CCACalculator:
     def calculate_ebitda(self, revenue, cogs, operating_expenses, depreciation, amortization):
         """Calculate EBITDA."""
@@ -29,8 +43,12 @@ class CCACalculator:
         }
         return data
 
-    def CCA_DATA(self):
-        """Generate complete CCA analysis data."""
+    def CCA_DATA(self, industry=None, sector=None, size_band=None):
+        """Generate complete CCA analysis data.
+
+        The EV/EBITDA multiple is the peer median from the local peer
+        universe; without one the industry default of 8x is used.
+        """
         dummy_data = self.generate_dummy_ebitda_data()
         
         ebitda = self.calculate_ebitda(
@@ -41,7 +59,12 @@ class CCACalculator:
             dummy_data["Amortization"]
         )
 
-        ev_ebitda_ratio = 8
+        analysis = comparable_analysis(
+            {"ebitda": ebitda, "revenue": dummy_data["Revenue"]},
+            industry=industry, sector=sector, size_band=size_band,
+        )
+        ev_ebitda = analysis["multiples"]["ev_ebitda"] if analysis else {}
+        ev_ebitda_ratio = ev_ebitda["median"] if ev_ebitda.get("count") else DEFAULT_EV_EBITDA
         valuation = self.calculate_valuation(ebitda, ev_ebitda_ratio)
 
         data = {
@@ -50,136 +73,75 @@ class CCACalculator:
             "EV/EBITDA Ratio": ev_ebitda_ratio,
             "Valuation": valuation
         }
+        if analysis:
+            data["Peer Set"] = {
+                "Peer Count": analysis["peer_count"],
+                "Criteria": analysis["criteria"],
+                "Peers": analysis["peers"],
+            }
+            data["Peer Multiples"] = analysis["multiples"]
+            data["Valuation Range"] = analysis["valuation"]
 
         return json.dumps(data, indent=4)
 
-def generate_report(prompt, data):
-    """Generate CCA report using HuggingFace model."""
-    # client = InferenceClient(
-    #     provider="hf-inference",
-    #     api_key=st.secrets["hf_token"],
-    # )
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
-
-    messages = [
-        {"role": "system", "content": "You are a financial report expert."},
-        {"role": "user", "content": prompt.format(json=data)},
-    ]
+def generate_report(data, stream=False):
+    """CCA narrative from the model; the tables are rendered locally."""
+    messages = narrative_messages("Comparable Company Analysis report", data, CCA_NARRATIVE, guidance=saved_guidance("cca"))
 
-    # response = client.chat_completion(
-    #     model=st.secrets["hf_model"],
-    #     messages=messages,
-    #     max_tokens=8000,
-    #     temperature=0.1,
-    # )
-    response = client.chat.completions.create(
-            model=os.getenv("DEPLOYMENT_NAME"),  # Use the deployment name instead of model name
-            messages= messages,
-            temperature=0.7
-        )
+    if stream:
+        return chat_completion_stream(messages, temperature=0.7, max_tokens=NARRATIVE_MAX_TOKENS)
 
-    return response.choices[0].message.content
+    return chat_completion(messages, temperature=0.7, max_tokens=NARRATIVE_MAX_TOKENS)
 
-def cca_report():
+def cca_tables(data):
+    """Heading, valuation and peer tables and worked calculation for ``CCACalculator.CCA_DATA()``."""
+    inputs = data["Dummy Data"]
+    rows = [[metric, millions(value)] for metric, value in inputs.items()]
+    rows += [
+        ["EBITDA", millions(data["EBITDA"])],
+        ["EV/EBITDA Ratio", multiple(data["EV/EBITDA Ratio"])],
+        ["Valuation", millions(data["Valuation"])],
+    ]
+    tables = [table(["Metric", "Value"], rows)]
+
+    if "Peer Multiples" in data:
+        tables.append(table(
+            ["Multiple", "Peers", "Q1", "Median", "Q3", "Trimmed Mean"],
+            [[MULTIPLE_LABELS[name], stats["count"], *(multiple(stats.get(key)) for key in ("q1", "median", "q3", "trimmed_mean"))]
+             for name, stats in data["Peer Multiples"].items() if stats.get("count")],
+            caption="Peer Multiples",
+        ))
+        tables.append(table(
+            ["Multiple", "Applied To", "Low (Q1)", "Mid (Median)", "High (Q3)"],
+            [[MULTIPLE_LABELS[name], f"{METRIC_LABELS[value['metric']]} of {millions(value['metric_value'])}",
+              millions(value["low"]), millions(value["mid"]), millions(value["high"])]
+             for name, value in data["Valuation Range"].items()],
+            caption="Valuation Range",
+        ))
+        tables.append(table(
+            ["Company", "Industry", "Sector", "Size Band", *(MULTIPLE_LABELS[name] for name in MULTIPLES)],
+            [[peer["name"], *(peer[field] or "" for field in ("industry", "sector", "size_band")), *(multiple(peer[name]) for name in MULTIPLES)]
+             for peer in data["Peer Set"]["Peers"]],
+            caption=f"Peer Set ({data['Peer Set']['Peer Count']} companies)",
+        ))
+
+    calculations = [
+        "EBITDA is calculated as Revenue - COGS - Operating Expenses + Depreciation + Amortization.",
+        f"In this case, EBITDA = {' - '.join(millions(inputs[key]) for key in ('Revenue', 'COGS', 'Operating Expenses'))}"
+        f" + {millions(inputs['Depreciation'])} + {millions(inputs['Amortization'])} = {millions(data['EBITDA'])}.",
+        "The Valuation is then calculated by multiplying the EBITDA by the EV/EBITDA Ratio.",
+        f"Valuation = {millions(data['EBITDA'])} * {data['EV/EBITDA Ratio']:g} = {millions(data['Valuation'])}",
+    ]
+    return render_tables(CCA_TITLE, CCA_INTRO, tables, notes=[("Calculations", calculations)])
+
+def cca_report(stream=False):
+    """With ``stream=True`` returns a generator of text deltas instead of the finished report."""
     # st.title("Comparable Company Analysis (CCA) Report Generator")
 
     # Initialize CCA Calculator
     calculator = CCACalculator()
-    cca_data = calculator.CCA_DATA()
-
-    # Display raw calculations
-    # with st.expander("View CCA Calculations"):
-    #     st.json(json.loads(cca_data))
-
-    # Default prompt template
-    default_prompt = """
-    <|begin_of_text|><|start_header_id|>system<|end_header_id|>
-   <h3 style='color: #555; font-family: Arial, sans-serif;'>Comparable Company Analysis (CCA)</h3>
-
-<p style='font-family: Arial, sans-serif;'>This report presents a valuation analysis using the Comparable Company Analysis (CCA) method. CCA estimates a company's value by comparing it to similar publicly traded companies. All values are in millions of USD.</p>
-
-<table style='width: 100%; border-collapse: collapse; font-family: Arial, sans-serif;'>
-  <thead style='background-color: #f2f2f2;'>
-    <tr>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Metric</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Value</th>
-    </tr>
-  </thead>
-  <tbody>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Revenue</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>200</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>COGS</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>120</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Operating Expenses</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>30</td>
-    </tr>
-     <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Depreciation</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Amortization</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>5</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>EBITDA</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>35</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>EV/EBITDA Ratio</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10x</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Valuation</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>350</td>
-    </tr>
-  </tbody>
-</table>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Calculations</h3>
-    <p style='font-family: Arial, sans-serif;'>
-        EBITDA is calculated as Revenue - COGS - Operating Expenses + Depreciation + Amortization.
-        <br>
-        In this case, EBITDA = 200 - 120 - 30 + 10 + 5 = 65.
-        <br>
-        The Valuation is then calculated by multiplying the EBITDA by the EV/EBITDA Ratio.
-        <br>
-        Valuation = EBITDA * EV/EBITDA Ratio
-        <br>
-        Valuation = 35 * 10 = 350
-    </p>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>What this means to your Business</h3>
-<p style='font-family: Arial, sans-serif;'>
-    A CCA valuation of $350 million suggests the company is valued at 10 times its EBITDA, based on comparable companies in the market.  This indicates how the market values similar companies and provides a benchmark for the company's worth.  However, the accuracy of this valuation depends heavily on the selection of truly comparable companies and the stability of the EV/EBITDA multiple.  It's important to consider factors like differences in growth prospects, risk profiles, and accounting practices when interpreting this result. A higher multiple suggests higher growth expectations or lower risk relative to peers.
-</p>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Conclusion</h3>
-<p style='font-family: Arial, sans-serif;'>
-   The Comparable Company Analysis indicates a valuation of $350 million. This is derived by applying an EV/EBITDA multiple of 10x to the company's EBITDA. The selection of comparable companies and the market conditions at the time of the analysis significantly influence the result.
-</p>
-
-
-
-    <|eot_id|><|start_header_id|>user<|end_header_id|>
-
-   
-    Use this data and create a professional report.
-    Make sure response must be in HTML format.
-
-    <|eot_id|><|start_header_id|>assistant<|end_header_id|>
-    """
-    report = generate_report(default_prompt + " Here is the data: in {json} ", cca_data)
-    return report
+    cca_data = json.loads(calculator.CCA_DATA())
+
+    return with_narrative(cca_tables(cca_data), generate_report(cca_data, stream=stream))
 if __name__ == "__main__":
-    cca_report()
\ No newline at end of file
+    cca_report()
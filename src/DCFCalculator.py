@@ -1,168 +1,96 @@
 import streamlit as st
 import json
 from datetime import datetime
-from huggingface_hub import InferenceClient
+import pandas as pd
+from src.dcf_engine import dcf, discount_factors, sensitivity_grid
+from src.llm_gateway import hf_chat_completion
+from src.report_tables import NARRATIVE_MAX_TOKENS, millions, narrative_messages, render_tables, saved_guidance, table
+
+DCF_TITLE = "Discounted Cash Flow (DCF) Report"
+DCF_INTRO = ("This report presents a valuation analysis using the Discounted Cash Flow (DCF) method. The DCF method "
+             "estimates the intrinsic value of an investment based on its projected future cash flows, discounted "
+             "to their present value. All values are in millions of USD.")
+
+DCF_NARRATIVE = [
+    ("What this means to your Business", "what the DCF value implies and how sensitive it is to the cash flow and discount rate assumptions"),
+    ("Conclusion", "a 2-3 line summary of the valuation"),
+]
 
 class DCFCalculator:
     def present_value(self, future_cash_flow, discount_rate, year):
         """Calculate the present value of a single future cash flow."""
-        return future_cash_flow / ((1 + discount_rate) ** year)
+        return float(future_cash_flow * discount_factors(discount_rate, [year])[0])
 
     def total_dcf(self, projected_cash_flows, discount_rate):
         """Calculate the total discounted cash flow (DCF)."""
-        total_value = 0
-        for year, cash_flow in enumerate(projected_cash_flows, start=1):
-            total_value += self.present_value(cash_flow, discount_rate, year)
-        return total_value
+        return float(dcf(projected_cash_flows, discount_rate)["sum_pv"])
+
+    def sensitivity_table(self, projected_cash_flows, discount_rates, growth_rates, mid_year=False):
+        """Enterprise value for every discount rate x terminal growth rate (Gordon growth)."""
+        grid = sensitivity_grid(projected_cash_flows, discount_rates, growth_rates, method="gordon", mid_year=mid_year)
+        return pd.DataFrame(
+            grid,
+            index=[f"{rate:.1%}" for rate in discount_rates],
+            columns=[f"{growth:.1%}" for growth in growth_rates],
+        ).rename_axis(index="Discount Rate", columns="Terminal Growth")
 
     def dcf_data(self):
         """Generate DCF calculations and return JSON data."""
         projected_cash_flows = [2.5e6, 3e6, 3.5e6]
         discount_rate = 0.10
 
-        pv_year_1 = self.present_value(projected_cash_flows[0], discount_rate, 1)
-        pv_year_2 = self.present_value(projected_cash_flows[1], discount_rate, 2)
-        pv_year_3 = self.present_value(projected_cash_flows[2], discount_rate, 3)
+        # Every year is discounted in one vectorised pass
+        result = dcf(projected_cash_flows, discount_rate)
+        present_values = result["present_values"].tolist()
 
-        total_dcf_value = self.total_dcf(projected_cash_flows, discount_rate)
+        total_dcf_value = float(result["sum_pv"])
 
         data = {
             "Projected Cash Flows": projected_cash_flows,
             "Discount Rate": discount_rate,
             "Present Values": {
-                "Year 1": pv_year_1,
-                "Year 2": pv_year_2,
-                "Year 3": pv_year_3
+                f"Year {year}": pv for year, pv in enumerate(present_values, start=1)
             },
             "Total DCF": total_dcf_value
         }
 
         return json.dumps(data, indent=4)
 
-def generate_report(prompt, data):
-    """Generate DCF report using HuggingFace model."""
-    client = InferenceClient(
-        provider="hf-inference",
-        api_key=st.secrets["hf_token"],
-    )
+def generate_report(data):
+    """DCF narrative using HuggingFace model; the tables are rendered locally."""
+    messages = narrative_messages("Discounted Cash Flow report", data, DCF_NARRATIVE, guidance=saved_guidance("dcf"))
 
-    messages = [
-        {"role": "system", "content": "You are a financial report expert."},
-        {"role": "user", "content": prompt.format(json=data)},
-    ]
+    return hf_chat_completion(messages, st.secrets["hf_model"], st.secrets["hf_token"], temperature=0.1, max_tokens=NARRATIVE_MAX_TOKENS)
 
-    response = client.chat_completion(
-        model=st.secrets["hf_model"],
-        messages=messages,
-        max_tokens=8000,
-        temperature=0.1,
+def dcf_tables(data):
+    """Heading, present value table and worked calculation for ``DCFCalculator.dcf_data()``."""
+    cash_flows = data["Projected Cash Flows"]
+    present_values = list(data["Present Values"].values())
+    rate = data["Discount Rate"]
+    rows = [
+        [year, millions(cash_flow), f"{rate:.0%}", millions(present_value)]
+        for year, (cash_flow, present_value) in enumerate(zip(cash_flows, present_values), start=1)
+    ]
+    rows.append(["Total DCF Value", millions(sum(cash_flows)), "", millions(data["Total DCF"])])
+    calculations = [
+        "The present value (PV) of each year's projected cash flow is calculated as:",
+        "PV = Cash Flow / (1 + Discount Rate)^Year",
+        f"For example, the present value for Year 1 is {millions(cash_flows[0])} / (1 + {rate:g})^1 = {millions(present_values[0])}. "
+        "The Total DCF Value is the sum of the present values of all projected cash flows over the forecast period.",
+    ]
+    return render_tables(
+        DCF_TITLE, DCF_INTRO,
+        [table(["Year", "Projected Cash Flows", "Discount Rate", "Present Value"], rows)],
+        notes=[("Calculations", calculations)],
     )
 
-    return response.choices[0].message.content
-
 def dcf_analysis_report():
     # st.title("DCF Analysis Report Generator")
 
-    # Display current date/time and user
-    # current_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-    # st.sidebar.markdown("### Session Information")
-    # st.sidebar.info(f"Current Date and Time (UTC): {current_time}")
-    # st.sidebar.info(f"Current User: alokyadav2020")
-
     # Initialize DCF Calculator
     calculator = DCFCalculator()
-    dcf_data = calculator.dcf_data()
-
-    # Display raw DCF data
-    # with st.expander("View DCF Calculations"):
-    #     st.json(json.loads(dcf_data))
-
-    # Default prompt template
-    default_prompt = """
-    <|begin_of_text|><|start_header_id|>system<|end_header_id|>
-    
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Discounted Cash Flow (DCF) Report</h3>
-
-<p style='font-family: Arial, sans-serif;'>This report presents a valuation analysis using the Discounted Cash Flow (DCF) method. The DCF method estimates the intrinsic value of an investment based on its projected future cash flows, discounted to their present value.  All values are in millions of USD.</p>
-
-<table style='width: 100%; border-collapse: collapse; font-family: Arial, sans-serif;'>
-  <thead style='background-color: #f2f2f2;'>
-    <tr>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Year</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Projected Cash Flows</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Discount Rate</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Present Value</th>
-    </tr>
-  </thead>
-  <tbody>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>1</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>25</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10%</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>22.73</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>2</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>30</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10%</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>24.79</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>3</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>35</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10%</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>26.31</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>4</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>40</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10%</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>27.32</td>
-    </tr>
-     <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>5</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>45</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10%</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>27.84</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Total DCF Value</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>129.0</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'></td>
-      <td style='padding: 8px; border: 1px solid #ddd;'></td>
-    </tr>
-  </tbody>
-</table>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Calculations</h3>
-<p style='font-family: Arial, sans-serif;'>
-    The present value (PV) of each year's projected cash flow is calculated using the following formula:
-    <br>
-    PV = Cash Flow / (1 + Discount Rate)^Year
-    <br>
-    For example, the present value for Year 1 is calculated as: 25 / (1 + 0.10)^1 = 22.73.  The Total DCF Value is the sum of the present values of all projected cash flows over the forecast period.
-</p>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>What this means to your Business</h3>
-<p style='font-family: Arial, sans-serif;'>
-    A DCF valuation of $129.0 million suggests the intrinsic value of the business, based on its projected cash-generating ability, is  $129.0 million. This indicates the business is expected to generate significant cash flow in the future.  However, this valuation is highly sensitive to the projected cash flows and the discount rate, both of which involve assumptions about future performance and market conditions.  A higher discount rate would result in a lower valuation, and vice-versa.  It's crucial to regularly review and update the assumptions to ensure the valuation remains relevant.
-</p>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Conclusion</h3>
-<p style='font-family: Arial, sans-serif;'>
-  The Discounted Cash Flow analysis indicates a total value of $129.0 million. This valuation is derived from the present value of projected future cash flows, discounted at a rate of 10%. The DCF method is sensitive to both the projected cash flows and the discount rate, and these should be carefully considered.
-</p>
-
-
-    <|eot_id|><|start_header_id|>user<|end_header_id|>
-
-   
-    Use this data and create a professional report.
-    Make sure response must be in HTML format.
-
-    <|eot_id|><|start_header_id|>assistant<|end_header_id|>
-    """
-    report = generate_report(default_prompt + " Here is the data: in {json}", dcf_data)
-    return report
+    dcf_data = json.loads(calculator.dcf_data())
+
+    return dcf_tables(dcf_data) + generate_report(dcf_data)
 if __name__ == "__main__":
-    dcf_analysis_report()
\ No newline at end of file
+    dcf_analysis_report()
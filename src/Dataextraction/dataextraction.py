@@ -1,15 +1,19 @@
 
 import streamlit as st
-from pypdf import PdfReader
 from pydantic import BaseModel, Field
 from typing import List
+from concurrent.futures import ThreadPoolExecutor
 from agno.agent import Agent
 from agno.models.azure import AzureOpenAI
-from agno.team.team import Team
-from openai import AzureOpenAI 
 from dotenv import load_dotenv
 load_dotenv()
 import os
+from src.Dataextraction.segmenter import segment_document
+from src.pdf_extraction import extract_pages
+from src.Dataextraction.kpis import MarketShare, derive_kpis, market_share
+
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+
 model = AzureOpenAI(
     azure_endpoint= os.getenv("ENDPOINT_URL"),
     azure_deployment=os.getenv("DEPLOYMENT_NAME"),
@@ -153,23 +157,14 @@ BalanceSheetAgent = Agent(
     """
 )
 
-KPIsAgent = Agent(
+MarketShareAgent = Agent(
     model=model,
-    description="Calculate and extract KPIs from documents",
-    response_model=KPIs,
+    description="Read the company's market share from passages that discuss it",
+    response_model=MarketShare,
     use_json_mode=True,
     instructions="""
-    Using data from the financial statements, calculate KPIs for each of the last 3 years (2021, 2022, 2023 where available):
-    - For each year, include the year and:
-      - Gross margin: ((revenue - cogs) / revenue) * 100
-      - Operating margin: (ebitda / revenue) * 100
-      - Debt to equity: (long_term debt + short_term debt) / equity
-      - Current ratio: if available, current assets / current liabilities; else 1.0
-      - Revenue growth: ((current revenue - previous revenue) / previous revenue) * 100; 0.0 for earliest
-      - Market share: extract if mentioned; else 0.0
-    Provide as a list of YearlyKPIs objects.
-    
-    Base calculations on document data.
+    Report the company's own market share percentage for the most recent year stated in the passages
+    (e.g., 12.3 for 12.3%). Use 0.0 if no market share figure for the company is stated.
     """
 )
 
@@ -221,15 +216,40 @@ RiskFactorsAgent = Agent(
     """
 )
 
-CompanyData_team = Team(
-    name="Company Data Extraction Team",
-    mode="coordinate",
-    model=model,
-    members=[CompanyInfoAgent, FinancialMetricsAgent, BalanceSheetAgent, KPIsAgent, ValuationAgent, IndustryBenchmarksAgent, RiskFactorsAgent],
-    response_model=CompanyData,
-    markdown=True,
-    show_members_responses=True,
-)
+# CompanyData field -> agent that extracts it; each sees only its slice of the document
+EXTRACTORS = {
+    "company_info": CompanyInfoAgent,
+    "financial_metrics": FinancialMetricsAgent,
+    "balance_sheet": BalanceSheetAgent,
+    "valuation": ValuationAgent,
+    "industry_benchmarks": IndustryBenchmarksAgent,
+    "risk_factors": RiskFactorsAgent,
+}
+
+
+def _run_extractor(key, text):
+    content = EXTRACTORS[key].run(f"Here is the financial statement of General Motors:\n\n{text}").content
+    field = CompanyData.model_fields[key].annotation
+    # Agents fall back to raw JSON text when the structured response could not be parsed
+    return field.model_validate_json(content) if isinstance(content, str) else field.model_validate(content)
+
+
+def extract_company_data(segments, max_workers=None):
+    """Run every extractor concurrently on its document slice and assemble CompanyData locally.
+
+    One model call per section (plus a market share lookup only when the
+    text mentions it without a figure); no coordinator re-reads the
+    members' output. Raises the first extractor error.
+    """
+    documents = segments.documents_for_extractors(list(EXTRACTORS))
+    workers = max(1, min(max_workers or EXTRACTION_MAX_WORKERS, len(EXTRACTORS)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="company-data") as executor:
+        futures = {key: executor.submit(_run_extractor, key, documents[key]) for key in EXTRACTORS}
+        sections = {key: future.result() for key, future in futures.items()}
+
+    share = market_share(segments.full_text, fallback=lambda passages: MarketShareAgent.run(passages).content.market_share)
+    kpis = KPIs(yearly_data=derive_kpis(sections["financial_metrics"], sections["balance_sheet"], market_share=share))
+    return CompanyData(**sections, kpis=kpis)
 
 
 def main_dataextract():
@@ -239,19 +259,16 @@ def main_dataextract():
     uploaded_file = st.file_uploader("Upload PDF File", type="pdf")
 
     if uploaded_file is not None:
-        reader = PdfReader(uploaded_file)
-        txt = ""
-        for page in reader.pages:
-            txt += page.extract_text() + "\n"
+        pages = extract_pages(uploaded_file)
+        # Each extractor only receives the statement, risk factor or company profile pages it needs
+        segments = segment_document(pages)
         
         st.write("Text extracted from PDF.")
         
-        prompt = f"Here is the financial statement of General Motors:\n\n{txt}"
-        
         with st.spinner("Extracting financial information..."):
             try:
-                CompanyData_ = CompanyData_team.run(prompt)
-                st.json(CompanyData_.content.model_dump_json(indent=2))
+                CompanyData_ = extract_company_data(segments)
+                st.json(CompanyData_.model_dump_json(indent=2))
             except Exception as e:
                 st.error(f"Error extracting data: {str(e)}")
 
@@ -0,0 +1,112 @@
+import json
+import re
+from pydantic import BaseModel, Field
+
+from src.ratios import ratio_frame
+from src.statement_store import fiscal_year, from_company_report
+
+# Passages mentioning market share; at most this many are sent to the model as a fallback
+MARKET_SHARE_MAX_MENTIONS = 5
+# Characters of context kept on each side of a mention
+MARKET_SHARE_CONTEXT = 150
+
+_MENTION = re.compile(r"\bmarket\s+share\b", re.IGNORECASE)
+# Only explicit statements of the figure right after the mention, e.g. "market share was 16.3%";
+# "market share rose by 3% to 15%" and the like are left to the fallback
+_STATED = re.compile(
+    r"\s+(?:of|was|is|at|stood\s+at)\s+(?:(?:approximately|about|around|roughly)\s+)?"
+    r"(\d{1,2}(?:\.\d+)?)\s*(?:%|percent\b)",
+    re.IGNORECASE,
+)
+# The mention must be the company's own, e.g. "our market share" or "we hold a market share",
+# not a competitor's
+_OWN = re.compile(r"\b(?:our|the\s+company['’]s|we\s+(?:have|had|hold|held))\s+(?:[\w-]+\s+){0,2}$", re.IGNORECASE)
+# Characters before a mention searched for its subject
+_OWN_WINDOW = 60
+
+
+class MarketShare(BaseModel):
+    market_share: float = Field(..., description="The company's own market share percentage for the latest year (e.g., 12.3 for 12.3%). Use 0.0 if it is not stated.")
+
+
+def _section(value):
+    if value is None:
+        return {}
+    if isinstance(value, str):
+        return json.loads(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return value
+
+
+def market_share_mentions(text, limit=None):
+    """Passages of ``text`` around each mention of market share, in document order."""
+    limit = limit or MARKET_SHARE_MAX_MENTIONS
+    text = text or ""
+    mentions = []
+    for match in _MENTION.finditer(text):
+        start = max(0, match.start() - MARKET_SHARE_CONTEXT)
+        passage = " ".join(text[start:match.end() + MARKET_SHARE_CONTEXT].split())
+        if passage not in mentions:
+            mentions.append(passage)
+            if len(mentions) >= limit:
+                break
+    return mentions
+
+
+def market_share(text, fallback=None):
+    """Market share percentage stated in ``text``; 0.0 when the document never mentions it.
+
+    Only an explicit statement of the company's own share, e.g. "our market
+    share was 16.3%", is read directly. Any other discussion of market share
+    goes to ``fallback`` (a callable taking the relevant passages and
+    returning a float), so the model sees a few passages instead of the
+    whole filing.
+    """
+    text = text or ""
+    for match in _MENTION.finditer(text):
+        stated = _STATED.match(text, match.end())
+        if stated and _OWN.search(text, max(0, match.start() - _OWN_WINDOW), match.start()):
+            return float(stated.group(1))
+    mentions = market_share_mentions(text)
+    if not mentions or fallback is None:
+        return 0.0
+    return float(fallback("\n\n".join(mentions)) or 0.0)
+
+
+def derive_kpis(financial_metrics, balance_sheet, market_share=0.0):
+    """Yearly KPI dicts computed from extracted financial metrics and balance sheets, newest year first.
+
+    Sections may be pydantic models, dicts or the JSON strings the
+    extractors return. Margins and growth are percentages, operating margin
+    is EBITDA / revenue as the extraction agents defined it, and values that
+    cannot be computed (including from figures extracted as 0) are 0.0.
+    The balance sheet extract carries no current assets or liabilities, so
+    the current ratio is 0.0 (unavailable).
+    ``market_share`` applies to the latest year only.
+    """
+    financial_metrics = _section(financial_metrics)
+    labels = {fiscal_year(record["year"]): record["year"] for record in financial_metrics.get("yearly_data", [])}
+    if not labels:
+        return []
+    frame = from_company_report("", {"financial_metrics": financial_metrics, "balance_sheet": _section(balance_sheet)})
+    # The extractors report 0 for figures they could not find
+    frame = frame.replace(0, float("nan"))
+    ratios = ratio_frame(frame, ratios=["gross_margin", "ebitda_margin", "debt_to_equity", "revenue_growth"])
+    ratios = ratios[ratios["fiscal_year"].isin(list(labels))].sort_values("fiscal_year", ascending=False)
+
+    def value(number, scale=1.0):
+        return round(float(number) * scale, 2) if number == number else 0.0
+
+    kpis = []
+    for position, (_, row) in enumerate(ratios.iterrows()):
+        kpis.append({
+            "year": labels[int(row["fiscal_year"])],
+            "gross_margin": value(row["gross_margin"], 100),
+            "operating_margin": value(row["ebitda_margin"], 100),
+            "debt_to_equity": value(row["debt_to_equity"]),
+            "current_ratio": 0.0,
+            "revenue_growth": value(row["revenue_growth"], 100),
+            "market_share": float(market_share or 0.0) if position == 0 else 0.0,
+        })
+    return kpis
@@ -0,0 +1,208 @@
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound on the text handed to a single extractor, in characters
+SEGMENT_MAX_CHARS = int(os.getenv("SEGMENT_MAX_CHARS", "60000"))
+SEGMENT_MAX_PAGES = int(os.getenv("SEGMENT_MAX_PAGES", "12"))
+
+HEADING_WEIGHT = 10.0
+# Pages scoring below this fraction of the best page are not considered part of a section
+RELATIVE_THRESHOLD = 0.5
+MIN_SCORE = 2.0
+
+SECTION_HEADINGS = {
+    "income_statement": [
+        r"consolidated\s+statements?\s+of\s+(?:operations|income|earnings)",
+        r"(?:consolidated\s+)?income\s+statements?",
+        r"statements?\s+of\s+(?:operations|income|earnings)",
+    ],
+    "balance_sheet": [
+        r"consolidated\s+balance\s+sheets?",
+        r"balance\s+sheets?",
+        r"statements?\s+of\s+financial\s+position",
+    ],
+    "cash_flow": [
+        r"consolidated\s+statements?\s+of\s+cash\s+flows?",
+        r"statements?\s+of\s+cash\s+flows?",
+        r"cash\s+flow\s+statements?",
+    ],
+    "risk_factors": [
+        r"item\s*1a\.?\s*[-–—:]?\s*risk\s+factors",
+        r"risk\s+factors",
+    ],
+    "company_profile": [
+        r"item\s*1\.?\s*[-–—:]?\s*business\b",
+        r"general\s+development\s+of\s+(?:the\s+)?business",
+        r"human\s+capital",
+        r"(?:company|corporate)\s+overview",
+    ],
+}
+
+SECTION_KEYWORDS = {
+    "income_statement": [
+        "net sales", "total revenue", "revenues", "cost of sales", "cost of revenue", "gross profit",
+        "operating income", "income before income taxes", "net income", "earnings per share",
+        "selling, general and administrative", "diluted",
+    ],
+    "balance_sheet": [
+        "total assets", "total liabilities", "stockholders' equity", "shareholders' equity",
+        "current assets", "current liabilities", "retained earnings", "cash and cash equivalents",
+        "accounts receivable", "inventories", "property, plant and equipment", "long-term debt",
+    ],
+    "cash_flow": [
+        "operating activities", "investing activities", "financing activities",
+        "depreciation and amortization", "capital expenditures", "expenditures for property",
+        "net cash provided", "net cash used", "dividends paid", "free cash flow",
+    ],
+    "risk_factors": [
+        "risk", "adversely affect", "adverse effect", "uncertaint", "could harm", "may not be able",
+        "no assurance", "depend on", "disruption", "volatility",
+    ],
+    "company_profile": [
+        "employees", "founded", "incorporated", "headquarter", "website", "segments",
+        "employer identification", "our mission", "we design", "we operate", "customers",
+    ],
+}
+
+# Sections that run from their Item heading until the next Item heading
+ITEM_SPANS = {
+    "risk_factors": (r"item\s*1a\.?\s*[-–—:]?\s*risk\s+factors", r"item\s*(?:1b|1c|2)\b"),
+    "company_profile": (r"item\s*1\.?\s*[-–—:]?\s*business\b", r"item\s*1a\b"),
+}
+
+# Which document sections each extractor needs to see
+EXTRACTOR_SECTIONS = {
+    "company_info": ("company_profile",),
+    "financial_metrics": ("income_statement", "cash_flow"),
+    "balance_sheet": ("balance_sheet",),
+    "valuation": ("income_statement", "balance_sheet", "cash_flow"),
+    "industry_benchmarks": ("company_profile",),
+    "risk_factors": ("risk_factors", "balance_sheet"),
+    "cash_flow": ("cash_flow",),
+}
+
+_ITEM_HEADING = re.compile(r"^\s*item\s*\d+[a-c]?\b", re.IGNORECASE | re.MULTILINE)
+_HEADING_RES = {
+    section: [re.compile(r"^\s*" + pattern, re.IGNORECASE | re.MULTILINE) for pattern in patterns]
+    for section, patterns in SECTION_HEADINGS.items()
+}
+_SPAN_RES = {
+    section: (re.compile(r"^\s*" + start, re.IGNORECASE | re.MULTILINE),
+              re.compile(r"^\s*" + end, re.IGNORECASE | re.MULTILINE))
+    for section, (start, end) in ITEM_SPANS.items()
+}
+
+
+def is_table_of_contents(page_text):
+    """A page listing several Item headings is an index, not the section itself."""
+    return len(_ITEM_HEADING.findall(page_text)) >= 4
+
+
+def score_page(page_text, section):
+    """Score how likely a page belongs to ``section`` from headings and keyword density."""
+    lowered = page_text.lower()
+    words = max(len(lowered.split()), 1)
+    keyword_hits = sum(lowered.count(keyword) for keyword in SECTION_KEYWORDS[section])
+    # Keyword hits per 100 words, so long narrative pages do not win on volume alone
+    score = keyword_hits * 100.0 / max(words, 100)
+    if not is_table_of_contents(page_text):
+        if any(pattern.search(page_text) for pattern in _HEADING_RES[section]):
+            score += HEADING_WEIGHT
+    return score
+
+
+def _item_span(pages, section):
+    """Return the page indices between an Item heading and the next Item heading."""
+    start_re, end_re = _SPAN_RES[section]
+    span = []
+    for index, page_text in enumerate(pages):
+        if is_table_of_contents(page_text):
+            continue
+        if not span:
+            if start_re.search(page_text):
+                span.append(index)
+            continue
+        if end_re.search(page_text):
+            break
+        span.append(index)
+    return span
+
+
+class DocumentSegments:
+    """Page-level map of a filing's financial statements, risk factors and company profile.
+
+    ``sections`` maps each section name to the zero-based page indices that
+    belong to it, in page order. Sections that could not be located map to an
+    empty list, and callers fall back to the full document for them.
+    Pass previously detected ``sections`` to skip detection.
+    """
+
+    def __init__(self, pages, max_pages=None, max_chars=None, sections=None):
+        self.pages = list(pages)
+        self.max_pages = max_pages or SEGMENT_MAX_PAGES
+        self.max_chars = max_chars or SEGMENT_MAX_CHARS
+        if sections is not None:
+            self.sections = {section: list(sections.get(section, [])) for section in SECTION_HEADINGS}
+        else:
+            self.sections = {section: self._locate(section) for section in SECTION_HEADINGS}
+
+    def _locate(self, section):
+        scores = [score_page(page_text, section) for page_text in self.pages]
+        best = max(scores, default=0.0)
+        if best < MIN_SCORE:
+            candidates = []
+        else:
+            threshold = max(MIN_SCORE, best * RELATIVE_THRESHOLD)
+            candidates = [index for index, score in enumerate(scores) if score >= threshold]
+
+        if section in ITEM_SPANS:
+            candidates = sorted(set(candidates) | set(_item_span(self.pages, section)))
+
+        # Keep the strongest pages that fit the page and character budgets
+        ranked = sorted(candidates, key=lambda index: scores[index], reverse=True)
+        selected, used = [], 0
+        for index in ranked:
+            if len(selected) >= self.max_pages:
+                break
+            size = len(self.pages[index])
+            if selected and used + size > self.max_chars:
+                continue
+            selected.append(index)
+            used += size
+        return sorted(selected)
+
+    @property
+    def full_text(self):
+        return "\n".join(self.pages).strip()
+
+    def page_numbers(self, section):
+        """One-based page numbers for display."""
+        return [index + 1 for index in self.sections.get(section, [])]
+
+    def text_for(self, *sections):
+        """Join the pages of ``sections`` in document order; empty when none were found."""
+        indices = sorted({index for section in sections for index in self.sections.get(section, [])})
+        return "\n".join(f"--- Page {index + 1} ---\n{self.pages[index]}" for index in indices).strip()
+
+    def text_for_extractor(self, extractor_key):
+        """Return the slice an extractor needs, or the full text when any of its sections was not found."""
+        sections = EXTRACTOR_SECTIONS.get(extractor_key, ())
+        if not sections or not all(self.sections.get(section) for section in sections):
+            return self.full_text
+        return self.text_for(*sections)
+
+    def documents_for_extractors(self, extractor_keys=None):
+        """Map each extractor key to the text it should receive."""
+        keys = extractor_keys or EXTRACTOR_SECTIONS.keys()
+        return {key: self.text_for_extractor(key) for key in keys}
+
+    def relevant_text(self):
+        """Every located section in document order, or the full text when nothing was found."""
+        return self.text_for(*self.sections) or self.full_text
+
+
+def segment_document(pages, max_pages=None, max_chars=None, sections=None):
+    return DocumentSegments(pages, max_pages=max_pages, max_chars=max_chars, sections=sections)
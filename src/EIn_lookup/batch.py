@@ -0,0 +1,88 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.EIn_lookup.ein_check import EIN_LOOKUP
+
+load_dotenv()
+
+EIN_BATCH_WORKERS = int(os.getenv("EIN_BATCH_WORKERS", "8"))
+
+_EIN_COLUMN = re.compile(r"^(ein|fein|tin|tax[\s_]*id|employer[\s_]*identification[\s_]*number)$", re.IGNORECASE)
+
+RESULT_COLUMNS = [
+    "input_ein", "status", "company_name", "ein_number", "Doing_Business_As", "address", "phone",
+    "fatca_comliant", "fatca_review", "blacklist", "fatca_matches", "blacklist_matches", "error",
+]
+
+
+def read_eins(source, filename=None):
+    """Read EINs from a CSV or XLSX path or uploaded file.
+
+    Uses the first column named like EIN/TIN/Tax ID, or the first column
+    otherwise. Blank cells are dropped and duplicates are kept only once,
+    in file order.
+    """
+    name = (filename or getattr(source, "name", None) or str(source)).lower()
+    if name.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(source, dtype=str)
+    else:
+        df = pd.read_csv(source, dtype=str)
+    if df.empty:
+        return []
+    column = next((column for column in df.columns if _EIN_COLUMN.match(str(column).strip())), df.columns[0])
+    eins = (ein.strip() for ein in df[column].dropna().astype(str))
+    return list(dict.fromkeys(ein for ein in eins if ein))
+
+
+def validate_ein(ein):
+    """Look up one EIN and screen the company; never raises, errors are reported in the row."""
+    lookup = EIN_LOOKUP(ein=ein)
+    try:
+        business = lookup.cached_validation()
+    except Exception as e:
+        return {"input_ein": ein, "status": "error", "error": str(e)}
+    if business is None:
+        return {"input_ein": ein, "status": "not_found"}
+    row = {"input_ein": ein, "status": "found"}
+    row.update(business)
+    return row
+
+
+def iter_validate_eins(eins, max_workers=None):
+    """Validate EINs concurrently and yield (index, row) as each lookup finishes."""
+    eins = list(eins)
+    if not eins:
+        return
+    workers = max(1, min(max_workers or EIN_BATCH_WORKERS, len(eins)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ein-lookup") as executor:
+        futures = {executor.submit(validate_ein, ein): index for index, ein in enumerate(eins)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def validate_eins(eins, max_workers=None, progress=None):
+    """Validate every EIN and return the rows in input order.
+
+    ``progress(done, total)`` is called after each lookup completes.
+    """
+    eins = list(eins)
+    rows = [None] * len(eins)
+    for done, (index, row) in enumerate(iter_validate_eins(eins, max_workers=max_workers), start=1):
+        rows[index] = row
+        if progress is not None:
+            progress(done, len(eins))
+    return rows
+
+
+def results_frame(rows):
+    """Flatten validation rows into a DataFrame suitable for CSV/XLSX download."""
+    df = pd.DataFrame(rows).reindex(columns=RESULT_COLUMNS)
+    for column in ("fatca_matches", "blacklist_matches"):
+        df[column] = df[column].map(
+            lambda hits: "; ".join(f"{hit['name']} ({hit['score']})" for hit in hits) if isinstance(hits, list) else ""
+        )
+    df["fatca_review"] = df["fatca_review"].map(lambda names: "; ".join(names) if isinstance(names, list) else "")
+    return df
@@ -0,0 +1,60 @@
+import os
+import re
+from dotenv import load_dotenv
+
+from src.cache import TieredCache
+
+load_dotenv()
+
+EIN_CACHE_ENABLED = os.getenv("EIN_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+EIN_CACHE_TTL_SECONDS = int(os.getenv("EIN_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# "Not found" answers are kept for less time, since new registrations do appear
+EIN_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("EIN_CACHE_NEGATIVE_TTL_SECONDS", str(24 * 3600)))
+
+ein_cache = TieredCache(
+    path=os.getenv("EIN_CACHE_PATH", os.path.join("artifacts", "ein_cache.sqlite3")),
+    ttl=EIN_CACHE_TTL_SECONDS,
+    max_bytes=int(os.getenv("EIN_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    memory_entries=int(os.getenv("EIN_CACHE_MEMORY_ENTRIES", "4096")),
+)
+
+_NON_DIGIT = re.compile(r"\D")
+
+
+def normalize_ein(ein):
+    """Digits only, so "12-3456789", "123456789" and " 12 3456789 " share one entry."""
+    digits = _NON_DIGIT.sub("", str(ein))
+    return digits or str(ein).strip()
+
+
+def cache_key(ein):
+    # v3: entries hold the lookup payload only; screening results are no longer cached
+    return f"ein:v3:{normalize_ein(ein)}"
+
+
+def get_cached(ein):
+    """Return the cached entry ``{"details": dict or None}``, or None on a miss."""
+    if not EIN_CACHE_ENABLED:
+        return None
+    return ein_cache.get(cache_key(ein))
+
+
+def store(ein, details):
+    """Cache the looked-up business details; ``None`` records a negative "not found" answer.
+
+    Screening results are not stored: the FATCA and sanctions lists change
+    more often than the cache expires, so callers screen on every hit.
+    """
+    if not EIN_CACHE_ENABLED:
+        return
+    ttl = EIN_CACHE_NEGATIVE_TTL_SECONDS if details is None else EIN_CACHE_TTL_SECONDS
+    ein_cache.set(cache_key(ein), {"details": details}, ttl=ttl)
+
+
+def cache_stats():
+    """Hit and miss counters for this process."""
+    stats = dict(ein_cache.stats)
+    stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
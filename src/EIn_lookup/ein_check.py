@@ -1,10 +1,12 @@
 # from src.LLM.llama import load_model
 # from src.login import logger
-import requests
 from bs4 import BeautifulSoup
 import json
 import os
-import pandas as pd
+from src.EIn_lookup.http_client import post_lookup
+from src.EIn_lookup import ein_cache
+from src.EIn_lookup.screening import fatca_list, sdn_list
+from src.EIn_lookup.fuzzy_index import SCREENING_MATCH_THRESHOLD, screen
 
 
 
@@ -16,46 +18,47 @@ class EIN_LOOKUP:
         self._ein = ein
         self._FFILIST = os.path.join('artifacts','FFIListFull.csv')
         self._sdn = os.path.join('artifacts','sdn.csv')
+        # Ranked fuzzy hits from the last screening of each list
+        self.fatca_matches = []
+        self.blacklist_matches = []
 
 
+    def fetch_details(self):
+        """Look the EIN up and return the parsed details, or None when nothing was found.
+
+        Network and HTTP errors are raised so batch callers can tell them apart from a miss.
+        """
+        # POST through the shared keep-alive session (timeouts, retry with backoff, per-host rate limit)
+        html = post_lookup(self._ein)
+
+        # Parse the response HTML
+        soup = BeautifulSoup(html, 'html.parser')
+        panel_body = soup.find('div', class_='panel-body fixed-panel')
+
+        # Check if panel_body exists
+        if not panel_body:
+            return None
+
+        # Extract required fields safely
+        return {
+            "company_name": (panel_body.find('a').text.strip() 
+                            if panel_body.find('a') else "N/A"),
+            "ein_number": (panel_body.find('strong').text.strip().split(":")[-1].strip() 
+                        if panel_body.find('strong') else "N/A"),
+            "Doing_Business_As": (panel_body.find('strong', text='Doing Business As: ').find_next_sibling().text.strip()
+                                if panel_body.find('strong', text='Doing Business As: ') else "N/A"),
+            "address": (panel_body.find('strong', text='Address: ').next_sibling.strip()
+                        if panel_body.find('strong', text='Address: ') else "N/A"),
+            "phone": (panel_body.find('strong', text='Phone: ').next_sibling.strip()
+                    if panel_body.find('strong', text='Phone: ') else "N/A")
+        }
+
     def einlookup(self):
         try:
-            # Define the request URL and headers
-            url = "https://eintaxid.com/search-ajax.php"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-            }
-
-            # Payload with EIN query
-            data = {
-                "query": str(self._ein)
-            }
-
-            # Make a POST request
-            response = requests.post(url, data=data, headers=headers)
-
-            # Parse the response HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            panel_body = soup.find('div', class_='panel-body fixed-panel')
-
-            # Check if panel_body exists
-            if not panel_body:
+            returndata = self.fetch_details()
+            if returndata is None:
                 return None
 
-            # Extract required fields safely
-            returndata = {
-                "company_name": (panel_body.find('a').text.strip() 
-                                if panel_body.find('a') else "N/A"),
-                "ein_number": (panel_body.find('strong').text.strip().split(":")[-1].strip() 
-                            if panel_body.find('strong') else "N/A"),
-                "Doing_Business_As": (panel_body.find('strong', text='Doing Business As: ').find_next_sibling().text.strip()
-                                    if panel_body.find('strong', text='Doing Business As: ') else "N/A"),
-                "address": (panel_body.find('strong', text='Address: ').next_sibling.strip()
-                            if panel_body.find('strong', text='Address: ') else "N/A"),
-                "phone": (panel_body.find('strong', text='Phone: ').next_sibling.strip()
-                        if panel_body.find('strong', text='Phone: ') else "N/A")
-            }
-
             # Return the JSON-encoded result
             return json.dumps(returndata, indent=4)
 
@@ -123,12 +126,16 @@ class EIN_LOOKUP:
         try:
           print("fatca chechecking")
 
-          df_ffi= pd.read_csv(self._FFILIST)
-          exists = business_name in df_ffi['FINm'].values
-          if exists:
+          ffi_list = fatca_list(self._FFILIST)
+          self.fatca_matches = screen(ffi_list, business_name)
+          # Only a normalised exact name match certifies registration; similar names, even with
+          # only the legal form changed, need review
+          if ffi_list.contains(business_name):
               print(f"fatca is Compliant")
               return "Compliant"
-              
+          elif any(hit["score"] >= SCREENING_MATCH_THRESHOLD for hit in self.fatca_matches):
+              print(f"fatca is Possible match")
+              return "Possible match"
           else:
               print(f"fatca is Not Compliant")
               return "Not Compliant"
@@ -144,8 +151,8 @@ class EIN_LOOKUP:
         try:
             print("Sanctions Blacklist chechecking")
 
-            df_sdn= pd.read_csv(self._sdn,header=None)
-            exists = business_name in df_sdn[1].values
+            self.blacklist_matches = screen(sdn_list(self._sdn), business_name)
+            exists = any(hit["score"] >= SCREENING_MATCH_THRESHOLD for hit in self.blacklist_matches)
             if exists:
                 print(f"Blacklist")
                 return "Blacklist"
@@ -158,19 +165,42 @@ class EIN_LOOKUP:
 
 
 
+    def screen_business(self, business):
+        """Add FATCA and sanctions screening results to looked-up business details."""
+        fatca= self.fatcacheck(business['company_name'])   
+        blacklist = self.Sanctions_Blacklist_Check(business['company_name'])
+
+        business['fatca_comliant'] = fatca  # Compliant, Possible match or Not Compliant
+        business['blacklist'] = blacklist # Blacklist or not Blacklist
+        business['fatca_matches'] = self.fatca_matches  # ranked fuzzy hits with scores
+        # Registered names a "Possible match" resembles, for manual review
+        business['fatca_review'] = [hit['name'] for hit in self.fatca_matches
+                                    if SCREENING_MATCH_THRESHOLD <= hit['score'] < 1.0] if fatca == "Possible match" else []
+        business['blacklist_matches'] = self.blacklist_matches
+        return business
+
+    def cached_validation(self):
+        """Return the screened business details, or None for an unknown EIN.
+
+        The lookup is served from the EIN cache, but screening always runs
+        against the current lists. Network errors raise and are not cached.
+        """
+        cached = ein_cache.get_cached(self._ein)
+        if cached is not None:
+            details = cached["details"]
+        else:
+            details = self.fetch_details()
+            ein_cache.store(self._ein, details)
+        if details is None:
+            return None
+        return self.screen_business(dict(details))
+
     def return_validation_json(self):
         try:
 
-            ein_details_json = self.einlookup()
-            if ein_details_json is not None:
-                business = json.loads(ein_details_json) 
+            business = self.cached_validation()
+            if business is not None:
                 print(business)
-            
-                fatca= self.fatcacheck(business['company_name'])   
-                blacklist = self.Sanctions_Blacklist_Check(fatca)   
-
-                business['fatca_comliant'] = fatca  # Compliant or not Compliant
-                business['blacklist'] = blacklist # Blacklist or not Blacklist
 
                 data = json.dumps(business,indent=4)
                 return data
@@ -0,0 +1,177 @@
+import json
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+from src.EIn_lookup.screening import normalize_name
+
+load_dotenv()
+
+# Dice similarity at or above which a fuzzy hit counts as a match
+SCREENING_MATCH_THRESHOLD = float(os.getenv("SCREENING_MATCH_THRESHOLD", "0.85"))
+# Lowest similarity still reported as a hit for manual review
+SCREENING_REVIEW_THRESHOLD = float(os.getenv("SCREENING_REVIEW_THRESHOLD", "0.7"))
+SCREENING_MAX_HITS = int(os.getenv("SCREENING_MAX_HITS", "5"))
+
+# Highest fuzzy score. Names equal only after dropping legal forms ("Foo Bank Ltd" and
+# "Foo Bank PLC") may be different entities, so 1.0 is kept for normalised exact matches
+CANONICAL_MATCH_SCORE = 0.99
+
+NGRAM = 3
+
+# Arrays of a FuzzyNameIndex saved as .npy files and memory-mapped on load
+INDEX_ARRAYS = ("gram_counts", "postings", "offsets")
+
+# Common abbreviations, mapped to one spelling so "MFG" and "Manufacturing" compare equal
+ABBREVIATIONS = {
+    "MFG": "MANUFACTURING", "MANUF": "MANUFACTURING", "INTL": "INTERNATIONAL", "INTERNATL": "INTERNATIONAL",
+    "NATL": "NATIONAL", "SVCS": "SERVICES", "SVC": "SERVICES", "SERV": "SERVICES", "TECH": "TECHNOLOGY",
+    "TECHNOLOGIES": "TECHNOLOGY", "BK": "BANK", "GRP": "GROUP", "HLDGS": "HOLDINGS", "HLDG": "HOLDINGS",
+    "ASSN": "ASSOCIATION", "ASSOC": "ASSOCIATION", "DEPT": "DEPARTMENT", "MGMT": "MANAGEMENT",
+    "INVT": "INVESTMENT", "INVTS": "INVESTMENTS", "FIN": "FINANCIAL", "FINL": "FINANCIAL",
+    "INDS": "INDUSTRIES", "IND": "INDUSTRIES", "ENTMT": "ENTERTAINMENT", "SYS": "SYSTEMS",
+}
+
+# Legal-form words that carry no identity and are dropped from the end of a name
+LEGAL_SUFFIXES = frozenset("""
+INC INCORPORATED CORP CORPORATION CO COMPANY LTD LIMITED LLC LLP LP PLC PC PA SA SAS SARL AG GMBH KG NV BV
+SPA SRL PTY PTE BHD SDN OY AB AS ASA KK TRUST FUND
+""".split())
+
+
+def canonical_name(name):
+    """Normalise case and punctuation, expand abbreviations and drop trailing legal forms."""
+    tokens = [ABBREVIATIONS.get(token, token) for token in normalize_name(str(name).replace("&", " AND ")).split()]
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    if len(tokens) > 1 and tokens[0] == "THE":
+        tokens.pop(0)
+    return " ".join(tokens)
+
+
+def ngrams(text, n=NGRAM):
+    """Distinct character n-grams of ``text``, padded so word boundaries count."""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class FuzzyNameIndex:
+    """Character n-gram inverted index over a list of names, scored with the Dice coefficient.
+
+    Postings are stored CSR-style in flat numpy arrays. A query gathers the
+    postings of its own n-grams, counts shared n-grams per name with one
+    ``np.bincount`` and scores all candidates at once, so the cost scales
+    with the query's postings rather than with a string-distance loop over
+    the whole list.
+    """
+
+    def __init__(self, names):
+        canonical_to_name = {}
+        for name in names:
+            canonical = canonical_name(name)
+            if canonical and canonical not in canonical_to_name:
+                canonical_to_name[canonical] = str(name)
+        self.canonical = list(canonical_to_name)
+        self.names = [canonical_to_name[canonical] for canonical in self.canonical]
+
+        grams_by_name = [ngrams(canonical) for canonical in self.canonical]
+        self.gram_counts = np.fromiter((len(grams) for grams in grams_by_name), dtype=np.int32, count=len(grams_by_name))
+
+        vocabulary = {}
+        pair_grams, pair_names = [], []
+        for name_id, grams in enumerate(grams_by_name):
+            for gram in grams:
+                pair_grams.append(vocabulary.setdefault(gram, len(vocabulary)))
+                pair_names.append(name_id)
+        self.vocabulary = vocabulary
+        gram_ids = np.asarray(pair_grams, dtype=np.int32)
+        name_ids = np.asarray(pair_names, dtype=np.int32)
+        order = np.argsort(gram_ids, kind="stable")
+        self.postings = name_ids[order]
+        self.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(vocabulary)), out=self.offsets[1:])
+
+    def __len__(self):
+        return len(self.names)
+
+    def save(self, path_for, write_atomic):
+        """Persist the index: one ``.npy`` per array plus the names and n-gram vocabulary as JSON.
+
+        ``path_for(part)`` names each file and ``write_atomic(path, write)``
+        writes it, so the files sit next to the screening snapshot.
+        """
+        for field in INDEX_ARRAYS:
+            write_atomic(path_for(f"{field}.npy"), lambda f, array=getattr(self, field): np.save(f, array))
+        # The vocabulary's insertion order is the n-gram id order
+        strings = {"names": self.names, "canonical": self.canonical, "grams": list(self.vocabulary)}
+        write_atomic(path_for("strings.json"), lambda f: f.write(json.dumps(strings).encode("utf-8")))
+
+    @classmethod
+    def load(cls, path_for):
+        """Index saved by ``save``, with the postings memory-mapped instead of rebuilt."""
+        with open(path_for("strings.json"), "r", encoding="utf-8") as f:
+            strings = json.load(f)
+        index = cls.__new__(cls)
+        index.names = strings["names"]
+        index.canonical = strings["canonical"]
+        index.vocabulary = {gram: gram_id for gram_id, gram in enumerate(strings["grams"])}
+        for field in INDEX_ARRAYS:
+            setattr(index, field, np.load(path_for(f"{field}.npy"), mmap_mode="r"))
+        return index
+
+    def search(self, name, threshold=None, limit=None):
+        """Return up to ``limit`` hits scoring at least ``threshold``, best first.
+
+        Each hit is a dict with the listed ``name``, its ``canonical`` form and
+        the Dice ``score``, capped at ``CANONICAL_MATCH_SCORE`` which a
+        canonical exact match scores.
+        """
+        threshold = SCREENING_REVIEW_THRESHOLD if threshold is None else threshold
+        limit = limit or SCREENING_MAX_HITS
+        canonical = canonical_name(name)
+        if not canonical or not self.names:
+            return []
+
+        query_grams = [self.vocabulary[gram] for gram in ngrams(canonical) if gram in self.vocabulary]
+        query_size = len(ngrams(canonical))
+        if not query_grams:
+            return []
+        candidates = np.concatenate([self.postings[self.offsets[g]:self.offsets[g + 1]] for g in query_grams])
+        shared = np.bincount(candidates, minlength=len(self.names))
+        name_ids = np.nonzero(shared)[0]
+        scores = np.minimum(2.0 * shared[name_ids] / (query_size + self.gram_counts[name_ids]), CANONICAL_MATCH_SCORE)
+
+        keep = scores >= threshold
+        name_ids, scores = name_ids[keep], scores[keep]
+        if name_ids.size > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            name_ids, scores = name_ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [
+            {"name": self.names[name_id], "canonical": self.canonical[name_id], "score": round(float(score), 4)}
+            for name_id, score in zip(name_ids[order], scores[order])
+        ]
+
+    def search_many(self, names, threshold=None, limit=None):
+        """Screen several names, e.g. every counterparty in a data room; returns {name: hits}."""
+        return {name: self.search(name, threshold=threshold, limit=limit) for name in names}
+
+
+def fuzzy_index_for(screening_list):
+    """Fuzzy index over a ScreeningList, loaded from its snapshot and reloaded when the CSV changes."""
+    return screening_list.fuzzy_index()
+
+
+def screen(screening_list, name, threshold=None, limit=None):
+    """Ranked hits for ``name`` on a screening list.
+
+    Only a normalised exact match (``ScreeningList.contains``) scores 1.0 and
+    comes first; every other hit, even a canonical one, scores below it.
+    """
+    hits = fuzzy_index_for(screening_list).search(name, threshold=threshold, limit=limit)
+    if screening_list.contains(name):
+        normalized = normalize_name(name)
+        hits = [{"name": str(name), "canonical": canonical_name(name), "score": 1.0}] + [
+            hit for hit in hits if normalize_name(hit["name"]) != normalized
+        ]
+    return hits
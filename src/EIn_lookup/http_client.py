@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EIN_LOOKUP_URL = os.getenv("EIN_LOOKUP_URL", "https://eintaxid.com/search-ajax.php")
+EIN_CONNECT_TIMEOUT = float(os.getenv("EIN_CONNECT_TIMEOUT", "5"))
+EIN_READ_TIMEOUT = float(os.getenv("EIN_READ_TIMEOUT", "20"))
+EIN_MAX_RETRIES = int(os.getenv("EIN_MAX_RETRIES", "3"))
+EIN_BACKOFF_FACTOR = float(os.getenv("EIN_BACKOFF_FACTOR", "0.5"))
+# Requests per second allowed against any one host, with a small burst
+EIN_RATE_PER_SECOND = float(os.getenv("EIN_RATE_PER_SECOND", "2"))
+EIN_RATE_BURST = int(os.getenv("EIN_RATE_BURST", "4"))
+EIN_POOL_SIZE = int(os.getenv("EIN_POOL_SIZE", "16"))
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+
+
+class TokenBucket:
+    """Blocking token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def wait_for_host(url):
+    """Block until a request to ``url``'s host is allowed by its rate limit."""
+    host = urlparse(url).netloc
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(EIN_RATE_PER_SECOND, EIN_RATE_BURST)
+    bucket.acquire()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide keep-alive session with a sized connection pool and retry with backoff."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=EIN_MAX_RETRIES,
+                    backoff_factor=EIN_BACKOFF_FACTOR,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    # The lookup is a read-only search, so retrying the POST is safe
+                    allowed_methods=frozenset({"GET", "POST"}),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=EIN_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.headers.update({"User-Agent": USER_AGENT})
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def post_lookup(ein, url=None):
+    """POST one EIN search through the shared session; raises on network or HTTP errors."""
+    url = url or EIN_LOOKUP_URL
+    wait_for_host(url)
+    response = get_session().post(
+        url,
+        data={"query": str(ein)},
+        timeout=(EIN_CONNECT_TIMEOUT, EIN_READ_TIMEOUT),
+    )
+    response.raise_for_status()
+    return response.text
@@ -0,0 +1,254 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FFI_LIST_PATH = os.getenv("FFI_LIST_PATH", os.path.join("artifacts", "FFIListFull.csv"))
+SDN_LIST_PATH = os.getenv("SDN_LIST_PATH", os.path.join("artifacts", "sdn.csv"))
+SCREENING_SNAPSHOT_DIR = os.getenv("SCREENING_SNAPSHOT_DIR", os.path.join("artifacts", "screening"))
+# How often a loaded list re-checks its CSV for changes
+SCREENING_RECHECK_SECONDS = float(os.getenv("SCREENING_RECHECK_SECONDS", "30"))
+
+SNAPSHOT_VERSION = 1
+
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+
+
+def normalize_name(name):
+    """Upper-case, strip accents and collapse punctuation and whitespace to single spaces."""
+    if name is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.upper()).strip()
+
+
+def name_hash(normalized):
+    """64-bit fingerprint of a normalised name; the snapshot stores these instead of the strings."""
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ScreeningList:
+    """Membership test over one screening list, e.g. the FATCA FFI list or the OFAC SDN list.
+
+    The CSV is parsed once, every name is normalised and hashed, and the sorted
+    hashes are saved as a ``.npy`` snapshot next to a small JSON manifest. Later
+    processes memory-map the snapshot instead of parsing the CSV, and the
+    snapshot is rebuilt only when the CSV's size, mtime and content hash no
+    longer match the manifest. Lookups are a binary search over the hashes.
+    """
+
+    def __init__(self, name, csv_path, read_names, snapshot_dir=None):
+        self.name = name
+        self.csv_path = csv_path
+        self.read_names = read_names
+        self.snapshot_dir = snapshot_dir or SCREENING_SNAPSHOT_DIR
+        self._hashes = None
+        self._fuzzy = None
+        self._manifest = None
+        self._stat = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.snapshot_dir, f"{self.name}.npy")
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.snapshot_dir, f"{self.name}.json")
+
+    def fuzzy_path(self, part):
+        return os.path.join(self.snapshot_dir, f"{self.name}.fuzzy.{part}")
+
+    def _source_stat(self):
+        stat = os.stat(self.csv_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_atomic(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.snapshot_dir, prefix=f".{self.name}")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _write_manifest(self, manifest):
+        self._write_atomic(self.manifest_path, lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")))
+
+    def _build(self, source_stat, sha256):
+        # Imported here: the fuzzy index module imports this one for normalize_name
+        from src.EIn_lookup.fuzzy_index import FuzzyNameIndex
+
+        names = self.read_names(self.csv_path)
+        hashes = {name_hash(normalized) for normalized in map(normalize_name, names) if normalized}
+        array = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        array.sort()
+        fuzzy = FuzzyNameIndex(names)
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "source": os.path.abspath(self.csv_path),
+            "sha256": sha256,
+            "count": int(array.size),
+            "built_at": time.time(),
+            **source_stat,
+        }
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            self._write_atomic(self.snapshot_path, lambda f: np.save(f, array))
+            fuzzy.save(self.fuzzy_path, self._write_atomic)
+            # Records which CSV content the fuzzy files belong to
+            manifest["fuzzy_sha256"] = sha256
+            self._write_manifest(manifest)
+        except OSError as e:
+            # Still screen from memory; the next process will try to persist again
+            logger.error(f"❌ Could not write {self.name} screening snapshot: {e}")
+        self._manifest = manifest
+        self._fuzzy = fuzzy
+        return array
+
+    def _load(self):
+        source_stat = self._source_stat()
+        manifest = self._read_manifest()
+        usable = manifest is not None and manifest.get("version") == SNAPSHOT_VERSION and os.path.exists(self.snapshot_path)
+        built = False
+        if usable and all(manifest.get(field) == value for field, value in source_stat.items()):
+            hashes = np.load(self.snapshot_path, mmap_mode="r")
+        else:
+            # Size or mtime changed: only rebuild when the content really differs
+            sha256 = _file_sha256(self.csv_path)
+            if usable and manifest.get("sha256") == sha256:
+                hashes = np.load(self.snapshot_path, mmap_mode="r")
+                manifest.update(source_stat)
+                try:
+                    self._write_manifest(manifest)
+                except OSError as e:
+                    logger.error(f"❌ Could not update {self.name} screening manifest: {e}")
+            else:
+                logger.info(f"Rebuilding {self.name} screening snapshot from {self.csv_path}")
+                hashes = self._build(source_stat, sha256)
+                built = True
+        if not built:
+            # Loaded from disk: the fuzzy index is memory-mapped on first use
+            self._manifest = manifest
+            self._fuzzy = None
+        self._hashes = hashes
+        self._stat = source_stat
+        self._checked_at = time.monotonic()
+
+    def hashes(self):
+        """Return the sorted hash array, reloading when the CSV has changed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._hashes is None:
+                self._load()
+            elif now - self._checked_at > SCREENING_RECHECK_SECONDS:
+                self._checked_at = now
+                if self._source_stat() != self._stat:
+                    self._load()
+            return self._hashes
+
+    def _load_fuzzy(self):
+        from src.EIn_lookup.fuzzy_index import FuzzyNameIndex
+
+        if self._manifest.get("fuzzy_sha256") == self._manifest.get("sha256"):
+            try:
+                return FuzzyNameIndex.load(self.fuzzy_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"❌ Could not load {self.name} fuzzy index, rebuilding it: {e}")
+        # Snapshot written before the fuzzy index was persisted, or its files are missing
+        logger.info(f"Building {self.name} fuzzy index from {self.csv_path}")
+        fuzzy = FuzzyNameIndex(self.read_names(self.csv_path))
+        try:
+            fuzzy.save(self.fuzzy_path, self._write_atomic)
+            self._manifest["fuzzy_sha256"] = self._manifest.get("sha256")
+            self._write_manifest(self._manifest)
+        except OSError as e:
+            logger.error(f"❌ Could not write {self.name} fuzzy index: {e}")
+        return fuzzy
+
+    def fuzzy_index(self):
+        """Fuzzy name index for the current list, memory-mapped from the snapshot when it has one."""
+        self.hashes()
+        with self._lock:
+            if self._fuzzy is None:
+                self._fuzzy = self._load_fuzzy()
+            return self._fuzzy
+
+    def source_stat(self):
+        """Size and mtime of the CSV the loaded list was built from."""
+        self.hashes()
+        return self._stat
+
+    def __len__(self):
+        return int(self.hashes().size)
+
+    def contains(self, name):
+        """True when the normalised ``name`` appears on the list."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return False
+        hashes = self.hashes()
+        target = np.uint64(name_hash(normalized))
+        index = int(np.searchsorted(hashes, target))
+        return bool(index < hashes.size and hashes[index] == target)
+
+
+def _read_ffi_names(path):
+    return pd.read_csv(path, usecols=["FINm"], dtype=str)["FINm"].dropna()
+
+
+def _read_sdn_names(path):
+    return pd.read_csv(path, header=None, usecols=[1], dtype=str)[1].dropna()
+
+
+_lists = {}
+_lists_lock = threading.Lock()
+
+
+def _get_list(name, csv_path, read_names):
+    with _lists_lock:
+        screening_list = _lists.get((name, csv_path))
+        if screening_list is None:
+            screening_list = ScreeningList(name, csv_path, read_names)
+            _lists[(name, csv_path)] = screening_list
+        return screening_list
+
+
+def fatca_list(csv_path=None):
+    """Process-wide FATCA FFI list."""
+    return _get_list("fatca_ffi", csv_path or FFI_LIST_PATH, _read_ffi_names)
+
+
+def sdn_list(csv_path=None):
+    """Process-wide OFAC SDN list."""
+    return _get_list("ofac_sdn", csv_path or SDN_LIST_PATH, _read_sdn_names)
@@ -1,14 +1,10 @@
 import streamlit as st
-from huggingface_hub import InferenceClient
+from src.llm_gateway import hf_chat_completion
 from datetime import datetime
 import json
 
 class OperationalAssessment:
     def __init__(self):
-        self.client = InferenceClient(
-            provider="hf-inference",
-            api_key=st.secrets["hf_token"]
-        )
         self.phases = {
             "Phase 1": {
                 "name": "Business Process Analysis",
@@ -57,17 +53,13 @@ class OperationalAssessment:
         Focus on actionable insights and data-driven recommendations.
         """
 
+        messages = [
+            {"role": "system", "content": "You are an experienced MBB consultant specializing in operational strategy."},
+            {"role": "user", "content": formatted_prompt}
+        ]
+
         try:
-            response = self.client.chat_completion(
-                model=st.secrets["hf_model"],
-                messages=[
-                    {"role": "system", "content": "You are an experienced MBB consultant specializing in operational strategy."},
-                    {"role": "user", "content": formatted_prompt}
-                ],
-                max_tokens=8000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+            return hf_chat_completion(messages, st.secrets["hf_model"], st.secrets["hf_token"], temperature=0.7, max_tokens=8000)
         except Exception as e:
             return f"Error generating analysis: {str(e)}"
 
@@ -1,19 +1,14 @@
 import json
-from huggingface_hub import InferenceClient
 from scrapegraph_py import Client
 from typing import Dict, Any
 import streamlit as st
+from src.llm_gateway import hf_chat_completion
 
 
 def initialize_clients():
     """Initialize API clients"""
     scrapegraph_client = Client(api_key =st.secrets["scrapegraph_api_key"])
-    hf_client = InferenceClient(
-        provider="hf-inference",
-        model=st.secrets["hf_model"],
-        token=st.secrets["hf_token"],
-    )
-    return scrapegraph_client, hf_client
+    return scrapegraph_client
 
 def scrape_website_data(client,website_url: str, user_prompt: str) -> Dict[str, Any]:
     """Scrape website data using SmartScraper"""
@@ -35,7 +30,37 @@ def scrape_website_data(client,website_url: str, user_prompt: str) -> Dict[str,
         print(f"Error during scraping: {str(e)}")
         return {"error": "Scraping failed", "details": str(e)}
 
-def generate_report(hf_client, data_company: Dict[str, Any], report_prompt_template: str) -> Dict[str, Any]:
+REQUIRED_REPORT_KEYS = ["companyOverview", "people", "productServiceOfferings",
+                        "technologyStack", "marketPosition", "productPricingPosition",
+                        "swotAnalysis"]
+
+
+def _parse_report(raw_content):
+    """The report JSON in a model reply; raises ValueError when it is missing, malformed or incomplete."""
+    raw_content = raw_content.strip()
+
+    # Extract JSON from the response
+    json_start = raw_content.find('{')
+    json_end = raw_content.rfind('}') + 1
+    if json_start >= 0 and json_end > json_start:
+        cleaned_content = raw_content[json_start:json_end]
+    else:
+        raise ValueError("No valid JSON found in response")
+
+    # Parse and validate JSON
+    try:
+        report_json = json.loads(cleaned_content)
+    except json.JSONDecodeError as je:
+        print(f"Invalid JSON response: {cleaned_content}")
+        raise ValueError(f"Failed to parse response as JSON: {str(je)}")
+
+    missing_keys = [key for key in REQUIRED_REPORT_KEYS if key not in report_json]
+    if missing_keys:
+        raise ValueError(f"Missing required keys in response: {missing_keys}")
+    return report_json
+
+
+def generate_report(data_company: Dict[str, Any], report_prompt_template: str) -> Dict[str, Any]:
     """Generate report using HuggingFace model"""
     try:
         # Format data company as clean JSON string
@@ -67,40 +92,12 @@ def generate_report(hf_client, data_company: Dict[str, Any], report_prompt_templ
             }
         ]
 
-        # Generate response with increased max_tokens
-        response = hf_client.chat_completion(
-            messages=messages,
-            max_tokens=12000,  # Increased from 8192
-            temperature=0.1,
+        # The reply is parsed inside the call, so a malformed one is never cached
+        raw_content = hf_chat_completion(
+            messages, st.secrets["hf_model"], st.secrets["hf_token"], temperature=0.1, max_tokens=12000,
+            validate=_parse_report,
         )
-        
-        # Clean the response content
-        raw_content = response.choices[0].message.content.strip()
-        
-        # Extract JSON from the response
-        json_start = raw_content.find('{')
-        json_end = raw_content.rfind('}') + 1
-        if json_start >= 0 and json_end > json_start:
-            cleaned_content = raw_content[json_start:json_end]
-        else:
-            raise ValueError("No valid JSON found in response")
-
-        # Parse and validate JSON
-        try:
-            report_json = json.loads(cleaned_content)
-            required_keys = ["companyOverview", "people", "productServiceOfferings", 
-                           "technologyStack", "marketPosition", "productPricingPosition", 
-                           "swotAnalysis"]
-            
-            missing_keys = [key for key in required_keys if key not in report_json]
-            if missing_keys:
-                raise ValueError(f"Missing required keys in response: {missing_keys}")
-                
-            return report_json
-            
-        except json.JSONDecodeError as je:
-            print(f"Invalid JSON response: {cleaned_content}")
-            raise ValueError(f"Failed to parse response as JSON: {str(je)}")
+        return _parse_report(raw_content)
 
     except Exception as e:
         print(f"Error during report generation: {str(e)}")
@@ -155,7 +152,7 @@ def format_industry_analysis(report_json):
 def analyze_website(website_url: str) -> Dict[str, Any]:
     """Main function to analyze a website and generate a report"""
   
-    scrapegraph_client, hf_client = initialize_clients()
+    scrapegraph_client = initialize_clients()
     
     
     # Default scraping prompt
@@ -198,7 +195,7 @@ def analyze_website(website_url: str) -> Dict[str, Any]:
     }
     """
     
-    report_data = generate_report(hf_client,scraped_data, report_prompt_template)
+    report_data = generate_report(scraped_data, report_prompt_template)
     if isinstance(report_data, dict) and "error" in report_data:
         print(f"Report generation failed: {report_data.get('details', report_data['error'])}")
         return report_data
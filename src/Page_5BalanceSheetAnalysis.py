@@ -4,12 +4,49 @@ from datetime import datetime
 from huggingface_hub import InferenceClient
 import json
 from src.db.sql_operation import execute_query, fetch_query
+from src.statement_store import statement_store
+from src.ratios import year_ratios
+from src.report_tables import NARRATIVE_MAX_TOKENS, metric_table, narrative_messages, render_tables, saved_guidance, with_narrative
+from src.llm_gateway import chat_completion, chat_completion_stream
 from sqlalchemy import text
-from openai import AzureOpenAI 
 from dotenv import load_dotenv
 import os
 load_dotenv()
 
+# Line items the balance sheet ratios need from the statement store
+BALANCE_SHEET_ITEMS = [
+    "Current Assets", "Non-Current Assets", "Total Assets", "Current Liabilities",
+    "Non-Current Liabilities", "Total Liabilities", "Shareholders Equity",
+]
+
+BALANCE_SHEET_TITLE = "Balance Sheet Report"
+BALANCE_SHEET_INTRO = ("This report provides an analysis of key balance sheet metrics for three consecutive years, "
+                       "examining Total Assets, Total Liabilities, Shareholder's Equity, the Current Ratio and the "
+                       "Debt-to-Equity Ratio to assess the company's financial position, liquidity and leverage. "
+                       "All values are in millions of USD.")
+
+# (metric, label, format, calculation, interpretation) rows of the balance sheet table
+BALANCE_SHEET_ROWS = [
+    ("Total Assets", "Total Assets", "millions", "Current Assets + Non-Current Assets",
+     "Everything the company owns that has economic value."),
+    ("Current Assets", "Current Assets", "millions", "Given", "Assets expected to be converted to cash within a year."),
+    ("Total Liabilities", "Total Liabilities", "millions", "Current Liabilities + Non-Current Liabilities",
+     "Everything the company owes to creditors."),
+    ("Current Liabilities", "Current Liabilities", "millions", "Given", "Obligations due within a year."),
+    ("Shareholders Equity", "Shareholder's Equity", "millions", "Given",
+     "The owners' residual claim on the company's assets."),
+    ("Current Ratio", "Current Ratio", "ratio", "Current Assets / Current Liabilities",
+     "Ability to cover short-term obligations with short-term assets; above 1 indicates adequate liquidity."),
+    ("Debt-to-Equity Ratio", "Debt-to-Equity Ratio", "ratio", "Total Liabilities / Shareholder's Equity",
+     "How much of the company is financed by creditors relative to owners; higher means more leverage."),
+]
+
+BALANCE_SHEET_NARRATIVE = [
+    ("Financial Position Overview", "what the asset, liability and equity trends say about liquidity and leverage"),
+    ("Conclusion", "a 3-4 line summary of the overall findings and the company's financial position"),
+    ("Recommendations", "3-4 actionable recommendations based on the balance sheet analysis"),
+]
+
 class FinancialReportGenerator:
     def generate_dummy_financial_data(self, years):
         """Generate dummy financial data for given years."""
@@ -35,268 +72,57 @@ class FinancialReportGenerator:
             }
         return financial_data
 
+    def load_financial_data(self, company, years):
+        """Latest three complete years of stored balance sheets for ``company``, else dummy data for ``years``."""
+        stored = statement_store.to_year_dict(company, BALANCE_SHEET_ITEMS, latest=3, complete=True) if company else {}
+        return stored or self.generate_dummy_financial_data(years)
+
     def calculate_financial_ratios(self, financial_data):
         """Calculate financial ratios from the given data."""
+        ratios = year_ratios(financial_data, ["current_ratio", "liabilities_to_equity"], digits=2)
         results = {}
         for year, data in financial_data.items():
-            total_assets = data["Total Assets"]
-            total_liabilities = data["Total Liabilities"]
-            shareholders_equity = data["Shareholders Equity"]
-            current_assets = data["Current Assets"]
-            current_liabilities = data["Current Liabilities"]
-
-            current_ratio = current_assets / current_liabilities
-            debt_to_equity_ratio = total_liabilities / shareholders_equity
-
             results[year] = {
-                "Total Assets": total_assets,
-                "Total Liabilities": total_liabilities,
-                "Shareholders Equity": shareholders_equity,
-                "Current Ratio": round(current_ratio, 2),
-                "Debt-to-Equity Ratio": round(debt_to_equity_ratio, 2),
+                "Total Assets": data["Total Assets"],
+                "Total Liabilities": data["Total Liabilities"],
+                "Shareholders Equity": data["Shareholders Equity"],
+                "Current Ratio": ratios[year]["current_ratio"],
+                "Debt-to-Equity Ratio": ratios[year]["liabilities_to_equity"],
             }
         return results
 
-def generate_report(prompt, data):
-    """Generate financial report using HuggingFace model."""
-    # client = InferenceClient(
-    #     provider="hf-inference",
-    #     api_key=st.secrets["hf_token"],
-    # )
-    client = AzureOpenAI(
-            azure_endpoint= os.getenv("ENDPOINT_URL"),
-            azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version="2025-01-01-preview"
-        )
+def generate_report(data, stream=False):
+    """Interpretation, conclusion and recommendations for the balance sheet; the table is rendered locally."""
+    messages = narrative_messages("Balance Sheet report", data, BALANCE_SHEET_NARRATIVE, guidance=saved_guidance("balance_sheet"))
 
-    messages = [
-        {"role": "system", "content": "You are a financial report expert."},
-        {"role": "user", "content": prompt + f"Using data \n\n {data}"},
-    ]
+    if stream:
+        return chat_completion_stream(messages, temperature=0.1, max_tokens=NARRATIVE_MAX_TOKENS)
 
-    response = client.chat.completions.create(
-        model=os.getenv("DEPLOYMENT_NAME"),
-        messages=messages,
-        max_tokens=8000,
-        temperature=0.1,
-    )
+    return chat_completion(messages, temperature=0.1, max_tokens=NARRATIVE_MAX_TOKENS)
 
-    return response.choices[0].message.content
+def balancesheet(stream=False, company=None):
+    """With ``stream=True`` returns a generator of text deltas instead of the finished report.
 
-def balancesheet():
+    ``company`` selects stored statements; dummy data is used otherwise.
+    """
     
     generator = FinancialReportGenerator()
 
     # Generate dummy data for three years
     years = [2023, 2022, 2021]
-    financial_data = generator.generate_dummy_financial_data(years)
+    financial_data = generator.load_financial_data(company, years)
     
     # Calculate financial ratios
     financial_ratios = generator.calculate_financial_ratios(financial_data)
 
-  
-
-    # Default prompt template
-    default_prompt = """
-    <|begin_of_text|><|start_header_id|>system<|end_header_id|>
-   Objective:
-
-To analyze a company's balance sheet data over three consecutive years and generate a comprehensive report that assesses its financial position, liquidity, and leverage. The report should be structured in HTML format and include detailed explanations and interpretations of key metrics, similar to an MBB consultant's analysis.
-
-Agent Persona:
-
-You are a Senior Financial Analyst at a top-tier consulting firm (e.g., McKinsey, BCG, Bain). You possess a deep understanding of balance sheet analysis and are skilled at communicating complex financial information in a clear, concise, and actionable manner.
-
-Input Data:
-
-The agent will receive balance sheet data for three consecutive years, including:
-
-Total Assets (in millions of USD)
-
-Total Liabilities (in millions of USD)
-
-Shareholder's Equity (in millions of USD)
-
-Current Assets (in millions of USD)
-
-Current Liabilities (in millions of USD)
-
-Tasks:
-
-Data Presentation:
-
-Present the data in a well-formatted HTML table with the following columns:
-
-Metric
-
-Year 1
-
-Year 2
-
-Year 3
-
-Calculation
-
-Interpretation
-
-Ensure the table is styled for professional presentation (e.g., using CSS for borders, spacing, and alignment).
-
-Metric Calculation:
-
-Calculate the following key financial ratios for each year:
-
-Current Ratio: Current Assets / Current Liabilities
-
-Debt-to-Equity Ratio: Total Liabilities / Shareholder's Equity
-
-Metric Interpretation:
-
-Provide a clear and concise interpretation of each metric, explaining what it reveals about the company's financial health. The interpretation should be in 1-2 sentences.
-
-Report Generation:
-
-Generate an HTML report with the following sections:
-
-Heading: "Balance Sheet Report"
-
-Introduction: A brief overview of the purpose of the report and the metrics being analyzed.
-
-Table: The formatted table with data, calculations, and interpretations.
-
-Conclusion: A 3-4 line summary of the overall findings, highlighting key trends and the company's financial position.
-
-Recommendations: 3-4 actionable recommendations for the company, based on the balance sheet analysis.
-
-Additional Explanation of Calculations (MBB Style): Provide detailed explanations of the key balance sheet metrics and their significance, written in a style that an MBB consultant would use.
-—-----------------------------------
-
-
-
-
-
-
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Balance Sheet Report</h3>
-
-<p style='font-family: Arial, sans-serif;'>This report provides an analysis of key balance sheet metrics for three consecutive years.  We will examine Total Assets, Total Liabilities, Shareholder's Equity, the Current Ratio, and the Debt-to-Equity Ratio to assess the company's financial position, liquidity, and leverage. All values are in millions of USD.</p>
-
-<table style='width: 100%; border-collapse: collapse; font-family: Arial, sans-serif;'>
-  <thead style='background-color: #f2f2f2;'>
-    <tr>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Metric</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Year 1</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Year 2</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Year 3</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Calculation</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Interpretation</th>
-    </tr>
-  </thead>
-  <tbody>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Total Assets</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>100</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>110</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>120</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Represents the company's total resources. Increasing assets can indicate growth.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Total Liabilities</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>40</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>45</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>50</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Represents the company's total obligations to creditors.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Shareholder's Equity</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>60</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>65</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>70</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Total Assets - Total Liabilities</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Represents the owners' stake in the company.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Current Assets</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>50</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>55</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>60</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Assets that can be converted to cash within one year.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Current Liabilities</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>25</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>27</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>28</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-       <td style='padding: 8px; border: 1px solid #ddd;'>Obligations due within one year.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Current Ratio</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>2x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>2.04x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>2.14x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Current Assets / Current Liabilities</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Measures short-term liquidity; ability to pay short-term obligations. A higher ratio is generally better.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Debt-to-Equity Ratio</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>0.67x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>0.69x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>0.71x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Total Liabilities / Shareholder's Equity</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Measures financial leverage; proportion of financing from debt vs. equity. A lower ratio is generally better.</td>
-    </tr>
-  </tbody>
-</table>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Conclusion</h3>
-<p style='font-family: Arial, sans-serif;'>
-  The company's total assets, liabilities, and shareholder's equity are all showing a steady increase over the three years, indicating growth.  The Current Ratio is consistently above 2, demonstrating strong short-term liquidity.  The Debt-to-Equity Ratio is also relatively stable, suggesting a balanced capital structure.
-</p>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Recommendations</h3>
-<p style='font-family: Arial, sans-serif;'>
-  The company should maintain its strong liquidity position as indicated by the Current Ratio. While the Debt-to-Equity Ratio is reasonable, it should be monitored to ensure it doesn't increase significantly, which could increase financial risk.  Continued asset growth should be supported by profitable operations.
-</p>
-
-
-
-
-    <|eot_id|><|start_header_id|>user<|end_header_id|>
-
-    
-    Use this data and create a professional report.
-    Make sure response must be in HTML format.
-
-    <|eot_id|><|start_header_id|>assistant<|end_header_id|>
-    """
+    metrics = {year: {**financial_data[year], **financial_ratios[year]} for year in financial_data}
+    tables = render_tables(BALANCE_SHEET_TITLE, BALANCE_SHEET_INTRO, [metric_table(metrics, BALANCE_SHEET_ROWS)])
     report_data = {
                         "financial_data": financial_data,
                         "ratios": financial_ratios
                     }
-    
-    prompt_template = ""
-    
-    query = text("SELECT [balance_sheet] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0]['balance_sheet']
-        prompt_template = default_prompt
-    else:
-       prompt_template = default_prompt
-    
-
-
-    report = generate_report(prompt_template + "Here is the balance sheet for the years 2023, 2022, and 2021: in {json}", report_data)
-
-
-    return report
+    return with_narrative(tables, generate_report(report_data, stream=stream))
 
 
 if __name__ == "__main__":
-    balancesheet()
\ No newline at end of file
+    balancesheet()
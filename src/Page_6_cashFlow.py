@@ -4,12 +4,54 @@ from datetime import datetime
 from huggingface_hub import InferenceClient
 import json
 from src.db.sql_operation import execute_query, fetch_query
+from src.statement_store import statement_store
+from src.ratios import year_ratios
+from src.report_tables import NARRATIVE_MAX_TOKENS, metric_table, narrative_messages, render_tables, saved_guidance, with_narrative
+from src.llm_gateway import chat_completion, chat_completion_stream
 from sqlalchemy import text
-from openai import AzureOpenAI 
 from dotenv import load_dotenv
 import os
 load_dotenv()
 
+# Line items the cash flow metrics need from the statement store
+CASH_FLOW_ITEMS = [
+    "Net Income", "Adjustments for Non-Cash Items", "Changes in Working Capital",
+    "Cash from Operating Activities", "Cash from Investing Activities", "Cash from Financing Activities",
+    "Net Cash Flow", "Beginning Cash Balance", "Ending Cash Balance",
+]
+
+CASH_FLOW_TITLE = "Cash Flow Statement Analysis Report"
+CASH_FLOW_INTRO = ("This report provides an analysis of cash flow metrics for three consecutive years, examining "
+                   "Operating Cash Flow (OCF), Free Cash Flow (FCF) and the Cash Flow Coverage Ratio to assess the "
+                   "company's ability to generate cash, fund its operations and service its obligations. "
+                   "All values are in millions of USD.")
+
+# (metric, label, format, calculation, interpretation) rows of the cash flow table
+CASH_FLOW_ROWS = [
+    ("Net Income", "Net Income", "millions", "Given", "Profit for the period before non-cash adjustments."),
+    ("Operating Cash Flow (OCF)", "Operating Cash Flow (OCF)", "millions",
+     "Net Income + Non-Cash Items + Changes in Working Capital",
+     "Cash generated from core business operations; an upward trend is positive."),
+    ("Cash from Investing Activities", "Cash from Investing Activities", "millions", "Given",
+     "Cash spent on or received from long-term investments; outflows often signal growth investment."),
+    ("Cash from Financing Activities", "Cash from Financing Activities", "millions", "Given",
+     "Cash raised from or returned to lenders and shareholders."),
+    ("Free Cash Flow (FCF)", "Free Cash Flow (FCF)", "millions", "OCF - Capital Expenditures",
+     "Cash available after operating needs and capital expenditures; positive and increasing FCF is desirable."),
+    ("Net Cash Flow", "Net Cash Flow", "millions", "Operating + Investing + Financing Cash Flows",
+     "Overall change in the cash position over the year."),
+    ("Ending Cash Balance", "Ending Cash Balance", "millions", "Beginning Cash Balance + Net Cash Flow",
+     "Cash held at the end of the year."),
+    ("Cash Flow Coverage Ratio", "Cash Flow Coverage Ratio", "ratio", "OCF / Total Liabilities",
+     "Ability to cover obligations from operating cash flow; a higher ratio indicates stronger solvency."),
+]
+
+CASH_FLOW_NARRATIVE = [
+    ("Cash Flow Overview", "what the operating, investing and financing cash flows say about cash generation"),
+    ("Conclusion", "a 3-4 line summary of the cash flow trends and the company's ability to service its obligations"),
+    ("Recommendations", "3-4 actionable recommendations based on the cash flow analysis"),
+]
+
 class CashFlowAnalyzer:
     def generate_dummy_cash_flow_data(self, years):
         """Generate dummy cash flow data for given years."""
@@ -56,170 +98,66 @@ class CashFlowAnalyzer:
             }
         return balance_sheet_data
 
+    def load_statements(self, company, years):
+        """(cash flow, balance sheet) dicts from the statement store for ``company``, else dummy data for ``years``."""
+        if company:
+            cash_flow = statement_store.to_year_dict(company, CASH_FLOW_ITEMS, latest=3, complete=True)
+            balance_sheet = statement_store.to_year_dict(company, ["Total Liabilities"], complete=True)
+            if cash_flow and all(year in balance_sheet for year in cash_flow):
+                return cash_flow, {year: balance_sheet[year] for year in cash_flow}
+        return self.generate_dummy_cash_flow_data(years), self.generate_dummy_balance_sheet(years)
+
     def calculate_cash_flow_metrics(self, cash_flow_data, balance_sheet_data):
         """Calculate cash flow metrics from the given data."""
+        statements = {
+            year: {
+                **data,
+                "Total Liabilities": balance_sheet_data[year]["Total Liabilities"],
+                # Cash flow statements carry no capex line yet, so it stays simulated
+                "Capital Expenditures": data.get("Capital Expenditures", random.uniform(100000, 500000)),
+            }
+            for year, data in cash_flow_data.items()
+        }
+        ratios = year_ratios(statements, ["free_cash_flow", "cash_flow_coverage"], digits=2)
         metrics = {}
-        for year in cash_flow_data.keys():
-            ocf = cash_flow_data[year]["Cash from Operating Activities"]
-            capital_expenditures = random.uniform(100000, 500000)
-            fcf = ocf - capital_expenditures
-            total_debt = balance_sheet_data[year]["Total Liabilities"]
-            cash_flow_coverage_ratio = ocf / total_debt
-            
+        for year, data in cash_flow_data.items():
             metrics[year] = {
-                "Operating Cash Flow (OCF)": round(ocf, 2),
-                "Free Cash Flow (FCF)": round(fcf, 2),
-                "Cash Flow Coverage Ratio": round(cash_flow_coverage_ratio, 2),
+                "Operating Cash Flow (OCF)": round(data["Cash from Operating Activities"], 2),
+                "Free Cash Flow (FCF)": ratios[year]["free_cash_flow"],
+                "Cash Flow Coverage Ratio": ratios[year]["cash_flow_coverage"],
             }
         return metrics
 
-def generate_report(prompt, data):
-    """Generate financial report using HuggingFace model."""
-    # client = InferenceClient(
-    #     provider="hf-inference",
-    #     api_key=st.secrets["hf_token"],
-    # )
-    client = AzureOpenAI(
-            azure_endpoint= os.getenv("ENDPOINT_URL"),
-            azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version="2025-01-01-preview"
-        )
-
-    messages = [
-        {"role": "system", "content": "You are a financial report expert."},
-        {"role": "user", "content": prompt + f"Using data \n\n {data}"},
-    ]
-
-    response = client.chat.completions.create(
-        model=os.getenv("DEPLOYMENT_NAME"),
-        messages=messages,
-        max_tokens=8000,
-        temperature=0.1,
-    )
-
-    return response.choices[0].message.content
-
-def cashflow():
+def generate_report(data, stream=False):
+    """Interpretation, conclusion and recommendations for the cash flows; the table is rendered locally."""
+    messages = narrative_messages("Cash Flow Statement report", data, CASH_FLOW_NARRATIVE, guidance=saved_guidance("cash_flow"))
+
+    if stream:
+        return chat_completion_stream(messages, temperature=0.1, max_tokens=NARRATIVE_MAX_TOKENS)
+
+    return chat_completion(messages, temperature=0.1, max_tokens=NARRATIVE_MAX_TOKENS)
+
+def cashflow(stream=False, company=None):
+    """With ``stream=True`` returns a generator of text deltas instead of the finished report.
+
+    ``company`` selects stored statements; dummy data is used otherwise.
+    """
     analyzer = CashFlowAnalyzer()
 
     # Generate data for three years
     years = [2023, 2022, 2021]
-    cash_flow_data = analyzer.generate_dummy_cash_flow_data(years)
-    balance_sheet_data = analyzer.generate_dummy_balance_sheet(years)
+    cash_flow_data, balance_sheet_data = analyzer.load_statements(company, years)
     
     # Calculate metrics
     cash_flow_metrics = analyzer.calculate_cash_flow_metrics(cash_flow_data, balance_sheet_data)
 
-    default_prompt = """
-   <h3 style='color: #555; font-family: Arial, sans-serif;'>Cash Flow Statement Analysis Report</h3>
-
-<p style='font-family: Arial, sans-serif;'>This report provides an analysis of cash flow metrics for three consecutive years.  We will examine Operating Cash Flow (OCF), Free Cash Flow (FCF), and the Cash Flow Coverage Ratio to assess the company's ability to generate cash, fund its operations, and service its debt.  All values are in millions of USD.</p>
-
-<table style='width: 100%; border-collapse: collapse; font-family: Arial, sans-serif;'>
-  <thead style='background-color: #f2f2f2;'>
-    <tr>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Metric</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Year 1</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Year 2</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Year 3</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Calculation</th>
-      <th style='padding: 8px; border: 1px solid #ddd;'>Interpretation</th>
-    </tr>
-  </thead>
-  <tbody>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Revenue</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>100</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>120</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>130</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Increasing revenue indicates potential for stronger cash flow generation.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Operating Cash Flow (OCF)</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>20</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>25</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>30</td>
-       <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>OCF shows the cash generated from core business operations. Upward trend is positive.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Capital Expenditures (CAPEX)</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>12</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>15</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>CAPEX represents investments in fixed assets. Increasing CAPEX may indicate growth.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Free Cash Flow (FCF)</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>10</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>13</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>15</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>OCF - CAPEX</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>FCF is the cash available to the company after covering operating expenses and capital expenditures.  Positive and increasing FCF is highly desirable.</td>
-    </tr>
-     <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Interest Expense</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>5</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>6</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>7</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Given</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Interest expense is the cost of borrowing.</td>
-    </tr>
-    <tr>
-      <td style='padding: 8px; border: 1px solid #ddd;'>Cash Flow Coverage Ratio</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>4x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>4.17x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>4.29x</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>OCF / Interest Expense</td>
-      <td style='padding: 8px; border: 1px solid #ddd;'>This ratio measures the company's ability to pay its interest obligations. A higher ratio indicates stronger solvency.</td>
-    </tr>
-  </tbody>
-</table>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Conclusion</h3>
-<p style='font-family: Arial, sans-serif;'>
-  The company demonstrates a positive trend in cash flow generation, with both OCF and FCF increasing over the three years. The Cash Flow Coverage Ratio is also healthy, indicating a strong ability to service debt. The consistent increase in revenue is a positive indicator for future cash flow.
-  <br>
-  <b style='color:red'>However, the analysis does not delve into the reasons behind the increase in OCF.  A deeper dive into the components of OCF (e.g., changes in working capital) would provide more insight. Additionally, while the Cash Flow Coverage Ratio is increasing, it's important to compare it against industry benchmarks to assess its true strength.</b>
-</p>
-
-<h3 style='color: #555; font-family: Arial, sans-serif;'>Recommendations</h3>
-<p style='font-family: Arial, sans-serif;'>
-  The company should continue to focus on maintaining and improving its operating efficiency to further enhance OCF.  Monitoring CAPEX is crucial to balance growth investments with free cash flow generation.  Maintaining a strong Cash Flow Coverage Ratio is essential for investor confidence and access to capital.
-  <br>
-  <b style='color:red'>It is recommended to analyze working capital management trends to understand how changes in accounts receivable, inventory, and accounts payable are affecting OCF.  Furthermore, a comparison of the company's CAPEX to industry averages would help determine if the investment levels are appropriate for its growth stage.</b>
-<
-
-
-
-
-
-    """
-
-
+    metrics = {year: {**cash_flow_data[year], **cash_flow_metrics[year]} for year in cash_flow_data}
+    tables = render_tables(CASH_FLOW_TITLE, CASH_FLOW_INTRO, [metric_table(metrics, CASH_FLOW_ROWS)])
     report_data = {
                         "cash_flow_data": cash_flow_data,
                         "metrics": cash_flow_metrics
                     }
-    
-    prompt__ = ""
-    
-    query = text("SELECT [cash_flow] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0]['cash_flow']
-        prompt__ = default_prompt
-    else:
-        prompt__ = default_prompt
-
-                # Generate report
-    report = generate_report(prompt__ + " Here is the cash flow data for the years 2023, 2022, and 2021: in {json}", report_data)    
-    return report
+    return with_narrative(tables, generate_report(report_data, stream=stream))
 
 if __name__ == "__main__":
-    cashflow()
\ No newline at end of file
+    cashflow()
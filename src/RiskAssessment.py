@@ -3,7 +3,7 @@
 # after making changes to the OperationalAssessment class.
 
 import streamlit as st
-from huggingface_hub import InferenceClient
+from src.llm_gateway import hf_chat_completion
 # Using a fixed datetime for demonstration as requested
 from datetime import datetime
 
@@ -12,12 +12,8 @@ class OperationalAssessment:
         # Use st.secrets for sensitive information like API keys
         # Ensure you have hf_token and hf_model defined in your Streamlit secrets
         try:
-            self.client = InferenceClient(
-                provider="hf-inference",
-                model=st.secrets["hf_model"], # Added model here for clarity, though chat_completion needs it too
-                token=st.secrets["hf_token"] # Use token argument
-            )
             self.model_name = st.secrets["hf_model"]
+            self.api_key = st.secrets["hf_token"]
         except KeyError as e:
             st.error(f"Missing Streamlit secret: {e}. Please add 'hf_token' and 'hf_model' to your secrets.")
             st.stop()
@@ -208,25 +204,14 @@ Ensure the language is concise, data-driven, professional, and focuses on action
         **Provide your analysis below:**
         """
 
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+
         try:
-            # Use the client initialized in __init__
-            response = self.client.chat_completion(
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                ],
-                max_tokens=8000,  # Increased max_tokens for potentially detailed analysis
-                temperature=0.6, # Slightly lower temp for more focused output
-                # model=self.model_name # Model defined during init
-                # Ensure you pass the model name if InferenceClient requires it per call,
-                # otherwise it uses the one from init. Check library documentation.
-                # If the client was initialized with the model, this might not be needed.
-            )
-            # Check if response structure is as expected
-            if response.choices and response.choices[0].message:
-                 return response.choices[0].message.content.strip() # .strip() to remove leading/trailing whitespace
-            else:
-                 return "Error: Received an unexpected response structure from the model."
+            content = hf_chat_completion(messages, self.model_name, self.api_key, temperature=0.6, max_tokens=8000)
+            return content.strip()
 
         except Exception as e:
             st.error(f"Error generating analysis via Hugging Face API: {str(e)}")
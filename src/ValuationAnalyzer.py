@@ -1,9 +1,37 @@
 import streamlit as st
 import json
 from datetime import datetime
-from huggingface_hub import InferenceClient
+from src.llm_gateway import hf_chat_completion
+from src.comparables import comparable_analysis
+from src.monte_carlo import run_simulation
 
 class ValuationAnalyzer:
+    def comparable_company(self, ebitda, revenue):
+        """Comparable company block from the peer universe, or the default peers when there is none."""
+        analysis = comparable_analysis({"ebitda": ebitda, "revenue": revenue})
+        if analysis is None or not analysis["multiples"]["ev_ebitda"]["count"]:
+            return {
+                "ebitda": ebitda,
+                "industry_ev_ebitda_multiple": 8,
+                "peer_companies": [
+                    {"name": "Peer1", "ev_ebitda": 7.8},
+                    {"name": "Peer2", "ev_ebitda": 8.2},
+                    {"name": "Peer3", "ev_ebitda": 7.9}
+                ],
+                "calculated_value": 12000000
+            }
+        statistics = analysis["multiples"]["ev_ebitda"]
+        return {
+            "ebitda": ebitda,
+            "industry_ev_ebitda_multiple": statistics["median"],
+            "multiple_statistics": statistics,
+            "peer_count": analysis["peer_count"],
+            "peer_companies": [
+                {"name": peer["name"], "ev_ebitda": peer["ev_ebitda"]} for peer in analysis["peers"]
+            ],
+            "calculated_value": round(ebitda * statistics["median"])
+        }
+
     def generate_valuation_dummy_data(self):
         """Generate dummy data for different valuation methods."""
         data = {
@@ -19,16 +47,7 @@ class ValuationAnalyzer:
                 "terminal_value": 45000000,
                 "total_dcf_value": 7380000
             },
-            "comparable_company": {
-                "ebitda": 1500000,
-                "industry_ev_ebitda_multiple": 8,
-                "peer_companies": [
-                    {"name": "Peer1", "ev_ebitda": 7.8},
-                    {"name": "Peer2", "ev_ebitda": 8.2},
-                    {"name": "Peer3", "ev_ebitda": 7.9}
-                ],
-                "calculated_value": 12000000
-            },
+            "comparable_company": self.comparable_company(ebitda=1500000, revenue=10000000),
             "rule_of_thumb": {
                 "annual_revenue": 10000000,
                 "industry_multiplier": 1.5,
@@ -39,22 +58,18 @@ class ValuationAnalyzer:
                 "pe_ratio": 12,
                 "calculated_value": 24000000
             },
-            "monte_carlo": {
-                "simulations": 1000,
-                "mean_value": 18500000,
-                "min_value": 16000000,
-                "max_value": 21000000
-            }
+            # Seeded, so the report (and its cached completion) is reproducible
+            "monte_carlo": run_simulation({
+                "base_revenue": 10000000,
+                "years": 3,
+                "margin": (0.25, 0.04),
+                "discount_rate": (0.10, 0.015),
+            })
         }
         return data
 
 def generate_report(prompt, data):
     """Generate valuation report using HuggingFace model."""
-    client = InferenceClient(
-        provider="hf-inference",
-        api_key=st.secrets["hf_token"],
-    )
-
     # Include timestamp and username in the context
     context = {
         "data": data,
@@ -66,14 +81,7 @@ def generate_report(prompt, data):
         {"role": "user", "content": prompt.format(json=json.dumps(context, indent=2))},
     ]
 
-    response = client.chat_completion(
-        model=st.secrets["hf_model"],
-        messages=messages,
-        max_tokens=8000,
-        temperature=0.1,
-    )
-
-    return response.choices[0].message.content
+    return hf_chat_completion(messages, st.secrets["hf_model"], st.secrets["hf_token"], temperature=0.1, max_tokens=8000)
 
 def valuationreports_():
     # st.title("Dynamic Valuation Report Generator")
@@ -0,0 +1,312 @@
+import argparse
+import csv
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", os.path.join("artifacts", "batch_reports"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "2"))
+
+REQUIRED_FIELDS = ("company", "website_url", "industry")
+# The Full Reports page's defaults for the assessment inputs
+JOB_DEFAULTS = {
+    "hc_phase": "Phase 1",
+    "hc_task": "Task 1: Analyze Organizational Structure",
+    "operation_phase": "Phase 1",
+    "operation_task": "Task 1",
+    "industry_context": "",
+    "legal_phase": "Phase 1",
+    "legal_task": "Task 1",
+    "company_type": "Private Company",
+    "risk_phase": "Phase 1",
+    "risk_task": "Task 1",
+    "industry_type": "Manufacturing",
+}
+
+REPORT_FILE = "report.html"
+STATUS_FILE = "status.json"
+SECTIONS_DIR = "sections"
+
+
+def load_jobs(path):
+    """Jobs from a ``.jsonl`` or ``.csv`` file, with defaults filled in and a unique ``id`` each.
+
+    Raises ValueError for a job missing a required field or reusing an id.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = [{key: value for key, value in row.items() if value not in (None, "")} for row in csv.DictReader(f)]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs, seen = [], set()
+    for number, row in enumerate(rows, start=1):
+        missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            raise ValueError(f"Job {number} in {path} is missing {', '.join(missing)}")
+        job = {**JOB_DEFAULTS, **row}
+        job["id"] = _slug(str(row.get("id") or job["company"]))
+        if job["id"] in seen:
+            raise ValueError(f"Job {number} in {path} repeats id {job['id']!r}; give each job a unique id")
+        seen.add(job["id"])
+        jobs.append(job)
+    return jobs
+
+
+def job_fingerprint(job):
+    """Short hash of everything that shapes a job's report, i.e. every field but its id."""
+    inputs = {key: value for key, value in job.items() if key != "id"}
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9]+", "-", value).strip("-").lower() or "job"
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def render_report(job, sections):
+    """Standalone HTML document from ``[(title, content)]`` in report order."""
+    body = "\n".join(
+        f"<section class=\"section\">\n<h2 class=\"section-title\">{html.escape(title)}</h2>\n"
+        f"<div class=\"section-content\">\n{content}\n</div>\n</section>"
+        for title, content in sections
+    )
+    company = html.escape(job["company"])
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>Complete Business Report: {company}</title>\n</head>\n<body>\n"
+        f"<div class=\"main-header\"><h1>Complete Business Report: {company}</h1></div>\n"
+        f"{body}\n</body>\n</html>\n"
+    )
+
+
+class BatchRunner:
+    """Generate the complete report for many jobs, checkpointing every finished section.
+
+    ``workers`` jobs run at once, each with up to ``section_workers``
+    concurrent sections; the per-deployment rate limiter keeps the combined
+    traffic within quota.
+    """
+
+    def __init__(self, output_dir=None, workers=None, section_workers=None, force=False, db_table=None):
+        self.output_dir = output_dir or BATCH_OUTPUT_DIR
+        self.workers = max(1, workers or BATCH_MAX_WORKERS)
+        self.section_workers = section_workers
+        self.force = force
+        self.db_table = db_table
+
+    def _job_dir(self, job):
+        return os.path.join(self.output_dir, job["id"])
+
+    def _sections_dir(self, job):
+        # Named after the job's inputs, so sections generated for other inputs are never reused
+        return os.path.join(self._job_dir(job), f"{SECTIONS_DIR}-{job_fingerprint(job)}")
+
+    def _section_path(self, job, key):
+        return os.path.join(self._sections_dir(job), f"{key}.html")
+
+    def _status(self, job):
+        try:
+            return json.loads(_read(os.path.join(self._job_dir(job), STATUS_FILE)))
+        except (OSError, ValueError):
+            return {}
+
+    def is_done(self, job):
+        """True when the job has a report generated from its current inputs."""
+        return (os.path.exists(os.path.join(self._job_dir(job), REPORT_FILE))
+                and self._status(job).get("inputs") == job_fingerprint(job))
+
+    def _discard_stale(self, job):
+        """Remove checkpoints and the report left by a run with different inputs."""
+        job_dir = self._job_dir(job)
+        if not os.path.isdir(job_dir):
+            return
+        current = os.path.basename(self._sections_dir(job))
+        stale = [name for name in os.listdir(job_dir)
+                 if (name == SECTIONS_DIR or name.startswith(f"{SECTIONS_DIR}-")) and name != current]
+        if not stale:
+            return
+        logger.warning(f"{job['id']}: job inputs changed since the last run; discarding its checkpointed sections")
+        for name in stale:
+            shutil.rmtree(os.path.join(job_dir, name), ignore_errors=True)
+        report = os.path.join(job_dir, REPORT_FILE)
+        if os.path.exists(report):
+            os.remove(report)
+
+    def run_job(self, job):
+        """Generate the sections not yet checkpointed for ``job``; returns its status dict."""
+        # Imported here so loading and validating a job file does not pull in every page
+        from src.report_generator import generate_full_report
+
+        started = time.monotonic()
+        self._discard_stale(job)
+        orchestrator = generate_full_report(
+            job["website_url"], job["industry"],
+            job["hc_phase"], job["hc_task"],
+            job["operation_phase"], job["operation_task"], job["industry_context"],
+            job["legal_phase"], job["legal_task"], job["company_type"],
+            job["risk_phase"], job["risk_task"], job["industry_type"],
+            max_workers=self.section_workers, company=job["company"],
+        )
+        sections = list(orchestrator.sections)
+        done = {section.key for section in sections if os.path.exists(self._section_path(job, section.key))}
+        orchestrator.sections = [section for section in sections if section.key not in done]
+        if done:
+            logger.info(f"{job['id']}: resuming, {len(done)} of {len(sections)} sections already generated")
+
+        errors = {}
+        for section, report, error in orchestrator.run():
+            if report:
+                _write_atomic(self._section_path(job, section.key), report)
+            else:
+                errors[section.key] = str(error) if error is not None else section.error_message
+                logger.error(f"{job['id']}: {section.title} failed: {errors[section.key]}")
+
+        status = {
+            "id": job["id"],
+            "company": job["company"],
+            "inputs": job_fingerprint(job),
+            "sections": len(sections),
+            "generated": len(sections) - len(done) - len(errors),
+            "resumed": len(done),
+            "errors": errors,
+            "seconds": round(time.monotonic() - started, 1),
+        }
+        if not errors:
+            report = render_report(job, [(section.title, _read(self._section_path(job, section.key)))
+                                         for section in sections])
+            _write_atomic(os.path.join(self._job_dir(job), REPORT_FILE), report)
+            if self.db_table:
+                self._save_to_db(job, report)
+        _write_atomic(os.path.join(self._job_dir(job), STATUS_FILE), json.dumps(status, indent=2))
+        return status
+
+    def _save_to_db(self, job, report):
+        from sqlalchemy import text
+        from src.db.sql_operation import execute_query
+
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_.]*", self.db_table):
+            raise ValueError(f"Invalid table name {self.db_table!r}")
+        execute_query(
+            text(f"INSERT INTO {self.db_table} (job_id, company, report, generated_at) "
+                 "VALUES (:job_id, :company, :report, CURRENT_TIMESTAMP)"),
+            {"job_id": job["id"], "company": job["company"], "report": report},
+        )
+
+    def run(self, jobs):
+        """Run every unfinished job and yield each job's status as it completes."""
+        pending = [job for job in jobs if self.force or not self.is_done(job)]
+        skipped = len(jobs) - len(pending)
+        if skipped:
+            logger.info(f"Skipping {skipped} job(s) with a finished report")
+        if self.force:
+            for job in pending:
+                for path in _section_files(self._sections_dir(job)) + [os.path.join(self._job_dir(job), REPORT_FILE)]:
+                    if os.path.exists(path):
+                        os.remove(path)
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(pending)), thread_name_prefix="batch-report") as executor:
+            futures = {executor.submit(self.run_job, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    yield future.result()
+                except Exception as e:
+                    logger.exception(f"{job['id']}: job failed")
+                    yield {"id": job["id"], "company": job["company"], "errors": {"job": str(e)}}
+
+
+def _section_files(directory):
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in os.listdir(directory)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bev-batch-reports",
+        description="Generate complete business reports for every company in a JSONL or CSV job file.",
+        epilog="Finished sections are checkpointed under the output directory, so rerunning the same "
+               "job file after a crash only generates what is missing. "
+               "Editing a job's inputs discards its checkpoints and report.",
+    )
+    parser.add_argument("jobs", help="Job file (.jsonl or .csv); each job needs company, website_url and industry")
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR, help="Where reports and checkpoints are written")
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS, help="Companies processed at once")
+    parser.add_argument("--section-workers", type=int, default=None, help="Sections generated at once per company")
+    parser.add_argument("--tpm", type=int, default=None, help="Azure OpenAI tokens-per-minute quota per deployment")
+    parser.add_argument("--rpm", type=int, default=None, help="Azure OpenAI requests-per-minute quota per deployment")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="Upper bound on in-flight LLM calls per deployment")
+    parser.add_argument("--db-table", default=None,
+                        help="Also insert finished reports into this table (job_id, company, report, generated_at)")
+    parser.add_argument("--force", action="store_true", help="Regenerate jobs that already have a report")
+    parser.add_argument("--validate", action="store_true", help="Only check the job file")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ {e}")
+        return 2
+    if args.validate:
+        print(f"{len(jobs)} job(s) OK")
+        return 0
+
+    # Limiters are created on first use, so overriding the defaults here applies to the whole run
+    from src import rate_limit
+    if args.tpm is not None:
+        rate_limit.AZURE_OPENAI_TPM = args.tpm
+    if args.rpm is not None:
+        rate_limit.AZURE_OPENAI_RPM = args.rpm
+    if args.max_concurrency is not None:
+        rate_limit.LLM_MAX_CONCURRENCY = args.max_concurrency
+
+    runner = BatchRunner(args.output_dir, args.workers, args.section_workers, args.force, args.db_table)
+    failed = 0
+    for status in runner.run(jobs):
+        if status["errors"]:
+            failed += 1
+            logger.warning(f"{status['id']}: {len(status['errors'])} section(s) failed; rerun to retry them")
+        else:
+            logger.info(f"{status['id']}: report written in {status['seconds']}s")
+    logger.info(f"Finished: {len(jobs) - failed} of {len(jobs)} job(s) have a complete report")
+    logger.info(f"LLM rate limits: {json.dumps(rate_limit.get_rate_limit_metrics())}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache:
+    """Two-tier key/value cache: an in-process LRU in front of a SQLite file.
+
+    Values must be JSON serialisable. Entries expire after ``ttl`` seconds
+    (``None`` or 0 keeps them forever) and the on-disk tier is trimmed, least
+    recently used first, once it grows past ``max_bytes``.
+    """
+
+    def __init__(self, path, ttl=None, max_bytes=256 * 1024 * 1024, memory_entries=256):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_ok = True
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS cache_entries (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        expires_at REAL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache_entries (accessed_at)")
+        except sqlite3.Error as e:
+            # Fall back to memory-only caching rather than failing the caller
+            logger.error(f"❌ Disk cache unavailable at {path}: {e}")
+            self._disk_ok = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Ensures COMMIT
+                yield conn
+        finally:
+            conn.close()
+
+    def _expires_at(self, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else None
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key`` or ``default`` when missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        if self._disk_ok:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute(
+                        "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        if row[1] is None or row[1] > now:
+                            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+                            value = json.loads(row[0])
+                            with self._lock:
+                                self._remember(key, value, row[1])
+                                self.stats["disk_hits"] += 1
+                            return value
+                        conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logger.error(f"❌ Disk cache read failed for {key}: {e}")
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` under ``key``; ``ttl`` overrides the cache default for this entry."""
+        expires_at = self._expires_at(ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stats["writes"] += 1
+
+        if not self._disk_ok:
+            return
+        payload = json.dumps(value, ensure_ascii=False)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload.encode("utf-8")), expires_at, time.time()),
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logger.error(f"❌ Disk cache write failed for {key}: {e}")
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value, computing and storing ``factory()`` on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value, ttl=ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self._disk_ok:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk_ok:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache_entries")
+
+    def _evict(self, conn):
+        """Drop expired rows, then the least recently used rows until under ``max_bytes``."""
+        conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.stats["evictions"] += evicted
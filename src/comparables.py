@@ -0,0 +1,279 @@
+import os
+import re
+import threading
+import warnings
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PEER_UNIVERSE_PATH = os.getenv("PEER_UNIVERSE_PATH", "data/peer_universe.csv")
+CCA_MIN_PEERS = int(os.getenv("CCA_MIN_PEERS", "5"))
+# Fraction cut from each tail for the trimmed mean
+CCA_TRIM = float(os.getenv("CCA_TRIM", "0.1"))
+# Used when no peer universe file is available
+DEFAULT_EV_EBITDA = 8
+
+# Revenue band edges (USD) and their labels
+SIZE_BAND_EDGES = [10e6, 50e6, 250e6, 1e9, 10e9]
+SIZE_BANDS = ["micro", "small", "lower_mid", "mid", "large", "mega"]
+
+# Multiple -> (numerator column, denominator column, target metric it is applied to)
+MULTIPLES = {
+    "ev_ebitda": ("enterprise_value", "ebitda", "ebitda"),
+    "ev_revenue": ("enterprise_value", "revenue", "revenue"),
+    "pe": ("market_cap", "net_income", "net_income"),
+}
+
+NUMERIC_COLUMNS = ["enterprise_value", "market_cap", "revenue", "ebitda", "net_income"]
+CATEGORY_FIELDS = ("industry", "sector", "size_band")
+
+_COLUMN_ALIASES = {
+    "company": "name",
+    "company_name": "name",
+    "ev": "enterprise_value",
+    "market_capitalization": "market_cap",
+    "sales": "revenue",
+    "earnings": "net_income",
+    "ev/ebitda": "ev_ebitda",
+    "ev/revenue": "ev_revenue",
+    "p/e": "pe",
+}
+
+
+def _column_name(column):
+    name = re.sub(r"\s+", "_", str(column).strip().lower())
+    return _COLUMN_ALIASES.get(name, name)
+
+
+def size_band(revenue):
+    """Size band label(s) for revenue; accepts a scalar or an array.
+
+    Missing or non-finite revenue is "Unknown" (``np.digitize`` would put
+    NaN in the top band).
+    """
+    revenue = np.asarray(revenue, dtype=float)
+    codes = np.digitize(revenue, SIZE_BAND_EDGES)
+    labels = np.where(np.isfinite(revenue), np.asarray(SIZE_BANDS, dtype=object)[codes], "Unknown")
+    if np.ndim(labels) == 0:
+        return str(labels)
+    return labels.astype(object)
+
+
+class PeerUniverse:
+    """Columnar peer universe: one numpy array per field plus posting lists per category.
+
+    Multiples are precomputed once (NaN where the denominator is not
+    positive), so selecting peers and summarising them are array operations
+    over the whole universe.
+    """
+
+    def __init__(self, frame):
+        frame = frame.rename(columns=_column_name)
+        if "name" not in frame.columns:
+            raise ValueError("The peer universe needs a name column")
+        self.names = frame["name"].astype(str).to_numpy()
+        self.columns = {
+            column: pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=float)
+            if column in frame.columns else np.full(len(frame), np.nan)
+            for column in NUMERIC_COLUMNS
+        }
+
+        self.multiples = {}
+        for multiple, (numerator, denominator, _) in MULTIPLES.items():
+            if multiple in frame.columns:
+                values = pd.to_numeric(frame[multiple], errors="coerce").to_numpy(dtype=float)
+            else:
+                top, bottom = self.columns[numerator], self.columns[denominator]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    values = np.where(bottom > 0, top / bottom, np.nan)
+            # Negative multiples are not meaningful comparables
+            self.multiples[multiple] = np.where(values > 0, values, np.nan)
+
+        if "size_band" not in frame.columns:
+            frame = frame.assign(size_band=size_band(self.columns["revenue"]))
+        self._codes = {}
+        self._labels = {}
+        for field in CATEGORY_FIELDS:
+            values = frame[field].fillna("Unknown").astype(str).str.strip() if field in frame.columns \
+                else pd.Series(["Unknown"] * len(frame))
+            codes, labels = pd.factorize(values)
+            self._codes[field] = codes
+            self._labels[field] = {label: code for code, label in enumerate(labels)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def labels(self, field):
+        """Sorted category labels for ``industry``, ``sector`` or ``size_band``."""
+        return sorted(self._labels[field])
+
+    def select(self, industry=None, sector=None, size_band=None, exclude=None):
+        """Row indices of peers matching every given filter; each filter is a label or list of labels."""
+        mask = np.ones(len(self), dtype=bool)
+        for field, wanted in (("industry", industry), ("sector", sector), ("size_band", size_band)):
+            if not wanted:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            codes = [self._labels[field][label] for label in wanted if label in self._labels[field]]
+            mask &= np.isin(self._codes[field], codes)
+        if exclude:
+            mask &= ~np.isin(self.names, list(exclude))
+        return np.flatnonzero(mask)
+
+    def select_peers(self, revenue=None, industry=None, sector=None, min_peers=None):
+        """Select the narrowest peer set with at least ``min_peers`` companies.
+
+        Tries industry + size band, industry, sector + size band, sector and
+        finally the whole universe. Returns ``(rows, criteria)``.
+        """
+        min_peers = min_peers or CCA_MIN_PEERS
+        band = size_band(revenue) if revenue else None
+        if band == "Unknown":
+            band = None
+        attempts = [
+            {"industry": industry, "size_band": band},
+            {"industry": industry},
+            {"sector": sector, "size_band": band},
+            {"sector": sector},
+        ]
+        for criteria in attempts:
+            criteria = {field: value for field, value in criteria.items() if value}
+            if not criteria:
+                continue
+            rows = self.select(**criteria)
+            if len(rows) >= min_peers:
+                return rows, criteria
+        return np.arange(len(self)), {}
+
+    def multiple_stats(self, rows, trim=None):
+        """Median, quartiles, trimmed mean and size-weighted mean of every multiple over ``rows``."""
+        trim = CCA_TRIM if trim is None else trim
+        matrix = np.vstack([self.multiples[multiple][rows] for multiple in MULTIPLES])
+        valid = ~np.isnan(matrix)
+        counts = valid.sum(axis=1)
+
+        stats = {multiple: {"count": int(count)} for multiple, count in zip(MULTIPLES, counts)}
+        if not counts.any():
+            return stats
+        # All-NaN rows (a multiple no peer has) produce NaN, which is reported as missing below
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            q1, median, q3, low, high = np.nanpercentile(matrix, [25, 50, 75, 100 * trim, 100 * (1 - trim)], axis=1)
+            mean = np.nanmean(matrix, axis=1)
+            within = valid & (matrix >= low[:, None]) & (matrix <= high[:, None])
+            trimmed = np.where(within, matrix, 0).sum(axis=1) / within.sum(axis=1)
+            # Larger companies count for more; weight by enterprise value
+            weights = np.where(valid, np.nan_to_num(self.columns["enterprise_value"][rows]), 0)
+            weighted = np.where(valid, np.nan_to_num(matrix), 0)
+            size_weighted = (weights * weighted).sum(axis=1) / weights.sum(axis=1)
+
+        for i, multiple in enumerate(MULTIPLES):
+            if counts[i]:
+                stats[multiple].update({
+                    "q1": round(float(q1[i]), 2),
+                    "median": round(float(median[i]), 2),
+                    "q3": round(float(q3[i]), 2),
+                    "mean": round(float(mean[i]), 2),
+                    "trimmed_mean": round(float(trimmed[i]), 2),
+                    "size_weighted_mean": round(float(size_weighted[i]), 2) if np.isfinite(size_weighted[i]) else None,
+                })
+        return stats
+
+    def peers(self, rows, limit=None):
+        """Peer rows as dicts (name, category labels and multiples), for display or a report."""
+        rows = rows[:limit] if limit else rows
+        labels = {field: np.asarray(list(self._labels[field]), dtype=object) for field in CATEGORY_FIELDS}
+        table = {"name": self.names[rows]}
+        table.update({field: labels[field][self._codes[field][rows]] for field in CATEGORY_FIELDS})
+        table.update({multiple: np.round(values[rows], 2) for multiple, values in self.multiples.items()})
+        return pd.DataFrame(table).replace({np.nan: None}).to_dict("records")
+
+
+def value_target(stats, target):
+    """Apply multiple statistics to the target's metrics.
+
+    ``target`` maps ``ebitda``, ``revenue`` and ``net_income`` to values.
+    Each multiple yields a low (Q1), mid (median) and high (Q3) value;
+    earnings multiples give an equity value rather than an enterprise value.
+    """
+    valuation = {}
+    for multiple, (_, _, metric) in MULTIPLES.items():
+        value = target.get(metric)
+        summary = stats.get(multiple, {})
+        if value is None or not (np.isfinite(value) and value > 0) or not summary.get("count"):
+            continue
+        valuation[multiple] = {
+            "metric": metric,
+            "metric_value": value,
+            "low": round(value * summary["q1"]),
+            "mid": round(value * summary["median"]),
+            "high": round(value * summary["q3"]),
+            "trimmed_mean": round(value * summary["trimmed_mean"]),
+        }
+    return valuation
+
+
+_universes = {}
+_universes_lock = threading.Lock()
+
+
+def load_universe(path=None):
+    """Load (and cache until the file changes) the peer universe; ``None`` when there is no file.
+
+    Reads CSV, XLSX or Parquet.
+    """
+    path = path or PEER_UNIVERSE_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _universes_lock:
+        cached = _universes.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        lower = path.lower()
+        if lower.endswith(".parquet"):
+            frame = pd.read_parquet(path)
+        elif lower.endswith((".xlsx", ".xls")):
+            frame = pd.read_excel(path)
+        else:
+            frame = pd.read_csv(path)
+        universe = PeerUniverse(frame)
+        _universes[path] = (mtime, universe)
+        return universe
+
+
+def comparable_analysis(target, industry=None, sector=None, size_band=None, universe=None, peer_limit=10):
+    """Peer selection, multiple statistics and target valuation in one dict; ``None`` without a universe.
+
+    With an explicit ``size_band`` or a non-empty list filter the peers are
+    selected exactly; otherwise the narrowest peer set with enough
+    companies is used.
+    """
+    if universe is None:
+        universe = load_universe()
+    if universe is None:
+        return None
+    if size_band or any(isinstance(value, list) and value for value in (industry, sector)):
+        criteria = {field: value for field, value in
+                    (("industry", industry), ("sector", sector), ("size_band", size_band)) if value}
+        rows = universe.select(**criteria)
+    else:
+        rows, criteria = universe.select_peers(target.get("revenue"), industry=industry or None, sector=sector or None)
+    if not len(rows):
+        return None
+    stats = universe.multiple_stats(rows)
+    if (target.get("revenue") or 0) > 0:
+        # List the peers closest in size first
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance = np.abs(np.log(universe.columns["revenue"][rows]) - np.log(target["revenue"]))
+        rows = rows[np.argsort(np.nan_to_num(distance, nan=np.inf), kind="stable")]
+    return {
+        "peer_count": int(len(rows)),
+        "criteria": criteria,
+        "peers": universe.peers(rows, limit=peer_limit),
+        "multiples": stats,
+        "valuation": value_target(stats, target),
+    }
@@ -1,11 +1,26 @@
-
 from contextlib import contextmanager
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
 
 load_dotenv()
 
+_engine = None
+_engine_lock = threading.Lock()
+
+# Pool metrics, updated by the checkout/checkin listeners and connection_()
+_metrics_lock = threading.Lock()
+_pool_metrics = {
+    "checked_out": 0,
+    "checkouts": 0,
+    "connects": 0,
+    "total_wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+}
+
 # Build connection string for pymssql
 def get_connection_string():
     server = os.getenv("SQL_SERVER")
@@ -24,18 +39,81 @@ def get_connection_string():
 
     return f"mssql+pymssql://{username}:{password}@{server}:1433/{database}"
 
+
+def get_pool_settings():
+    """Read QueuePool settings from the environment."""
+    return {
+        "pool_size": int(os.getenv("SQL_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("SQL_POOL_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.getenv("SQL_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("SQL_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("SQL_POOL_PRE_PING", "true").lower() not in ("0", "false", "no"),
+    }
+
+
+def _on_connect(dbapi_connection, connection_record):
+    with _metrics_lock:
+        _pool_metrics["connects"] += 1
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    with _metrics_lock:
+        _pool_metrics["checked_out"] += 1
+        _pool_metrics["checkouts"] += 1
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    with _metrics_lock:
+        _pool_metrics["checked_out"] = max(0, _pool_metrics["checked_out"] - 1)
+
+
 # Create SQLAlchemy engine
 def get_engine():
-    conn_str = get_connection_string()
-    return create_engine(conn_str)
+    """Return the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(get_connection_string(), poolclass=QueuePool, **get_pool_settings())
+                event.listen(engine, "connect", _on_connect)
+                event.listen(engine, "checkout", _on_checkout)
+                event.listen(engine, "checkin", _on_checkin)
+                _engine = engine
+    return _engine
+
+
+def dispose_engine():
+    """Close every pooled connection and drop the shared engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def get_pool_metrics():
+    """Return a snapshot of pool usage: checked-out connections, new connects and checkout wait times."""
+    with _metrics_lock:
+        metrics = dict(_pool_metrics)
+    metrics["average_wait_seconds"] = (
+        metrics["total_wait_seconds"] / metrics["checkouts"] if metrics["checkouts"] else 0.0
+    )
+    if _engine is not None:
+        metrics["pool_status"] = _engine.pool.status()
+    return metrics
+
 
 # Context manager for connection
 @contextmanager
 def connection_():
     engine = get_engine()
+    started = time.perf_counter()
     conn = engine.connect()
+    waited = time.perf_counter() - started
+    with _metrics_lock:
+        _pool_metrics["total_wait_seconds"] += waited
+        _pool_metrics["max_wait_seconds"] = max(_pool_metrics["max_wait_seconds"], waited)
     try:
         yield conn
     finally:
         conn.close()
-
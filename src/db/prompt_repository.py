@@ -0,0 +1,113 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from src.db.sql_operation import execute_query, fetch_query
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TABLE = "prompt_valuation_reports"
+PROMPT_ROW_ID = 1
+
+
+class PromptRepository:
+    """Read-through cache over one row of ``prompt_valuation_reports``.
+
+    The whole row is loaded with a single SELECT and every prompt column is
+    then served from memory. Saving a prompt writes a new version stamp to a
+    shared file, which makes every other worker process on the host reload
+    the row on its next read. The TTL is a backstop for workers on other
+    hosts.
+    """
+
+    def __init__(self, row_id=PROMPT_ROW_ID, ttl=None, version_file=None):
+        self.row_id = row_id
+        self.ttl = ttl if ttl is not None else int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "300"))
+        self.version_file = version_file or os.getenv(
+            "PROMPT_CACHE_VERSION_FILE", os.path.join("artifacts", "prompt_cache.version")
+        )
+        self._row = None
+        self._loaded_at = 0.0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _read_version(self):
+        try:
+            with open(self.version_file, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _bump_version(self):
+        """Write a fresh version stamp atomically so readers never see a partial file."""
+        stamp = uuid.uuid4().hex
+        try:
+            directory = os.path.dirname(self.version_file) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".prompt_version")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(stamp)
+            os.replace(tmp_path, self.version_file)
+        except OSError as e:
+            logger.error(f"❌ Could not write prompt cache version stamp: {e}")
+        return stamp
+
+    def _is_stale(self):
+        if self._row is None:
+            return True
+        if self.ttl and time.time() - self._loaded_at > self.ttl:
+            return True
+        return self._read_version() != self._version
+
+    def _load(self):
+        version = self._read_version()
+        query = text(f"SELECT * FROM {PROMPT_TABLE} WHERE id = :id")
+        data = fetch_query(query, {"id": self.row_id})
+        self._row = data[0] if data else {}
+        self._loaded_at = time.time()
+        self._version = version
+
+    def row(self):
+        """Return the cached prompt row, reloading it if stale."""
+        with self._lock:
+            if self._is_stale():
+                self._load()
+            return self._row
+
+    def get(self, column, default=None):
+        """Return the stored prompt for ``column``, or ``default`` when the row or value is missing."""
+        value = self.row().get(column)
+        return default if value is None else value
+
+    def save(self, column, value):
+        """UPDATE one prompt column and invalidate every worker's cached copy."""
+        if "]" in column:
+            raise ValueError(f"❌ Invalid prompt column name: {column}")
+        query = text(f"UPDATE {PROMPT_TABLE} SET [{column}] = :value WHERE id = :id")
+        execute_query(query, {"value": value, "id": self.row_id})
+        with self._lock:
+            self._bump_version()
+            self._row = None
+
+    def invalidate(self):
+        """Drop the cached row so the next read goes to the database."""
+        with self._lock:
+            self._row = None
+
+
+prompt_repository = PromptRepository()
+
+
+def get_prompt(column, default=None):
+    return prompt_repository.get(column, default)
+
+
+def save_prompt(column, value):
+    prompt_repository.save(column, value)
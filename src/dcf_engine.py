@@ -0,0 +1,124 @@
+import numpy as np
+
+
+def period_times(periods, mid_year=False, stub_fraction=1.0):
+    """Discounting times, in years, for each projection period and for the terminal value.
+
+    The first period may be a stub covering ``stub_fraction`` of a year. With
+    ``mid_year`` each cash flow is discounted from the middle of its period;
+    the terminal value is always discounted from the end of the last period.
+    """
+    if not 0 < stub_fraction <= 1:
+        raise ValueError("stub_fraction must be in (0, 1]")
+    lengths = np.ones(periods)
+    lengths[0] = stub_fraction
+    ends = np.cumsum(lengths)
+    times = ends - lengths / 2 if mid_year else ends
+    return times, ends[-1]
+
+
+def discount_factors(discount_rates, times):
+    """``(1 + r) ** -t`` for every rate and time; shape ``rates.shape + times.shape``."""
+    rates = np.asarray(discount_rates, dtype=float)
+    return np.power(1.0 + rates[..., None], -np.asarray(times, dtype=float))
+
+
+def gordon_terminal_value(final_cash_flow, discount_rate, growth):
+    """Perpetuity-growth value at the end of the forecast; NaN where growth >= discount rate."""
+    final_cash_flow, discount_rate, growth = np.broadcast_arrays(
+        np.asarray(final_cash_flow, dtype=float), np.asarray(discount_rate, dtype=float), np.asarray(growth, dtype=float)
+    )
+    spread = discount_rate - growth
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = final_cash_flow * (1.0 + growth) / spread
+    return np.where(spread > 0, value, np.nan)
+
+
+def exit_multiple_terminal_value(terminal_metric, multiple):
+    """Exit value as a multiple of the final-year metric, e.g. EBITDA x EV/EBITDA."""
+    return np.asarray(terminal_metric, dtype=float) * np.asarray(multiple, dtype=float)
+
+
+def _prepare_cash_flows(cash_flows, stub_fraction):
+    flows = np.array(cash_flows, dtype=float, ndmin=1)
+    if stub_fraction != 1.0:
+        # Full-year first-period cash flow, pro-rated to the part of the year remaining
+        flows[..., 0] *= stub_fraction
+    return flows
+
+
+def dcf(cash_flows, discount_rate, terminal_growth=None, exit_multiple=None, terminal_metric=None,
+        mid_year=False, stub_fraction=1.0):
+    """Value cash flows of shape ``(..., periods)`` at a discount rate broadcastable to ``(...)``.
+
+    Pass ``terminal_growth`` for a Gordon growth terminal value on the last
+    cash flow, or ``exit_multiple`` (with ``terminal_metric``, defaulting to
+    the last cash flow) for an exit-multiple terminal value. Returns a dict
+    of arrays: per-period present values, their sum, the terminal value and
+    its present value, and the enterprise value.
+    """
+    if terminal_growth is not None and exit_multiple is not None:
+        raise ValueError("Use either terminal_growth or exit_multiple, not both")
+    flows = _prepare_cash_flows(cash_flows, stub_fraction)
+    times, terminal_time = period_times(flows.shape[-1], mid_year=mid_year, stub_fraction=stub_fraction)
+    rates = np.asarray(discount_rate, dtype=float)
+
+    factors = discount_factors(rates, times)
+    present_values = flows * factors
+    sum_pv = present_values.sum(axis=-1)
+
+    final_flow = np.asarray(cash_flows, dtype=float)[..., -1]
+    if terminal_growth is not None:
+        terminal_value = gordon_terminal_value(final_flow, rates, terminal_growth)
+    elif exit_multiple is not None:
+        metric = final_flow if terminal_metric is None else terminal_metric
+        terminal_value = exit_multiple_terminal_value(metric, exit_multiple)
+    else:
+        terminal_value = np.zeros_like(sum_pv)
+    pv_terminal = terminal_value * np.power(1.0 + rates, -terminal_time)
+
+    return {
+        "present_values": present_values,
+        "sum_pv": sum_pv,
+        "terminal_value": terminal_value,
+        "pv_terminal_value": pv_terminal,
+        "enterprise_value": sum_pv + pv_terminal,
+    }
+
+
+def sensitivity_grid(cash_flows, discount_rates, terminal_axis, method="gordon", terminal_metric=None,
+                     mid_year=False, stub_fraction=1.0):
+    """Enterprise values over every discount rate x terminal assumption, in one vectorised pass.
+
+    ``cash_flows`` is ``(periods,)`` for one company or ``(companies, periods)``
+    for a portfolio. ``terminal_axis`` holds growth rates for ``method="gordon"``
+    or multiples for ``method="exit_multiple"``. The result has shape
+    ``(companies, len(discount_rates), len(terminal_axis))``, or drops the first
+    axis for a single company. Cells where growth >= discount rate are NaN.
+    """
+    raw = np.asarray(cash_flows, dtype=float)
+    single = raw.ndim == 1
+    raw = np.atleast_2d(raw)
+    flows = _prepare_cash_flows(raw, stub_fraction)
+    rates = np.asarray(discount_rates, dtype=float)
+    axis = np.asarray(terminal_axis, dtype=float)
+
+    times, terminal_time = period_times(flows.shape[-1], mid_year=mid_year, stub_fraction=stub_fraction)
+    # (companies, periods) @ (periods, rates) -> PV of the explicit forecast per company and rate
+    explicit = flows @ discount_factors(rates, times).T
+    terminal_discount = np.power(1.0 + rates, -terminal_time)
+
+    if method == "gordon":
+        final = raw[:, -1][:, None, None]
+        terminal_value = gordon_terminal_value(final, rates[None, :, None], axis[None, None, :])
+    elif method == "exit_multiple":
+        metric = raw[:, -1] if terminal_metric is None else np.atleast_1d(np.asarray(terminal_metric, dtype=float))
+        terminal_value = np.broadcast_to(
+            exit_multiple_terminal_value(metric[:, None, None], axis[None, None, :]),
+            (raw.shape[0], rates.size, axis.size),
+        )
+    else:
+        raise ValueError(f"Unknown terminal value method: {method}")
+
+    grid = explicit[:, :, None] + terminal_value * terminal_discount[None, :, None]
+    return grid[0] if single else grid
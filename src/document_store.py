@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def document_key(data):
+    """SHA-256 of the uploaded bytes; identical files share one entry whatever their name."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class DocumentStore:
+    """Parsed documents on local disk, one gzip-compressed JSON record per file hash.
+
+    A record holds the page texts, the detected sections and any structured
+    extraction results, so a repeat upload skips both parsing and the LLM
+    calls. Reads refresh a file's modification time, and the least recently
+    used records are removed once the store grows past ``max_bytes``.
+    """
+
+    def __init__(self, root, max_bytes=512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.json.gz")
+
+    def get(self, key):
+        """Return the stored record for ``key``, or None."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Discarding unreadable document record {key}: {e}")
+            self.delete(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return record
+
+    def update(self, key, **fields):
+        """Merge ``fields`` into the record for ``key`` and write it back atomically."""
+        with self._lock:
+            record = self.get(key) or {"key": key, "created_at": time.time()}
+            record.update(fields)
+            record["updated_at"] = time.time()
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp")
+                with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                    json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, path)
+                self._evict()
+            except OSError as e:
+                logger.error(f"❌ Could not write document record {key}: {e}")
+            return record
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".json.gz"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Remove the least recently used records until the store fits in ``max_bytes``."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+    def load_pages(self, data, extract):
+        """Return ``(key, pages)``, calling ``extract(data)`` only when the pages are not stored yet."""
+        key = document_key(data)
+        record = self.get(key)
+        if record and record.get("pages") is not None:
+            return key, record["pages"]
+        pages = extract(data)
+        self.update(key, pages=pages)
+        return key, pages
+
+
+document_store = DocumentStore(
+    root=os.getenv("DOCUMENT_STORE_PATH", os.path.join("artifacts", "document_store")),
+    max_bytes=int(os.getenv("DOCUMENT_STORE_MAX_MB", "512")) * 1024 * 1024,
+)
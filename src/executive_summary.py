@@ -1,7 +1,8 @@
 
 import streamlit as st
 import json
-from huggingface_hub import InferenceClient
+from src.llm_gateway import hf_chat_completion
+from src.ratios import metric_ratios, ratio
 from datetime import datetime
 def get_default_financial_data():
     """Return default financial data template"""
@@ -59,21 +60,20 @@ def get_default_financial_data():
     }
 
 def calculate_key_metrics(data):
-    """Calculate additional metrics from the financial data"""
+    """Calculate additional metrics from the financial data for its most recent year"""
     try:
         metrics = {}
         
-        latest_revenue = data["financial_metrics"]["revenue"]["2023"]
-        previous_revenue = data["financial_metrics"]["revenue"]["2022"]
-        metrics["revenue_growth_rate"] = (latest_revenue - previous_revenue) / previous_revenue
+        yearly = metric_ratios(data["financial_metrics"], ["revenue_growth", "ebitda_margin"])
+        latest = yearly[max(yearly)]
+        metrics["revenue_growth_rate"] = latest["revenue_growth"]
         
         total_debt = (data["balance_sheet"]["debt"]["long_term"] + 
                      data["balance_sheet"]["debt"]["short_term"])
         equity = data["balance_sheet"]["equity"]
-        metrics["debt_to_equity"] = total_debt / equity
+        metrics["debt_to_equity"] = ratio(total_debt, equity)
         
-        metrics["ebitda_margin"] = (data["financial_metrics"]["ebitda"]["2023"] / 
-                                   latest_revenue)
+        metrics["ebitda_margin"] = latest["ebitda_margin"]
         
         return metrics
     except Exception as e:
@@ -190,12 +190,6 @@ def format_executive_summary(report_json):
 
 def generate_report(metrics):
     """Generate financial report using HuggingFace model"""
-    client = InferenceClient(
-        #  model=st.secrets["hf_model"],
-        provider="hf-inference",
-        api_key=st.secrets["hf_token"],
-    )
-
     messages = [
         {"role": "system", "content": "You are financial report expert."},
         {"role": "user", "content": default_prompt.format(metrics=metrics)},
@@ -221,15 +215,9 @@ def generate_report(metrics):
         },
     }
 
-    response = client.chat_completion(
-        model=st.secrets["hf_model"],
-        messages=messages,
-        response_format=response_format,
-        max_tokens=8000,
-        temperature=0.1,
-    )
-
-    return json.loads(response.choices[0].message.content)
+    content = hf_chat_completion(messages, st.secrets["hf_model"], st.secrets["hf_token"], temperature=0.1,
+                                 max_tokens=8000, response_format=response_format, validate=json.loads)
+    return json.loads(content)
 
 
 def edit_nested_dict(prefix, d, indent=0):
@@ -1,15 +1,14 @@
 import streamlit as st
-from huggingface_hub import InferenceClient
+from src.llm_gateway import hf_chat_completion
 from datetime import datetime
 import json
 
-class MBBConsultant:
-    def __init__(self):
-        self.client = InferenceClient(
-            provider="hf-inference",
-            api_key=st.secrets["hf_token"]
-        )
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # headless use without a Streamlit runtime
+    get_script_run_ctx = None
 
+class MBBConsultant:
     def generate_analysis(self, prompt, phase, task):
         """Generate analysis using HuggingFace model."""
         formatted_prompt = f"""
@@ -31,16 +30,14 @@ class MBBConsultant:
         ]
 
         try:
-            response = self.client.chat_completion(
-                model=st.secrets["hf_model"],
-                messages=messages,
-                max_tokens=8000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+            return hf_chat_completion(messages, st.secrets["hf_model"], st.secrets["hf_token"], temperature=0.7, max_tokens=8000)
         except Exception as e:
             return f"Error generating analysis: {str(e)}"
 
+def _headless():
+    """True outside a Streamlit script run (e.g. the batch runner), where st.session_state does not persist."""
+    return get_script_run_ctx is None or get_script_run_ctx() is None
+
 def initialize_session_state():
     """Initialize session state variables."""
     if 'consultant' not in st.session_state:
@@ -53,8 +50,12 @@ def initialize_session_state():
 def hc_reports(selected_phase,selected_task):
    
 
-    # Initialize session state
-    initialize_session_state()
+    # Initialize session state; headless runs have none, so use a consultant for this call
+    if _headless():
+        consultant = MBBConsultant()
+    else:
+        initialize_session_state()
+        consultant = st.session_state.consultant
 
     # Phase selection
     # phases = {
@@ -102,7 +103,7 @@ def hc_reports(selected_phase,selected_task):
     """
 
 
-    analysis = st.session_state.consultant.generate_analysis(
+    analysis = consultant.generate_analysis(
                         default_prompt, 
                         selected_phase, 
                         selected_task
@@ -1,13 +1,14 @@
 import streamlit as st
-from huggingface_hub import InferenceClient
+from src.llm_gateway import hf_chat_completion
 from datetime import datetime
 
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # headless use without a Streamlit runtime
+    get_script_run_ctx = None
+
 class LegalComplianceAssessment:
     def __init__(self):
-        self.client = InferenceClient(
-            provider="hf-inference",
-            api_key=st.secrets["hf_token"]
-        )
         self.phases = {
             "Phase 1": {
                 "name": "Corporate Governance",
@@ -125,32 +126,36 @@ class LegalComplianceAssessment:
         Focus on legal risks, compliance gaps, and actionable recommendations.
         """
 
+        messages = [
+            {"role": "system", "content": "You are an experienced MBB consultant specializing in legal and compliance assessment."},
+            {"role": "user", "content": formatted_prompt}
+        ]
+
         try:
-            response = self.client.chat_completion(
-                model=st.secrets["hf_model"],
-                messages=[
-                    {"role": "system", "content": "You are an experienced MBB consultant specializing in legal and compliance assessment."},
-                    {"role": "user", "content": formatted_prompt}
-                ],
-                max_tokens=8000,
-                temperature=0.7
-            )
-            return response.choices[0].message.content
+            return hf_chat_completion(messages, st.secrets["hf_model"], st.secrets["hf_token"], temperature=0.7, max_tokens=8000)
         except Exception as e:
             return f"Error generating analysis: {str(e)}"
 
+def _headless():
+    """True outside a Streamlit script run (e.g. the batch runner), where st.session_state does not persist."""
+    return get_script_run_ctx is None or get_script_run_ctx() is None
+
 def legal_compliance_assessment(selected_phase,selected_task,company_type):
    
 
-    # Initialize assessment object
-    if 'assessment' not in st.session_state:
-        st.session_state.assessment = LegalComplianceAssessment()
-    if 'analysis_history' not in st.session_state:
-        st.session_state.analysis_history = []
+    # Initialize assessment object; headless runs have no session state, so use one for this call
+    if _headless():
+        assessment = LegalComplianceAssessment()
+    else:
+        if 'assessment' not in st.session_state:
+            st.session_state.assessment = LegalComplianceAssessment()
+        if 'analysis_history' not in st.session_state:
+            st.session_state.analysis_history = []
+        assessment = st.session_state.assessment
 
    
-    default_prompt = st.session_state.assessment.get_default_prompt(selected_phase, selected_task)
-    analysis = st.session_state.assessment.generate_analysis(
+    default_prompt = assessment.get_default_prompt(selected_phase, selected_task)
+    analysis = assessment.generate_analysis(
                     default_prompt,
                     selected_phase,
                     selected_task,
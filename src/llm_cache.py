@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+from dotenv import load_dotenv
+
+from src.cache import TieredCache
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+llm_cache = TieredCache(
+    path=os.getenv("LLM_CACHE_PATH", os.path.join("artifacts", "llm_cache.sqlite3")),
+    ttl=int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+)
+
+
+def completion_key(deployment, messages, temperature=None, max_tokens=None, **extra):
+    """Hash the parameters that determine a chat completion into a cache key."""
+    payload = {
+        "deployment": deployment,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    payload.update(extra)
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def cached_completion(deployment, messages, temperature, max_tokens, create, validate=None, **extra):
+    """Return the completion text for this request, calling ``create()`` only on a cache miss.
+
+    ``create`` must return the completion text; failures raise and are never cached.
+    ``validate``, when given, is called with the text and raises for a reply the
+    caller cannot use (e.g. malformed JSON); such a reply is not cached, and a
+    cached one that fails is dropped and requested again.
+    """
+    def _create():
+        content = create()
+        if validate is not None:
+            validate(content)
+        return content
+
+    if not LLM_CACHE_ENABLED:
+        return _create()
+    key = completion_key(deployment, messages, temperature, max_tokens, **extra)
+    if validate is not None:
+        missing = object()
+        cached = llm_cache.get(key, missing)
+        if cached is not missing:
+            try:
+                validate(cached)
+                return cached
+            except Exception:
+                llm_cache.delete(key)
+    return llm_cache.get_or_set(key, _create)
+
+
+def cached_completion_stream(deployment, messages, temperature, max_tokens, create_stream, **extra):
+    """Yield the completion text as deltas, replaying a cached completion as a single delta.
+
+    ``create_stream`` must return an iterator of text deltas. The joined text is
+    cached under the same key as ``cached_completion`` once the stream finishes;
+    a stream that fails or is abandoned part way is never cached.
+    """
+    if not LLM_CACHE_ENABLED:
+        yield from create_stream()
+        return
+    key = completion_key(deployment, messages, temperature, max_tokens, **extra)
+    missing = object()
+    cached = llm_cache.get(key, missing)
+    if cached is not missing:
+        yield cached
+        return
+    parts = []
+    for delta in create_stream():
+        parts.append(delta)
+        yield delta
+    llm_cache.set(key, "".join(parts))
@@ -0,0 +1,248 @@
+import asyncio
+import os
+import threading
+import weakref
+import httpx
+from openai import APIConnectionError, AsyncAzureOpenAI, AzureOpenAI
+from dotenv import load_dotenv
+
+from src.llm_cache import LLM_CACHE_ENABLED, cached_completion, cached_completion_stream, completion_key, llm_cache
+from src.rate_limit import estimate_tokens, get_limiter
+from src.streaming import iter_chat_deltas
+
+load_dotenv()
+
+AZURE_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2025-01-01-preview")
+# Connection pool shared by every deployment of a provider
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "16"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "120"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+# Completions of several thousand tokens take minutes, so reads get a long timeout
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "300"))
+# SDK retries for callers using a client directly; gateway calls retry through the rate limiter instead
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+_lock = threading.Lock()
+_http_client = None
+_azure_clients = {}
+_hf_clients = {}
+# Async clients are bound to the event loop that created their connections
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout():
+    return httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+
+def default_deployment():
+    return os.getenv("DEPLOYMENT_NAME")
+
+
+def _azure_settings(deployment, max_retries):
+    return {
+        "azure_endpoint": os.getenv("ENDPOINT_URL"),
+        "azure_deployment": deployment,
+        "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+        "api_version": AZURE_API_VERSION,
+        "max_retries": LLM_MAX_RETRIES if max_retries is None else max_retries,
+    }
+
+
+def get_azure_client(deployment=None, max_retries=None):
+    """Process-wide Azure OpenAI client for ``deployment`` (default ``DEPLOYMENT_NAME``).
+
+    Every deployment shares one keep-alive ``httpx`` pool, so repeat calls
+    reuse warm HTTPS connections instead of handshaking per request.
+    """
+    global _http_client
+    key = (deployment or default_deployment(), max_retries)
+    client = _azure_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _azure_clients.get(key)
+            if client is None:
+                if _http_client is None:
+                    _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+                client = _azure_clients[key] = AzureOpenAI(
+                    http_client=_http_client, **_azure_settings(*key)
+                )
+    return client
+
+
+def get_async_azure_client(deployment=None, max_retries=None):
+    """Async counterpart of ``get_azure_client``, shared per running event loop."""
+    key = (deployment or default_deployment(), max_retries)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        pool = _async_clients.get(loop)
+        if pool is None:
+            pool = _async_clients[loop] = {
+                "http": httpx.AsyncClient(limits=_limits(), timeout=_timeout()),
+                "clients": {},
+            }
+        client = pool["clients"].get(key)
+        if client is None:
+            client = pool["clients"][key] = AsyncAzureOpenAI(
+                http_client=pool["http"], **_azure_settings(*key)
+            )
+    return client
+
+
+def get_hf_client(api_key):
+    """Process-wide Hugging Face inference client per token."""
+    client = _hf_clients.get(api_key)
+    if client is None:
+        # Imported lazily: only the Hugging Face pages need it
+        from huggingface_hub import InferenceClient
+
+        with _lock:
+            client = _hf_clients.get(api_key)
+            if client is None:
+                client = _hf_clients[api_key] = InferenceClient(
+                    provider="hf-inference", api_key=api_key, timeout=LLM_READ_TIMEOUT
+                )
+    return client
+
+
+def _request(messages, temperature, max_tokens, params):
+    request = {"messages": messages, **params}
+    if temperature is not None:
+        request["temperature"] = temperature
+    if max_tokens is not None:
+        request["max_tokens"] = max_tokens
+    return request
+
+
+def _message_content(response):
+    """Text of the first choice; raises for an empty or filtered completion so it is never cached."""
+    choices = getattr(response, "choices", None)
+    message = choices[0].message if choices else None
+    if message is None or message.content is None:
+        raise ValueError("Received an unexpected response structure from the model.")
+    return message.content
+
+
+def _total_tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def chat_completion(messages, temperature=None, max_tokens=None, deployment=None, cache=True, validate=None, **params):
+    """Completion text from an Azure deployment, served from the LLM cache when possible.
+
+    Calls go through the deployment's rate limiter, which also retries
+    throttling and transient errors. Extra ``params`` (e.g.
+    ``response_format``) go to the API and into the cache key. ``validate``
+    raises for a reply the caller cannot use, which keeps it out of the cache.
+    """
+    deployment = deployment or default_deployment()
+    request = _request(messages, temperature, max_tokens, params)
+
+    def _call():
+        client = get_azure_client(deployment, max_retries=0)
+        raw = client.chat.completions.with_raw_response.create(model=deployment, **request)
+        return raw.parse(), raw.headers
+
+    def _create():
+        response = get_limiter(deployment).call(
+            _call, estimate_tokens(messages, max_tokens), usage=_total_tokens, retry_on=(APIConnectionError,)
+        )
+        return _message_content(response)
+
+    if not cache:
+        content = _create()
+        if validate is not None:
+            validate(content)
+        return content
+    return cached_completion(deployment, messages, temperature, max_tokens, _create, validate=validate, **params)
+
+
+def chat_completion_stream(messages, temperature=None, max_tokens=None, deployment=None, cache=True, **params):
+    """Text deltas of an Azure completion; a cached completion is replayed as one delta."""
+    deployment = deployment or default_deployment()
+    request = _request(messages, temperature, max_tokens, params)
+
+    def _open():
+        client = get_azure_client(deployment, max_retries=0)
+        raw = client.chat.completions.with_raw_response.create(model=deployment, stream=True, **request)
+        return iter_chat_deltas(raw.parse()), raw.headers
+
+    def _create_stream():
+        return get_limiter(deployment).stream(
+            _open, estimate_tokens(messages, max_tokens), retry_on=(APIConnectionError,)
+        )
+
+    if not cache:
+        return _create_stream()
+    return cached_completion_stream(deployment, messages, temperature, max_tokens, _create_stream, **params)
+
+
+async def achat_completion(messages, temperature=None, max_tokens=None, deployment=None, cache=True, **params):
+    """Async ``chat_completion``; shares the cache with the sync path."""
+    deployment = deployment or default_deployment()
+    key = None
+    if cache and LLM_CACHE_ENABLED:
+        key = completion_key(deployment, messages, temperature, max_tokens, **params)
+        missing = object()
+        cached = llm_cache.get(key, missing)
+        if cached is not missing:
+            return cached
+    request = _request(messages, temperature, max_tokens, params)
+
+    async def _call():
+        client = get_async_azure_client(deployment, max_retries=0)
+        raw = await client.chat.completions.with_raw_response.create(model=deployment, **request)
+        return raw.parse(), raw.headers
+
+    response = await get_limiter(deployment).call_async(
+        _call, estimate_tokens(messages, max_tokens), usage=_total_tokens, retry_on=(APIConnectionError,)
+    )
+    content = _message_content(response)
+    if key is not None:
+        llm_cache.set(key, content)
+    return content
+
+
+def hf_chat_completion(messages, model, api_key, temperature=None, max_tokens=None, cache=True, validate=None, **params):
+    """Completion text from a Hugging Face inference model, served from the LLM cache when possible.
+
+    ``validate`` works as in ``chat_completion``.
+    """
+    request = _request(messages, temperature, max_tokens, params)
+
+    def _call():
+        return get_hf_client(api_key).chat_completion(model=model, **request), None
+
+    def _create():
+        response = get_limiter(model, provider="hf").call(
+            _call, estimate_tokens(messages, max_tokens), usage=_total_tokens, retry_on=(ConnectionError, TimeoutError)
+        )
+        return _message_content(response)
+
+    if not cache:
+        content = _create()
+        if validate is not None:
+            validate(content)
+        return content
+    return cached_completion(model, messages, temperature, max_tokens, _create, validate=validate, **params)
+
+
+def close_clients():
+    """Close the shared sync connection pool and drop every cached client."""
+    global _http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+        _azure_clients.clear()
+        _hf_clients.clear()
+        _async_clients.clear()
@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+
+from src.dcf_engine import dcf
+
+load_dotenv()
+
+MONTE_CARLO_SIMULATIONS = int(os.getenv("MONTE_CARLO_SIMULATIONS", "100000"))
+MONTE_CARLO_CHUNK_SIZE = int(os.getenv("MONTE_CARLO_CHUNK_SIZE", "50000"))
+# Worker processes; 1 keeps the simulation in-process
+MONTE_CARLO_PROCESSES = int(os.getenv("MONTE_CARLO_PROCESSES", "1"))
+MONTE_CARLO_SEED = int(os.getenv("MONTE_CARLO_SEED", "42"))
+
+# Relative standard error of the mean below which the run counts as converged
+CONVERGENCE_TOLERANCE = 0.005
+
+FACTORS = ("revenue_growth", "margin", "discount_rate")
+
+DEFAULT_ASSUMPTIONS = {
+    "base_revenue": 10000000,
+    "years": 5,
+    # (mean, standard deviation) of each simulated driver
+    "revenue_growth": (0.06, 0.03),
+    "margin": (0.25, 0.04),
+    "discount_rate": (0.10, 0.015),
+    "terminal_growth": 0.02,
+    # Correlation between revenue growth, margin and discount rate, in FACTORS order
+    "correlation": [
+        [1.0, 0.4, -0.3],
+        [0.4, 1.0, -0.2],
+        [-0.3, -0.2, 1.0],
+    ],
+}
+
+
+def _cholesky(correlation):
+    matrix = np.asarray(correlation, dtype=float)
+    try:
+        return np.linalg.cholesky(matrix)
+    except np.linalg.LinAlgError:
+        raise ValueError("The correlation matrix must be symmetric positive definite")
+
+
+def simulate_chunk(assumptions, size, seed):
+    """Value ``size`` correlated scenarios and return their enterprise values as float32.
+
+    Each scenario draws a revenue growth rate, a cash flow margin and a
+    discount rate from correlated normals (Cholesky factor of the correlation
+    matrix), projects ``years`` of cash flows and values them with a Gordon
+    growth terminal value.
+    """
+    rng = np.random.default_rng(seed)
+    means = np.array([assumptions[factor][0] for factor in FACTORS])
+    stds = np.array([assumptions[factor][1] for factor in FACTORS])
+    draws = rng.standard_normal((size, len(FACTORS))) @ _cholesky(assumptions["correlation"]).T
+    growth, margin, rate = (means + draws * stds).T
+
+    # Keep the discount rate above terminal growth so the perpetuity is defined
+    rate = np.maximum(rate, assumptions["terminal_growth"] + 0.01)
+    margin = np.clip(margin, -1.0, 1.0)
+
+    years = np.arange(1, assumptions["years"] + 1)
+    revenue = assumptions["base_revenue"] * np.power(1.0 + growth[:, None], years)
+    cash_flows = revenue * margin[:, None]
+    values = dcf(cash_flows, rate, terminal_growth=assumptions["terminal_growth"])["enterprise_value"]
+    return values.astype(np.float32)
+
+
+def _chunk_sizes(simulations, chunk_size):
+    full, remainder = divmod(simulations, chunk_size)
+    return [chunk_size] * full + ([remainder] if remainder else [])
+
+
+def run_simulation(assumptions=None, simulations=None, chunk_size=None, seed=None, processes=None,
+                   bins=20, percentiles=(5, 10, 25, 50, 75, 90, 95)):
+    """Run a seeded, chunked Monte Carlo valuation and summarise the distribution.
+
+    Scenarios are generated ``chunk_size`` at a time so intermediate arrays
+    stay bounded; only the float32 values are kept for the percentiles.
+    Every chunk gets its own child seed, so results are identical whether
+    chunks run in-process or on a pool of ``processes`` workers.
+    """
+    config = dict(DEFAULT_ASSUMPTIONS)
+    config.update(assumptions or {})
+    simulations = simulations or MONTE_CARLO_SIMULATIONS
+    chunk_size = chunk_size or MONTE_CARLO_CHUNK_SIZE
+    seed = MONTE_CARLO_SEED if seed is None else seed
+    processes = processes or MONTE_CARLO_PROCESSES
+    _cholesky(config["correlation"])  # Fail fast, before starting workers
+
+    sizes = _chunk_sizes(simulations, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if processes > 1 and len(sizes) > 1:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(processes, len(sizes)), mp_context=context) as executor:
+            chunks = list(executor.map(simulate_chunk, [config] * len(sizes), sizes, seeds))
+    else:
+        chunks = [simulate_chunk(config, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    # Running mean after each chunk shows whether more simulations would still move the answer
+    running_sums = np.cumsum([chunk.sum(dtype=np.float64) for chunk in chunks])
+    running_counts = np.cumsum(sizes)
+    values = np.concatenate(chunks)
+    mean = float(values.mean(dtype=np.float64))
+    std = float(values.std(dtype=np.float64))
+    standard_error = std / np.sqrt(values.size)
+    counts, edges = np.histogram(values, bins=bins)
+
+    return {
+        "simulations": int(values.size),
+        "seed": seed,
+        "mean_value": round(mean),
+        "median_value": round(float(np.median(values))),
+        "std_value": round(std),
+        "min_value": round(float(values.min())),
+        "max_value": round(float(values.max())),
+        "percentiles": {
+            f"p{p}": round(float(v)) for p, v in zip(percentiles, np.percentile(values, percentiles))
+        },
+        "histogram": {
+            "bin_edges": [round(float(edge)) for edge in edges],
+            "counts": counts.tolist(),
+        },
+        "convergence": {
+            "standard_error": round(standard_error),
+            "relative_standard_error": round(standard_error / abs(mean), 6) if mean else None,
+            "running_mean": [round(float(total / count)) for total, count in zip(running_sums, running_counts)],
+            "converged": bool(mean and standard_error / abs(mean) < CONVERGENCE_TOLERANCE),
+        },
+        "assumptions": {
+            key: (list(value) if isinstance(value, tuple) else value) for key, value in config.items()
+        },
+    }
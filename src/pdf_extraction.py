@@ -0,0 +1,137 @@
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+from pypdf import PdfReader
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for large PDFs; 1 disables the process pool
+PDF_EXTRACT_PROCESSES = int(os.getenv("PDF_EXTRACT_PROCESSES", str(os.cpu_count() or 1)))
+# Smaller documents are extracted in-process, where pool start-up would cost more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+
+
+def _read_source(source):
+    """Normalise a path, raw bytes or (uploaded) file object into something PdfReader accepts."""
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(bytes(source))
+    if hasattr(source, "getvalue"):
+        return io.BytesIO(source.getvalue())
+    return source
+
+
+def _pool_payload(source):
+    """Something cheap to send to worker processes: the path, or the PDF bytes."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def _page_text(page, page_number):
+    try:
+        return page.extract_text() or ""
+    except Exception as e:
+        # One malformed page should not lose the rest of the document
+        logger.warning(f"❌ Could not extract text from page {page_number}: {e}")
+        return ""
+
+
+# Each worker parses the PDF once in its initializer and reuses the reader for every range it is given
+_worker_reader = None
+
+
+def _init_worker(payload):
+    """Pool initializer: open the PDF from a path or bytes sent once per worker process."""
+    global _worker_reader
+    _worker_reader = PdfReader(payload if isinstance(payload, str) else io.BytesIO(payload))
+
+
+def _extract_range(start, stop):
+    """Worker entry point: extract pages ``start``..``stop - 1`` from the worker's reader."""
+    return [_page_text(_worker_reader.pages[index], index + 1) for index in range(start, stop)]
+
+
+def _page_ranges(page_count, processes):
+    # A few ranges per worker keeps the pool busy when some pages are much heavier than others
+    chunks = max(1, min(page_count, processes * 4))
+    size = -(-page_count // chunks)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def _iter_pages_parallel(payload, page_count, processes):
+    ranges = _page_ranges(page_count, processes)
+    context = multiprocessing.get_context("spawn")
+    # The document travels to each worker once, through the initializer, rather than with every range
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                             initializer=_init_worker, initargs=(payload,)) as executor:
+        futures = [executor.submit(_extract_range, start, stop) for start, stop in ranges]
+        # Yield ranges in page order; later ranges keep extracting in the background
+        for future in futures:
+            yield from future.result()
+
+
+def iter_pages(source, processes=None):
+    """Yield the text of each page of a PDF, in page order.
+
+    ``source`` may be a file path, raw bytes or a file object such as a
+    Streamlit ``UploadedFile``. PDFs with at least ``PDF_PARALLEL_MIN_PAGES``
+    pages are split into page ranges and extracted on a process pool.
+    """
+    reader = PdfReader(_read_source(source))
+    page_count = len(reader.pages)
+    processes = min(processes or PDF_EXTRACT_PROCESSES, page_count)
+
+    if processes > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        del reader
+        yielded = 0
+        try:
+            for text in _iter_pages_parallel(_pool_payload(source), page_count, processes):
+                yielded += 1
+                yield text
+            return
+        except (BrokenProcessPool, OSError) as e:
+            logger.error(f"❌ Parallel PDF extraction failed, continuing in-process: {e}")
+            reader = PdfReader(_read_source(source))
+            for index in range(yielded, page_count):
+                yield _page_text(reader.pages[index], index + 1)
+            return
+
+    for index, page in enumerate(reader.pages):
+        yield _page_text(page, index + 1)
+
+
+def extract_pages(source, processes=None):
+    """Return the text of every page as a list."""
+    return list(iter_pages(source, processes=processes))
+
+
+def join_pages(pages, page_markers=False, skip_empty=False):
+    """Join page texts into one string in a single pass.
+
+    With ``page_markers`` each page is prefixed by ``--- Page N ---``.
+    """
+    def parts():
+        for index, text in enumerate(pages):
+            if skip_empty and not text.strip():
+                continue
+            yield f"--- Page {index + 1} ---\n{text}\n" if page_markers else text
+
+    return "\n".join(parts()).strip()
+
+
+def extract_text(source, page_markers=False, skip_empty=False, processes=None):
+    """Return the whole document as one string, joined once rather than page by page."""
+    return join_pages(iter_pages(source, processes=processes), page_markers=page_markers, skip_empty=skip_empty)
@@ -0,0 +1,359 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Per-deployment quotas; override one deployment with e.g. AZURE_OPENAI_TPM_GPT_4_1_MINI. 0 disables a limit.
+AZURE_OPENAI_TPM = int(os.getenv("AZURE_OPENAI_TPM", "0"))
+AZURE_OPENAI_RPM = int(os.getenv("AZURE_OPENAI_RPM", "0"))
+# Fraction of the quota the client aims for, so bursts land just under it
+LLM_QUOTA_HEADROOM = float(os.getenv("LLM_QUOTA_HEADROOM", "0.9"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RATE_RETRIES = int(os.getenv("LLM_RATE_RETRIES", "6"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "60"))
+# Completion size assumed when a call sets no max_tokens
+LLM_DEFAULT_COMPLETION_TOKENS = int(os.getenv("LLM_DEFAULT_COMPLETION_TOKENS", "1000"))
+
+# Rough token count for English text and JSON; the bucket is corrected from the reported usage
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+def estimate_tokens(messages, max_tokens=None):
+    """Prompt tokens estimated from the message text plus the completion budget."""
+    prompt = sum(len(str(message.get("content") or "")) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+                 for message in messages)
+    return prompt + (max_tokens or LLM_DEFAULT_COMPLETION_TOKENS)
+
+
+def _setting(name, key, default):
+    slug = re.sub(r"[^A-Z0-9]+", "_", str(key).upper()).strip("_")
+    return int(os.getenv(f"{name}_{slug}", str(default)))
+
+
+def _header(headers, name):
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(headers):
+    """Seconds the service asked us to wait, from ``retry-after-ms`` or ``retry-after``; ``None`` if absent."""
+    milliseconds = _header(headers, "retry-after-ms")
+    if milliseconds is not None:
+        return milliseconds / 1000
+    return _header(headers, "retry-after")
+
+
+def _error_response(error):
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    return status, getattr(response, "headers", None)
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Exponential backoff with jitter: a random delay between half and all of ``base * 2**attempt``."""
+    base = LLM_BACKOFF_BASE if base is None else base
+    cap = LLM_BACKOFF_MAX if cap is None else cap
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` tokens a minute; ``per_minute`` of 0 never limits.
+
+    Unlike a blocking bucket, ``reserve`` never sleeps: it either takes the
+    tokens or says how long to wait, so sync and async callers share it.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """Take ``amount`` tokens and return 0, or return the seconds until they are available."""
+        if self.capacity <= 0:
+            return 0.0
+        # A request larger than the bucket goes through once the bucket is full
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def adjust(self, amount):
+        """Return (positive) or charge (negative) tokens once the real usage is known."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def clamp(self, remaining):
+        """Never believe there is more left than the service reports; other clients share the quota."""
+        if self.capacity <= 0 or remaining is None:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, remaining)
+
+
+class RateLimiter:
+    """Client-side TPM/RPM limiter with adaptive concurrency for one deployment.
+
+    Calls wait for request and token budget (estimated from the prompt and
+    ``max_tokens``, then checked against the usage and remaining quota the
+    service reports) and for a concurrency slot. Concurrency
+    grows by one per window of successful calls and halves on every 429,
+    and a ``retry-after`` pauses every caller of the deployment, so traffic
+    settles just below the quota instead of bursting into throttling.
+    """
+
+    def __init__(self, tpm=0, rpm=0, max_concurrency=None, headroom=None):
+        headroom = LLM_QUOTA_HEADROOM if headroom is None else headroom
+        self.tokens = TokenBucket(tpm * headroom)
+        self.requests = TokenBucket(rpm * headroom)
+        self.max_concurrency = max(1, max_concurrency or LLM_MAX_CONCURRENCY)
+        self._limit = float(self.max_concurrency)
+        self._active = 0
+        self._resume_at = 0.0
+        self._condition = threading.Condition()
+        self._stats = {"calls": 0, "throttled": 0, "retries": 0, "waited_seconds": 0.0}
+
+    @property
+    def concurrency(self):
+        return int(self._limit)
+
+    def _try_enter(self):
+        """Take a slot and return 0, or return the seconds to wait before trying again."""
+        with self._condition:
+            pause = self._resume_at - time.monotonic()
+            if pause > 0:
+                return pause
+            if self._active >= int(self._limit):
+                return None
+            self._active += 1
+            return 0.0
+
+    def _leave(self, success):
+        with self._condition:
+            self._active -= 1
+            if success:
+                # Additive increase: roughly one more slot per window of successful calls
+                self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+    def _throttle(self, pause):
+        with self._condition:
+            self._stats["throttled"] += 1
+            # Multiplicative decrease
+            self._limit = max(1.0, self._limit / 2)
+            if pause:
+                self._resume_at = max(self._resume_at, time.monotonic() + pause)
+
+    def observe(self, headers):
+        """Align the buckets with the ``x-ratelimit-remaining-*`` headers of a response."""
+        self.tokens.clamp(_header(headers, "x-ratelimit-remaining-tokens"))
+        self.requests.clamp(_header(headers, "x-ratelimit-remaining-requests"))
+
+    def _budget_wait(self, estimate):
+        wait = self.requests.reserve(1)
+        if wait:
+            return wait
+        wait = self.tokens.reserve(estimate)
+        if wait:
+            self.requests.adjust(1)
+        return wait
+
+    def acquire(self, estimate):
+        """Block until the call fits the quota and a concurrency slot is free."""
+        started = time.monotonic()
+        while True:
+            wait = self._budget_wait(estimate)
+            if not wait:
+                break
+            time.sleep(wait)
+        while True:
+            wait = self._try_enter()
+            if wait == 0:
+                break
+            if wait is None:
+                with self._condition:
+                    self._condition.wait(timeout=1.0)
+            else:
+                time.sleep(wait)
+        self._record_wait(started)
+
+    async def acquire_async(self, estimate):
+        """``acquire`` for coroutines; waits with ``asyncio.sleep`` instead of blocking the loop."""
+        started = time.monotonic()
+        while True:
+            wait = self._budget_wait(estimate)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        while True:
+            wait = self._try_enter()
+            if wait == 0:
+                break
+            await asyncio.sleep(0.05 if wait is None else wait)
+        self._record_wait(started)
+
+    def _record_wait(self, started):
+        with self._condition:
+            self._stats["calls"] += 1
+            self._stats["waited_seconds"] += time.monotonic() - started
+
+    def release(self, estimate, used=None, headers=None, success=True):
+        """Free the slot, charging any usage beyond the estimate and syncing with the response headers.
+
+        Unused completion budget is not refunded: Azure counts ``max_tokens``
+        against the quota whether or not it is used.
+        """
+        if used is not None and used > estimate:
+            self.tokens.adjust(estimate - used)
+        if headers is not None:
+            self.observe(headers)
+        self._leave(success)
+
+    def _retry_delay(self, error, attempt, retry_on):
+        """Seconds to wait before retrying ``error``, or ``None`` when it should be raised."""
+        if attempt >= LLM_RATE_RETRIES:
+            return None
+        status, headers = _error_response(error)
+        if status not in RETRY_STATUSES and not isinstance(error, retry_on):
+            return None
+        requested = retry_after(headers)
+        if status == 429:
+            self._throttle(requested)
+        with self._condition:
+            self._stats["retries"] += 1
+        delay = backoff_delay(attempt)
+        # Honour the service's own estimate, jittered so waiting callers do not retry in lockstep
+        return requested + random.uniform(0, LLM_BACKOFF_BASE) if requested is not None else delay
+
+    def call(self, create, estimate, usage=None, retry_on=()):
+        """Run ``create()`` within the quota, retrying throttling and transient errors with jittered backoff.
+
+        ``create`` returns ``(result, headers)``; ``usage(result)`` may give
+        the tokens actually used. ``retry_on`` lists further exception types
+        worth retrying (e.g. connection errors).
+        """
+        attempt = 0
+        while True:
+            self.acquire(estimate)
+            try:
+                result, headers = create()
+            except Exception as error:
+                self.release(estimate, success=False)
+                delay = self._retry_delay(error, attempt, retry_on)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            self.release(estimate, usage(result) if usage else None, headers)
+            return result
+
+    async def call_async(self, create, estimate, usage=None, retry_on=()):
+        """Async ``call``; ``create`` is a coroutine function returning ``(result, headers)``."""
+        attempt = 0
+        while True:
+            await self.acquire_async(estimate)
+            try:
+                result, headers = await create()
+            except Exception as error:
+                self.release(estimate, success=False)
+                delay = self._retry_delay(error, attempt, retry_on)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.release(estimate, usage(result) if usage else None, headers)
+            return result
+
+    def stream(self, create, estimate, retry_on=()):
+        """Yield from the iterator ``create()`` returns, holding a concurrency slot until it is exhausted.
+
+        Throttling surfaces when the stream is opened, before any delta, so
+        only opening the stream is retried.
+        """
+        attempt = 0
+        while True:
+            self.acquire(estimate)
+            try:
+                deltas, headers = create()
+                break
+            except Exception as error:
+                self.release(estimate, success=False)
+                delay = self._retry_delay(error, attempt, retry_on)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+        success = False
+        try:
+            yield from deltas
+            success = True
+        finally:
+            self.release(estimate, headers=headers, success=success)
+
+    def stats(self):
+        """Snapshot of calls, 429s, retries, total wait and the current concurrency limit."""
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update({"concurrency": int(self._limit), "active": self._active})
+        return stats
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(key, provider="azure"):
+    """Process-wide limiter for a deployment (or Hugging Face model), with quotas from the environment.
+
+    Hugging Face models are only limited when HF_TPM / HF_RPM are set.
+    """
+    limiter = _limiters.get((provider, key))
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get((provider, key))
+            if limiter is None:
+                if provider == "azure":
+                    tpm = _setting("AZURE_OPENAI_TPM", key, AZURE_OPENAI_TPM)
+                    rpm = _setting("AZURE_OPENAI_RPM", key, AZURE_OPENAI_RPM)
+                else:
+                    tpm = int(os.getenv("HF_TPM", "0"))
+                    rpm = int(os.getenv("HF_RPM", "0"))
+                limiter = _limiters[(provider, key)] = RateLimiter(
+                    tpm=tpm, rpm=rpm, max_concurrency=_setting("LLM_MAX_CONCURRENCY", key, LLM_MAX_CONCURRENCY),
+                )
+    return limiter
+
+
+def get_rate_limit_metrics():
+    """Stats for every limiter created so far, keyed by ``provider:deployment``."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {f"{provider}:{key}": limiter.stats() for (provider, key), limiter in limiters.items()}
@@ -0,0 +1,156 @@
+import re
+import numpy as np
+import pandas as pd
+
+from src.statement_store import fiscal_year, from_metric_dict
+
+# Line items the ratios read, by normalised column name; the first present alias wins
+LINE_ITEM_ALIASES = {
+    "revenue": ("revenue", "net_sales", "sales"),
+    "cogs": ("cogs", "cost_of_goods_sold", "cost_of_sales"),
+    "operating_expenses": ("operating_expenses",),
+    "ebitda": ("ebitda",),
+    "net_income": ("net_income", "net_profit"),
+    "interest_expense": ("interest_expense",),
+    "current_assets": ("current_assets",),
+    "current_liabilities": ("current_liabilities",),
+    "total_liabilities": ("total_liabilities",),
+    "equity": ("shareholders_equity", "equity", "total_equity"),
+    "long_term_debt": ("long_term_debt", "debt_long_term"),
+    "short_term_debt": ("short_term_debt", "debt_short_term"),
+    "cash": ("cash", "cash_and_cash_equivalents"),
+    "operating_cash_flow": ("cash_from_operating_activities", "operating_cash_flow"),
+    "capital_expenditures": ("capital_expenditures", "capex"),
+}
+
+RATIOS = [
+    "gross_margin", "operating_margin", "ebitda_margin", "net_margin", "revenue_growth",
+    "debt_to_equity", "liabilities_to_equity", "current_ratio", "cash_ratio",
+    "interest_coverage", "cash_flow_coverage", "free_cash_flow", "fcf_margin",
+]
+
+# Ratios that are fractions of revenue or growth rates, reported as percentages with percent=True
+PERCENT_RATIOS = {"gross_margin", "operating_margin", "ebitda_margin", "net_margin", "revenue_growth", "fcf_margin"}
+
+
+def _normalise(name):
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+
+
+def safe_divide(numerator, denominator):
+    """Elementwise ``numerator / denominator`` with NaN wherever the result is undefined.
+
+    Zero, missing or non-finite denominators give NaN instead of raising or
+    returning infinities.
+    """
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator
+    return np.where(np.isfinite(result) & (denominator != 0), result, np.nan)
+
+
+def _line_items(frame):
+    columns = {_normalise(column): column for column in frame.columns}
+    items = {}
+    for item, aliases in LINE_ITEM_ALIASES.items():
+        column = next((columns[alias] for alias in aliases if alias in columns), None)
+        items[item] = (pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=float)
+                       if column is not None else np.full(len(frame), np.nan))
+    return items
+
+
+def ratio_frame(frame, company_col="company", year_col="fiscal_year", ratios=None):
+    """Every ratio for every (company, fiscal year) row of ``frame``, as column operations.
+
+    ``frame`` holds one row per company and year with line item columns,
+    e.g. ``StatementStore.frame()``; column names are matched loosely
+    ("Net Profit", "net_income"). Revenue growth compares each row with the
+    same company's previous fiscal year and is NaN when that year is
+    missing. Ratios whose inputs are absent or undefined are NaN.
+    """
+    frame = frame.copy()
+    if company_col not in frame.columns:
+        frame[company_col] = ""
+    years = frame[year_col]
+    frame["_year"] = years.astype(int) if pd.api.types.is_numeric_dtype(years) else years.map(fiscal_year)
+    frame = frame.sort_values([company_col, "_year"], kind="stable")
+    items = _line_items(frame)
+
+    revenue = items["revenue"]
+    total_debt = np.nansum([items["long_term_debt"], items["short_term_debt"]], axis=0)
+    total_debt[np.isnan(items["long_term_debt"]) & np.isnan(items["short_term_debt"])] = np.nan
+    free_cash_flow = items["operating_cash_flow"] - items["capital_expenditures"]
+
+    companies = frame[company_col].to_numpy()
+    years = frame["_year"].to_numpy()
+    previous_revenue = np.roll(revenue, 1)
+    consecutive = np.zeros(len(frame), dtype=bool)
+    consecutive[1:] = (companies[1:] == companies[:-1]) & (years[1:] == years[:-1] + 1)
+
+    values = {
+        "gross_margin": safe_divide(revenue - items["cogs"], revenue),
+        "operating_margin": safe_divide(revenue - items["cogs"] - items["operating_expenses"], revenue),
+        "ebitda_margin": safe_divide(items["ebitda"], revenue),
+        "net_margin": safe_divide(items["net_income"], revenue),
+        "revenue_growth": np.where(consecutive, safe_divide(revenue - previous_revenue, previous_revenue), np.nan),
+        "debt_to_equity": safe_divide(total_debt, items["equity"]),
+        "liabilities_to_equity": safe_divide(items["total_liabilities"], items["equity"]),
+        "current_ratio": safe_divide(items["current_assets"], items["current_liabilities"]),
+        "cash_ratio": safe_divide(items["cash"], items["current_liabilities"]),
+        "interest_coverage": safe_divide(items["ebitda"], items["interest_expense"]),
+        "cash_flow_coverage": safe_divide(items["operating_cash_flow"], items["total_liabilities"]),
+        "free_cash_flow": free_cash_flow,
+        "fcf_margin": safe_divide(free_cash_flow, revenue),
+    }
+    result = frame[[company_col, year_col]].copy()
+    for name in ratios or RATIOS:
+        result[name] = values[name]
+    return result
+
+
+def _clean(value, digits):
+    if value is None or not np.isfinite(value):
+        return None
+    value = float(value)
+    return round(value, digits) if digits is not None else value
+
+
+def ratio(numerator, denominator, digits=None):
+    """Scalar ``safe_divide``: ``None`` where the ratio is undefined."""
+    return _clean(safe_divide(numerator, denominator), digits)
+
+
+def year_ratios(data, ratios=None, percent=False, digits=None):
+    """Ratios for one company's ``{year: {line item: value}}`` dict, keyed by the same years.
+
+    Undefined ratios are ``None``. With ``percent`` the margins and growth
+    are returned as percentages.
+    """
+    keys = list(data)
+    if not keys:
+        return {}
+    frame = pd.DataFrame([{"fiscal_year": year, **values} for year, values in data.items()])
+    # ratio_frame sorts by year but keeps the row labels, which are positions in ``keys``
+    result = ratio_frame(frame, ratios=ratios).sort_index()
+    names = ratios or RATIOS
+    return {
+        keys[position]: {
+            name: _clean(row[name] * (100 if percent and name in PERCENT_RATIOS else 1), digits) for name in names
+        }
+        for position, row in result.iterrows()
+    }
+
+
+def metric_ratios(financial_metrics, ratios=None, percent=False, digits=None):
+    """Ratios for ``{line item: {year: value}}`` dicts (executive summary shape), keyed by fiscal year."""
+    frame = from_metric_dict("", financial_metrics)
+    if frame.empty:
+        return {}
+    data = {int(year): row.drop(["company", "fiscal_year"]).to_dict() for year, (_, row) in zip(frame["fiscal_year"], frame.iterrows())}
+    return year_ratios(data, ratios=ratios, percent=percent, digits=digits)
+
+
+def portfolio_ratios(store, companies=None, years=None, ratios=None):
+    """Ratios for every stored company and year in one vectorised pass over a StatementStore."""
+    return ratio_frame(store.frame(companies, years), ratios=ratios)
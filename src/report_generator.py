@@ -0,0 +1,168 @@
+import os
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+from src.executive_summary import generate_executive_summary_full
+from src.Page_3_about_industry import analyze_website
+from src.market_analysis import generate_market_analysis
+from src.Page_04_FNL import pnl_reports
+from src.Page_5BalanceSheetAnalysis import balancesheet
+from src.Page_6_cashFlow import cashflow
+from src.ValuationAnalyzer import valuationreports_
+from src.DCFCalculator import dcf_analysis_report
+from src.CCACalculator import cca_report
+from src.hc_assessment_app import hc_reports
+from src.OperationalAssessment import operationassessment
+from src.legal_comlince import legal_compliance_assessment
+from src.RiskAssessment import risk_assessment_report
+from src.streaming import render_stream
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # headless use without a Streamlit runtime
+    add_script_run_ctx = None
+    get_script_run_ctx = None
+
+load_dotenv()
+
+# Maximum number of in-flight requests per LLM provider.
+PROVIDER_LIMITS = {
+    "azure": int(os.getenv("AZURE_OPENAI_MAX_CONCURRENCY", "4")),
+    "hf": int(os.getenv("HF_MAX_CONCURRENCY", "4")),
+    "openai": int(os.getenv("OPENAI_MAX_CONCURRENCY", "2")),
+}
+
+REPORT_MAX_WORKERS = int(os.getenv("REPORT_MAX_WORKERS", "8"))
+
+# Several section functions return their failure as text starting with one of these instead of raising
+ERROR_PREFIXES = ("Error generating analysis:", "Error:")
+
+
+def section_error(result):
+    """The failure a section returned in place of a report, or None when ``result`` is a report."""
+    if isinstance(result, dict) and "error" in result:
+        # analyze_website returns the scraper's or report generator's error dict
+        return str(result.get("details", result["error"]))
+    if isinstance(result, str) and result.lstrip().startswith(ERROR_PREFIXES):
+        return result.strip()
+    return None
+
+
+class ReportSection:
+    def __init__(self, key, title, func, args=(), provider="hf", error_message=None, streams=False):
+        self.key = key
+        self.title = title
+        self.func = func
+        self.args = tuple(args)
+        self.provider = provider
+        # True when func accepts stream=True and then returns a generator of text deltas
+        self.streams = streams
+        self.error_message = error_message or f"Failed to generate {title}. Please check your inputs."
+
+
+class ReportOrchestrator:
+    def __init__(self, max_workers=None, provider_limits=None):
+        """Run independent report sections on a bounded thread pool."""
+        limits = dict(PROVIDER_LIMITS)
+        limits.update(provider_limits or {})
+        self.max_workers = max_workers or REPORT_MAX_WORKERS
+        self._semaphores = {provider: threading.BoundedSemaphore(max(1, limit)) for provider, limit in limits.items()}
+        self.sections = []
+
+    def add_section(self, key, title, func, *args, provider="hf", error_message=None, streams=False):
+        """Register a section; sections are rendered in the order they are added."""
+        section = ReportSection(key, title, func, args, provider, error_message, streams)
+        self.sections.append(section)
+        return section
+
+    def _call(self, section, placeholder):
+        if section.streams and placeholder is not None:
+            # Show the section as it is generated; the caller re-renders it once finished
+            container = placeholder.container(border=True)
+            container.header(section.title, divider=True)
+            return render_stream(section.func(*section.args, stream=True), container.empty())
+        return section.func(*section.args)
+
+    def _run_section(self, section, ctx, placeholder=None):
+        if ctx is not None and add_script_run_ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        semaphore = self._semaphores.get(section.provider)
+        if semaphore is None:
+            result = self._call(section, placeholder)
+        else:
+            with semaphore:
+                result = self._call(section, placeholder)
+        # Raise returned errors, so callers never show or checkpoint them as a report
+        error = section_error(result)
+        if error is not None:
+            raise RuntimeError(error)
+        return result
+
+    def run(self, placeholders=None):
+        """Run every section concurrently and yield (section, result, error) as each one finishes.
+
+        Streaming sections with an entry in ``placeholders`` render progressively into it.
+        """
+        if not self.sections:
+            return
+        ctx = get_script_run_ctx() if get_script_run_ctx is not None else None
+        # Rendering from worker threads needs the script context
+        placeholders = (placeholders or {}) if ctx is not None else {}
+        workers = min(self.max_workers, len(self.sections))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-section") as executor:
+            futures = {
+                executor.submit(self._run_section, section, ctx, placeholders.get(section.key)): section
+                for section in self.sections
+            }
+            for future in as_completed(futures):
+                section = futures[future]
+                try:
+                    yield section, future.result(), None
+                except Exception as e:
+                    yield section, None, e
+
+
+def generate_full_report(website_url, industry,
+                         hc_phase, hc_task,
+                         operation_phase, operation_task, industry_context,
+                         legal_phase, legal_task, company_type,
+                         risk_phase, risk_task, industry_type,
+                         max_workers=None, company=None):
+    """Build the orchestrator holding every section of the complete business report.
+
+    ``company`` selects that company's statements from the statement store
+    for the financial sections.
+    """
+    orchestrator = ReportOrchestrator(max_workers=max_workers)
+    orchestrator.add_section("executive_summary", "Executive Summary", generate_executive_summary_full,
+                             error_message="Failed to generate executive summary. Please check your inputs.")
+    orchestrator.add_section("industry_analysis", f"Industry Analysis for {website_url}", analyze_website, website_url,
+                             error_message="Failed to analyze the website. Please check the URL.")
+    orchestrator.add_section("market_analysis", f"Market Analysis for {industry}", generate_market_analysis, industry,
+                             provider="openai",
+                             error_message="Failed to generate market analysis report. Please check your inputs.")
+    orchestrator.add_section("pnl", "Profit & Loss Analysis", partial(pnl_reports, company=company),
+                             provider="azure", streams=True)
+    orchestrator.add_section("balance_sheet", "Balance Sheet Analysis", partial(balancesheet, company=company),
+                             provider="azure", streams=True)
+    orchestrator.add_section("cash_flow", "Cash Flow Analysis", partial(cashflow, company=company),
+                             provider="azure", streams=True)
+    orchestrator.add_section("valuation", "Valuation Analysis", valuationreports_)
+    orchestrator.add_section("dcf", "Discounted Cash Flow Analysis", dcf_analysis_report,
+                             error_message="Failed to generate DCF analysis report. Please check your inputs.")
+    orchestrator.add_section("cca", "Comparable Company Analysis", cca_report, provider="azure", streams=True,
+                             error_message="Failed to generate CCA analysis report. Please check your inputs.")
+    orchestrator.add_section("human_capital", "Human Capital Assessment", hc_reports, hc_phase, hc_task,
+                             error_message="Failed to generate Human Capital Assessment report. Please check your inputs.")
+    orchestrator.add_section("operational", "Operational Assessment", operationassessment,
+                             operation_phase, operation_task, industry_context,
+                             error_message="Failed to generate Operational Assessment report. Please check your inputs.")
+    orchestrator.add_section("legal", "Legal Compliance Assessment", legal_compliance_assessment,
+                             legal_phase, legal_task, company_type,
+                             error_message="Failed to generate Legal Compliance Assessment report. Please check your inputs.")
+    orchestrator.add_section("risk", "Risk Assessment Report", risk_assessment_report,
+                             risk_phase, risk_task, industry_type,
+                             error_message="Failed to generate Risk Assessment report. Please check your inputs.")
+    return orchestrator
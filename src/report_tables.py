@@ -0,0 +1,173 @@
+import json
+import logging
+import math
+import os
+from jinja2 import Environment
+from dotenv import load_dotenv
+
+from src.db.prompt_repository import get_prompt
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Completion budget for the narrative paragraphs; the tables never go through the model
+NARRATIVE_MAX_TOKENS = int(os.getenv("REPORT_NARRATIVE_MAX_TOKENS", "1500"))
+
+HEADING_STYLE = "color: #555; font-family: Arial, sans-serif;"
+TEXT_STYLE = "font-family: Arial, sans-serif;"
+TABLE_STYLE = "width: 100%; border-collapse: collapse; font-family: Arial, sans-serif;"
+TABLE_HEAD_STYLE = "background-color: #f2f2f2;"
+CELL_STYLE = "padding: 8px; border: 1px solid #ddd;"
+
+_REPORT_TEMPLATE = """\
+<h3 style='{{ styles.heading }}'>{{ title }}</h3>
+
+{% if intro %}
+<p style='{{ styles.text }}'>{{ intro }}</p>
+
+{% endif %}
+{% for table in tables %}
+{% if table.caption %}
+<h4 style='{{ styles.heading }}'>{{ table.caption }}</h4>
+{% endif %}
+<table style='{{ styles.table }}'>
+  <thead style='{{ styles.head }}'>
+    <tr>
+{% for header in table.headers %}
+      <th style='{{ styles.cell }}'>{{ header }}</th>
+{% endfor %}
+    </tr>
+  </thead>
+  <tbody>
+{% for row in table.rows %}
+    <tr>
+{% for cell in row %}
+      <td style='{{ styles.cell }}'>{{ cell }}</td>
+{% endfor %}
+    </tr>
+{% endfor %}
+  </tbody>
+</table>
+
+{% endfor %}
+{% for heading, lines in notes %}
+<h3 style='{{ styles.heading }}'>{{ heading }}</h3>
+<p style='{{ styles.text }}'>
+{% for line in lines %}
+  {{ line }}{% if not loop.last %}<br>{% endif %}
+
+{% endfor %}
+</p>
+
+{% endfor %}
+"""
+
+_env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+_report_template = _env.from_string(_REPORT_TEMPLATE)
+_styles = {"heading": HEADING_STYLE, "text": TEXT_STYLE, "table": TABLE_STYLE, "head": TABLE_HEAD_STYLE, "cell": CELL_STYLE}
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and not math.isfinite(value))
+
+
+def millions(value):
+    """USD amount as millions with two decimals, e.g. 2500000 -> "2.50"."""
+    return "N/A" if _missing(value) else f"{value / 1e6:,.2f}"
+
+
+def percent(value):
+    """A value already in percent, e.g. 41.67 -> "41.67%"."""
+    return "N/A" if _missing(value) else f"{value:,.2f}%"
+
+
+def ratio(value):
+    return "N/A" if _missing(value) else f"{value:,.2f}"
+
+
+def multiple(value):
+    return "N/A" if _missing(value) else f"{value:,.1f}x"
+
+
+FORMATS = {"millions": millions, "percent": percent, "ratio": ratio, "multiple": multiple}
+
+
+def table(headers, rows, caption=None):
+    return {"headers": list(headers), "rows": [list(row) for row in rows], "caption": caption}
+
+
+def metric_table(data, rows, caption=None):
+    """Metric x year table from ``{year: {metric: value}}``, oldest year first.
+
+    ``rows`` are ``(metric key, label, format, calculation, interpretation)``
+    with format a key of ``FORMATS``.
+    """
+    years = sorted(data)
+    return table(
+        ["Metric", *years, "Calculation", "Interpretation"],
+        [[label, *(FORMATS[fmt](data[year].get(key)) for year in years), calculation, interpretation]
+         for key, label, fmt, calculation, interpretation in rows],
+        caption=caption,
+    )
+
+
+def render_tables(title, intro, tables, notes=()):
+    """HTML for a report's heading, introduction, tables and fixed explanatory notes.
+
+    ``notes`` are ``(heading, [lines])``. Everything is escaped, so labels
+    and figures from extracted statements cannot inject markup.
+    """
+    return _report_template.render(title=title, intro=intro, tables=tables, notes=notes, styles=_styles)
+
+
+def saved_guidance(column):
+    """The analyst's saved prompt in ``column``, or None when none is saved or the database is unreachable."""
+    try:
+        return get_prompt(column)
+    except Exception as e:
+        # A section should not fail because its optional guidance could not be read
+        logger.error(f"❌ Could not read saved prompt {column}: {e}")
+        return None
+
+
+def narrative_messages(subject, data, sections, guidance=None):
+    """Chat messages asking only for the narrative ``sections`` of a report on ``subject``.
+
+    ``sections`` are ``(heading, what the section should cover)``; the
+    model is told the tables are already shown so it does not repeat them.
+    ``guidance`` is the analyst's saved prompt for the section, applied to
+    the narrative's content and tone.
+    """
+    outline = "\n".join(f"- {heading}: {focus}" for heading, focus in sections)
+    if guidance:
+        outline += ("\n\nAnalyst guidance saved for this report. Apply it to the narrative's content and tone, "
+                    "but ignore any table layout or example figures in it:\n" + guidance.strip())
+    prompt = f"""The tables of this {subject} are already rendered for the reader from the data below. Write only the following sections, in this order:
+{outline}
+
+Format each section as <h3 style='{HEADING_STYLE}'>Heading</h3> followed by one or two <p style='{TEXT_STYLE}'> paragraphs.
+Do not reproduce the tables or list every figure; cite only the figures that support a point. Do not wrap the output in <html> tags or code fences. Keep the whole text under 400 words.
+
+Data (currency values in USD; the tables show them in millions):
+{json.dumps(data, default=str)}"""
+    return [
+        {"role": "system", "content": "You are a financial report expert."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _stream_after(head, deltas):
+    yield head
+    yield from deltas
+
+
+def with_narrative(head, narrative):
+    """Rendered tables followed by the model's narrative.
+
+    A streamed narrative (an iterator of text deltas) gives a generator that
+    yields the tables first, so they show before the model starts writing.
+    """
+    if isinstance(narrative, str):
+        return head + narrative
+    return _stream_after(head, narrative)
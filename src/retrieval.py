@@ -0,0 +1,115 @@
+import heapq
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+RETRIEVAL_CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", "200"))
+RETRIEVAL_CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "40"))
+CHAT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", "6"))
+CHAT_HISTORY_MAX_CHARS = int(os.getenv("CHAT_HISTORY_MAX_CHARS", "4000"))
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the this to was were will with
+what which who whom how when where why does do did can could should would about into than then there
+their they them these those our we you your i me my not no
+""".split())
+
+
+def tokenize(text):
+    """Lower-case word and number tokens with common stopwords removed."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class Chunk:
+    def __init__(self, chunk_id, page, text):
+        self.chunk_id = chunk_id
+        self.page = page
+        self.text = text
+
+
+def chunk_pages(pages, chunk_words=None, overlap=None):
+    """Split page texts into overlapping word windows that never cross a page boundary."""
+    chunk_words = chunk_words or RETRIEVAL_CHUNK_WORDS
+    overlap = min(overlap if overlap is not None else RETRIEVAL_CHUNK_OVERLAP, chunk_words - 1)
+    step = chunk_words - overlap
+    chunks = []
+    for page_number, page_text in enumerate(pages, start=1):
+        words = page_text.split()
+        for start in range(0, max(len(words), 1), step):
+            window = words[start:start + chunk_words]
+            if not window:
+                break
+            chunks.append(Chunk(len(chunks), page_number, " ".join(window)))
+            if start + chunk_words >= len(words):
+                break
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over document chunks, backed by an in-memory inverted index.
+
+    Only the postings of the query terms are visited, so search cost depends
+    on the question rather than on the length of the document.
+    """
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.lengths = []
+        for chunk in self.chunks:
+            counts = Counter(tokenize(chunk.text))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((chunk.chunk_id, tf))
+        count = len(self.chunks)
+        self.average_length = (sum(self.lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query, k=None):
+        """Return up to ``k`` (score, chunk) pairs, best first."""
+        k = k or RETRIEVAL_TOP_K
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for chunk_id, tf in self.postings[term]:
+                norm = 1 - self.b + self.b * self.lengths[chunk_id] / (self.average_length or 1)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self.chunks[chunk_id]) for chunk_id, score in best]
+
+
+def build_index(pages, chunk_words=None, overlap=None):
+    return BM25Index(chunk_pages(pages, chunk_words=chunk_words, overlap=overlap))
+
+
+def format_context(hits):
+    """Render retrieved chunks in page order with their page numbers."""
+    ordered = sorted((chunk for _, chunk in hits), key=lambda chunk: chunk.chunk_id)
+    return "\n\n".join(f"[Page {chunk.page}]\n{chunk.text}" for chunk in ordered)
+
+
+def window_history(chat_history, max_turns=None, max_chars=None):
+    """Keep the most recent messages that fit in ``max_turns`` and ``max_chars``."""
+    max_turns = max_turns or CHAT_HISTORY_TURNS
+    max_chars = max_chars or CHAT_HISTORY_MAX_CHARS
+    window, used = [], 0
+    for message in reversed(chat_history[-max_turns:]):
+        size = len(message["content"])
+        if window and used + size > max_chars:
+            break
+        window.append({"role": message["role"], "content": message["content"][:max_chars]})
+        used += size
+    return list(reversed(window))
@@ -0,0 +1,358 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+load_dotenv()
+
+STATEMENT_STORE_PATH = os.getenv("STATEMENT_STORE_PATH", "artifacts/statement_store")
+# Generations kept on disk, newest first; at least the current and previous one, which readers may still be using
+STATEMENT_STORE_KEEP_GENERATIONS = max(2, int(os.getenv("STATEMENT_STORE_KEEP_GENERATIONS", "2")))
+
+INDEX_FILE = "index.json"
+# Held by the writing process, so writers in other processes wait for it
+LOCK_FILE = ".write.lock"
+COMPANY_FILE = "company.npy"
+YEAR_FILE = "fiscal_year.npy"
+
+_GENERATION = re.compile(r"gen-(\d+)")
+
+# Extracted CompanyReport fields -> the line item labels the report pages use
+REPORT_LINE_ITEMS = {
+    "financial_metrics": {
+        "revenue": "Revenue",
+        "cogs": "COGS",
+        "operating_expenses": "Operating Expenses",
+        "ebitda": "EBITDA",
+    },
+    "balance_sheet": {
+        "total_assets": "Total Assets",
+        "total_liabilities": "Total Liabilities",
+        "equity": "Shareholders Equity",
+        "debt.long_term": "Long-Term Debt",
+        "debt.short_term": "Short-Term Debt",
+        "cash": "Cash",
+    },
+    "cash_flow": {
+        "net_income": "Net Income",
+        "adjustments_for_non_cash_items": "Adjustments for Non-Cash Items",
+        "changes_in_working_capital": "Changes in Working Capital",
+        "cash_from_operating_activities": "Cash from Operating Activities",
+        "cash_from_investing_activities": "Cash from Investing Activities",
+        "cash_from_financing_activities": "Cash from Financing Activities",
+        "net_cash_flow": "Net Cash Flow",
+        "beginning_cash_balance": "Beginning Cash Balance",
+        "ending_cash_balance": "Ending Cash Balance",
+    },
+}
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock on ``path`` across processes, held for the ``with`` block."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after about ten seconds; keep waiting for the other writer
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def fiscal_year(value):
+    """Fiscal year as an int from 2023, '2023' or labels such as 'FY2023'."""
+    match = re.search(r"(\d{4})", str(value))
+    if match is None:
+        raise ValueError(f"No fiscal year in {value!r}")
+    return int(match.group(1))
+
+
+def _column_file(item):
+    slug = re.sub(r"[^a-z0-9]+", "_", item.lower()).strip("_") or "item"
+    # Distinct labels can share a slug ("P/E" and "P E"), so add a short digest
+    return f"{slug}-{hashlib.blake2b(item.encode('utf-8'), digest_size=4).hexdigest()}.npy"
+
+
+def _flatten(record, prefix=""):
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _statement_frame(company, rows):
+    frame = pd.DataFrame(rows)
+    if frame.empty:
+        return pd.DataFrame(columns=["company", "fiscal_year"])
+    frame.insert(0, "company", company)
+    return frame
+
+
+def from_year_dict(company, data):
+    """Rows from the pages' ``{year: {line item: value}}`` dicts."""
+    return _statement_frame(company, [
+        {"fiscal_year": fiscal_year(year), **values} for year, values in data.items()
+    ])
+
+
+def from_metric_dict(company, data):
+    """Rows from ``{line item: {year: value}}`` dicts such as the executive summary's financial metrics.
+
+    Entries that are not keyed by year are skipped.
+    """
+    by_year = {}
+    for item, values in data.items():
+        if not isinstance(values, dict):
+            continue
+        for year, value in values.items():
+            by_year.setdefault(fiscal_year(year), {})[item] = value
+    return _statement_frame(company, [{"fiscal_year": year, **values} for year, values in by_year.items()])
+
+
+def from_company_report(company, report):
+    """Rows from an extracted CompanyReport, renamed to the page line item labels.
+
+    Sections may be dicts or the JSON strings the extractor returns.
+    """
+    by_year = {}
+    for section, mapping in REPORT_LINE_ITEMS.items():
+        payload = report.get(section)
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        for record in (payload or {}).get("yearly_data", []):
+            flat = _flatten(record)
+            year = fiscal_year(flat.pop("year"))
+            values = by_year.setdefault(year, {})
+            values.update({mapping[field]: value for field, value in flat.items() if field in mapping})
+    return _statement_frame(company, [{"fiscal_year": year, **values} for year, values in by_year.items()])
+
+
+class StatementStore:
+    """Financial statements for many companies, one memory-mapped ``.npy`` file per line item.
+
+    Rows are (company, fiscal year) pairs sorted by company then year, so a
+    company's history is a contiguous slice. Each write produces a new
+    generation directory and then swaps ``index.json``, so readers never
+    see a half-written store; columns are only mapped when first used, so
+    older generations are kept for a while (see ``_prune``).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        # Serialises writers in this process; _writing adds a file lock for other processes
+        self._write_lock = threading.Lock()
+        self._index = None
+        self._index_stamp = None
+        self._arrays = {}
+
+    def _current_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        # os.replace gives the new index a new inode, so this also catches same-tick rewrites
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if stamp != self._index_stamp:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+                self._index_stamp = stamp
+                self._arrays = {}
+            return self._index
+
+    def _array(self, index, name):
+        with self._lock:
+            key = (index["generation"], name)
+            array = self._arrays.get(key)
+            if array is None:
+                path = os.path.join(self.root, index["generation"], name)
+                array = self._arrays[key] = np.load(path, mmap_mode="r")
+            return array
+
+    def __len__(self):
+        index = self._current_index()
+        return index["rows"] if index else 0
+
+    @property
+    def companies(self):
+        index = self._current_index()
+        return list(index["companies"]) if index else []
+
+    @property
+    def line_items(self):
+        index = self._current_index()
+        return list(index["items"]) if index else []
+
+    def rows(self, companies=None, years=None):
+        """Row positions for the given companies (all by default), optionally limited to ``years``."""
+        index = self._current_index()
+        if index is None:
+            return np.empty(0, dtype=np.int64)
+        codes = self._array(index, COMPANY_FILE)
+        if companies is None:
+            rows = np.arange(index["rows"])
+        else:
+            lookup = {name: code for code, name in enumerate(index["companies"])}
+            wanted = sorted(lookup[name] for name in companies if name in lookup)
+            # Each company is a contiguous run of the sorted company column
+            rows = np.concatenate([
+                np.arange(np.searchsorted(codes, code, "left"), np.searchsorted(codes, code, "right"))
+                for code in wanted
+            ]) if wanted else np.empty(0, dtype=np.int64)
+        if years is not None:
+            fiscal_years = self._array(index, YEAR_FILE)
+            rows = rows[np.isin(fiscal_years[rows], [fiscal_year(year) for year in years])]
+        return rows
+
+    def column(self, item, rows=None):
+        """Values of one line item (NaN where missing), for ``rows`` or the whole store."""
+        index = self._current_index()
+        if index is None or item not in index["items"]:
+            raise KeyError(item)
+        values = self._array(index, index["items"][item])
+        return values if rows is None else values[rows]
+
+    def frame(self, companies=None, years=None, items=None):
+        """Long table with ``company``, ``fiscal_year`` and one column per line item."""
+        index = self._current_index()
+        if index is None:
+            return pd.DataFrame(columns=["company", "fiscal_year"])
+        rows = self.rows(companies, years)
+        names = np.asarray(index["companies"], dtype=object)
+        data = {
+            "company": names[self._array(index, COMPANY_FILE)[rows]],
+            "fiscal_year": np.asarray(self._array(index, YEAR_FILE)[rows]),
+        }
+        for item in (items if items is not None else index["items"]):
+            data[item] = np.asarray(self.column(item, rows))
+        return pd.DataFrame(data)
+
+    def panel(self, item, companies=None, years=None):
+        """One line item as a company x fiscal year table."""
+        frame = self.frame(companies, years, [item])
+        return frame.pivot(index="company", columns="fiscal_year", values=item)
+
+    def to_year_dict(self, company, items=None, latest=None, complete=False):
+        """``{year: {line item: value}}`` for one company, newest year first, as the report pages expect.
+
+        ``latest`` keeps only the most recent years; with ``complete`` years
+        missing any requested line item are dropped. Missing values are
+        otherwise left out of the year's dict.
+        """
+        frame = self.frame([company], items=items)
+        if frame.empty:
+            return {}
+        frame = frame.sort_values("fiscal_year", ascending=False)
+        values = frame.drop(columns=["company", "fiscal_year"])
+        if complete:
+            keep = values.notna().all(axis=1).to_numpy()
+            frame, values = frame[keep], values[keep]
+        if latest:
+            frame, values = frame.head(latest), values.head(latest)
+        return {
+            int(year): {item: float(value) for item, value in row.items() if pd.notna(value)}
+            for year, (_, row) in zip(frame["fiscal_year"], values.iterrows())
+        }
+
+    @contextmanager
+    def _writing(self):
+        """Hold the store's write locks, so an upsert's read-merge-write, the choice of
+        generation number and the index swap are not interleaved with another writer's."""
+        with self._write_lock:
+            os.makedirs(self.root, exist_ok=True)
+            with _file_lock(os.path.join(self.root, LOCK_FILE)):
+                yield
+
+    def write(self, frame):
+        """Replace the store's contents with ``frame`` (``company``, ``fiscal_year`` and line item columns)."""
+        with self._writing():
+            return self._write(frame)
+
+    def _write(self, frame):
+        frame = frame.copy()
+        frame["fiscal_year"] = frame["fiscal_year"].map(fiscal_year)
+        frame = frame.drop_duplicates(["company", "fiscal_year"], keep="last")
+        companies = sorted(frame["company"].astype(str).unique())
+        codes = {name: code for code, name in enumerate(companies)}
+        frame = frame.assign(_code=frame["company"].astype(str).map(codes)).sort_values(["_code", "fiscal_year"])
+        items = [column for column in frame.columns if column not in ("company", "fiscal_year", "_code")]
+
+        previous = self._current_index()
+        number = previous["number"] + 1 if previous else 1
+        generation = f"gen-{number:06d}"
+        directory = os.path.join(self.root, generation)
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, COMPANY_FILE), frame["_code"].to_numpy(dtype=np.int32))
+        np.save(os.path.join(directory, YEAR_FILE), frame["fiscal_year"].to_numpy(dtype=np.int16))
+        files = {}
+        for item in items:
+            files[item] = _column_file(item)
+            values = pd.to_numeric(frame[item], errors="coerce").to_numpy(dtype=np.float64)
+            np.save(os.path.join(directory, files[item]), values)
+
+        index = {"number": number, "generation": generation, "rows": len(frame), "companies": companies, "items": files}
+        tmp_path = os.path.join(self.root, f"{INDEX_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.root, INDEX_FILE))
+
+        self._prune(number)
+        return index
+
+    def _prune(self, current):
+        """Delete generations older than the newest ``STATEMENT_STORE_KEEP_GENERATIONS``.
+
+        The previous generation is not deleted right after the swap: readers
+        in other processes may still hold the old index and map its columns
+        lazily. It goes on a later write, once it is no longer among the
+        newest generations.
+        """
+        for name in os.listdir(self.root):
+            match = _GENERATION.fullmatch(name)
+            if match and int(match.group(1)) <= current - STATEMENT_STORE_KEEP_GENERATIONS:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def upsert(self, frame):
+        """Merge rows into the store; new non-missing values replace stored ones for the same company and year."""
+        if frame.empty:
+            return self._current_index()
+        frame = frame.assign(fiscal_year=frame["fiscal_year"].map(fiscal_year))
+        with self._writing():
+            merged = pd.concat([self.frame(), frame], ignore_index=True)
+            # groupby().last() keeps the latest non-null value per line item
+            merged = merged.groupby(["company", "fiscal_year"], sort=False).last().reset_index()
+            return self._write(merged)
+
+
+statement_store = StatementStore(STATEMENT_STORE_PATH)
@@ -0,0 +1,41 @@
+import os
+import time
+import streamlit as st
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Minimum time between re-renders of a streaming placeholder
+STREAM_RENDER_INTERVAL = float(os.getenv("STREAM_RENDER_INTERVAL_SECONDS", "0.15"))
+
+
+def iter_chat_deltas(response):
+    """Yield the text deltas of a ``stream=True`` chat completion."""
+    for chunk in response:
+        # Azure sends a leading chunk with no choices for content filter results
+        if not chunk.choices:
+            continue
+        content = getattr(chunk.choices[0].delta, "content", None)
+        if content:
+            yield content
+
+
+def render_stream(deltas, placeholder=None, unsafe_allow_html=True, interval=None):
+    """Render text deltas progressively into a Streamlit placeholder and return the full text.
+
+    ``st.write_stream`` cannot render raw HTML, so the accumulated text is
+    re-rendered with ``st.markdown`` at most once per ``interval`` seconds.
+    """
+    placeholder = placeholder if placeholder is not None else st.empty()
+    interval = STREAM_RENDER_INTERVAL if interval is None else interval
+    parts = []
+    last_render = 0.0
+    for delta in deltas:
+        parts.append(delta)
+        now = time.monotonic()
+        if now - last_render >= interval:
+            placeholder.markdown("".join(parts), unsafe_allow_html=unsafe_allow_html)
+            last_render = now
+    text = "".join(parts)
+    placeholder.markdown(text, unsafe_allow_html=unsafe_allow_html)
+    return text
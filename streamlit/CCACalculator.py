@@ -1,11 +1,14 @@
 import streamlit as st
 import json
+import pandas as pd
 from datetime import datetime
 from huggingface_hub import InferenceClient
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.comparables import DEFAULT_EV_EBITDA, PEER_UNIVERSE_PATH, comparable_analysis, load_universe
+from src.db.prompt_repository import get_prompt, save_prompt
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -30,8 +33,12 @@ class CCACalculator:
         }
         return data
 
-    def CCA_DATA(self):
-        """Generate complete CCA analysis data."""
+    def CCA_DATA(self, industry=None, sector=None, size_band=None):
+        """Generate complete CCA analysis data.
+
+        The EV/EBITDA multiple is the peer median from the local peer
+        universe; without one the industry default of 8x is used.
+        """
         dummy_data = self.generate_dummy_ebitda_data()
         
         ebitda = self.calculate_ebitda(
@@ -42,7 +49,12 @@ class CCACalculator:
             dummy_data["Amortization"]
         )
 
-        ev_ebitda_ratio = 8
+        analysis = comparable_analysis(
+            {"ebitda": ebitda, "revenue": dummy_data["Revenue"]},
+            industry=industry, sector=sector, size_band=size_band,
+        )
+        ev_ebitda = analysis["multiples"]["ev_ebitda"] if analysis else {}
+        ev_ebitda_ratio = ev_ebitda["median"] if ev_ebitda.get("count") else DEFAULT_EV_EBITDA
         valuation = self.calculate_valuation(ebitda, ev_ebitda_ratio)
 
         data = {
@@ -51,6 +63,14 @@ class CCACalculator:
             "EV/EBITDA Ratio": ev_ebitda_ratio,
             "Valuation": valuation
         }
+        if analysis:
+            data["Peer Set"] = {
+                "Peer Count": analysis["peer_count"],
+                "Criteria": analysis["criteria"],
+                "Peers": analysis["peers"],
+            }
+            data["Peer Multiples"] = analysis["multiples"]
+            data["Valuation Range"] = analysis["valuation"]
 
         return json.dumps(data, indent=4)
 
@@ -61,12 +81,7 @@ def generate_report(prompt, data):
     #     api_key=st.secrets("hf_token"),
     # )
 
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+    client = get_azure_client()
 
     messages = [
         {"role": "system", "content": "You are a financial report expert."},
@@ -93,11 +108,29 @@ def main():
 
     # Initialize CCA Calculator
     calculator = CCACalculator()
-    cca_data = calculator.CCA_DATA()
+
+    filters = {}
+    universe = load_universe()
+    if universe is None:
+        st.info(f"No peer universe found at {PEER_UNIVERSE_PATH}; using the default {DEFAULT_EV_EBITDA}x EV/EBITDA multiple.")
+    else:
+        with st.expander(f"Peer Selection ({len(universe)} companies)", expanded=True):
+            col1, col2, col3 = st.columns(3)
+            filters["industry"] = col1.multiselect("Industry", universe.labels("industry"))
+            filters["sector"] = col2.multiselect("Sector", universe.labels("sector"))
+            filters["size_band"] = col3.multiselect("Size band", universe.labels("size_band"))
+            st.caption("Leave every filter empty to pick the closest peer set automatically.")
+
+    cca_data = calculator.CCA_DATA(**filters)
+    cca_json = json.loads(cca_data)
+    if "Peer Multiples" in cca_json:
+        st.dataframe(pd.DataFrame(cca_json["Peer Multiples"]).T, use_container_width=True)
+        with st.expander(f"Peers ({cca_json['Peer Set']['Peer Count']})"):
+            st.dataframe(pd.DataFrame(cca_json["Peer Set"]["Peers"]), use_container_width=True)
 
     # Display raw calculations
     with st.expander("View CCA Calculations"):
-        st.json(json.loads(cca_data))
+        st.json(cca_json)
 
     # Default prompt template
     default_prompt = """
@@ -183,14 +216,7 @@ def main():
     <|eot_id|><|start_header_id|>assistant<|end_header_id|>
     """
 
-    query = text("SELECT [cca] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0]['cca']
-    else:
-        pass
+    default_prompt = get_prompt("cca", default_prompt)
 
     # Allow user to customize prompt
     st.subheader("Customize Report Generation Prompt")
@@ -203,20 +229,12 @@ def main():
 
     )
 
+    st.caption("The saved prompt also guides the narrative of the Full Report. Its tables are rendered from the data, so table layouts in the prompt only apply on this page.")
+
     if st.button("Save promt"):
             #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text("""
-                UPDATE prompt_valuation_reports
-                SET [cca] = :cca
-                WHERE id = :id
-            """)
-            params = {
-                "cca": user_prompt,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt("cca", user_prompt)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -224,12 +242,10 @@ def main():
         st.rerun()
 
         try:
-            query = text("SELECT [cca] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt("cca")
+            if stored_prompt is not None:
                 st.write("Executive Summary:")
-                st.write(data[0]["cca"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
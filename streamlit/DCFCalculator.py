@@ -2,43 +2,51 @@ import streamlit as st
 import json
 from datetime import datetime
 from huggingface_hub import InferenceClient
+import numpy as np
+import pandas as pd
+from src.dcf_engine import dcf, discount_factors, sensitivity_grid
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 
 
 class DCFCalculator:
     def present_value(self, future_cash_flow, discount_rate, year):
         """Calculate the present value of a single future cash flow."""
-        return future_cash_flow / ((1 + discount_rate) ** year)
+        return float(future_cash_flow * discount_factors(discount_rate, [year])[0])
 
     def total_dcf(self, projected_cash_flows, discount_rate):
         """Calculate the total discounted cash flow (DCF)."""
-        total_value = 0
-        for year, cash_flow in enumerate(projected_cash_flows, start=1):
-            total_value += self.present_value(cash_flow, discount_rate, year)
-        return total_value
+        return float(dcf(projected_cash_flows, discount_rate)["sum_pv"])
+
+    def sensitivity_table(self, projected_cash_flows, discount_rates, growth_rates, mid_year=False):
+        """Enterprise value for every discount rate x terminal growth rate (Gordon growth)."""
+        grid = sensitivity_grid(projected_cash_flows, discount_rates, growth_rates, method="gordon", mid_year=mid_year)
+        return pd.DataFrame(
+            grid,
+            index=[f"{rate:.1%}" for rate in discount_rates],
+            columns=[f"{growth:.1%}" for growth in growth_rates],
+        ).rename_axis(index="Discount Rate", columns="Terminal Growth")
 
     def dcf_data(self):
         """Generate DCF calculations and return JSON data."""
         projected_cash_flows = [2.5e6, 3e6, 3.5e6]
         discount_rate = 0.10
 
-        pv_year_1 = self.present_value(projected_cash_flows[0], discount_rate, 1)
-        pv_year_2 = self.present_value(projected_cash_flows[1], discount_rate, 2)
-        pv_year_3 = self.present_value(projected_cash_flows[2], discount_rate, 3)
+        # Every year is discounted in one vectorised pass
+        result = dcf(projected_cash_flows, discount_rate)
+        present_values = result["present_values"].tolist()
 
-        total_dcf_value = self.total_dcf(projected_cash_flows, discount_rate)
+        total_dcf_value = float(result["sum_pv"])
 
         data = {
             "Projected Cash Flows": projected_cash_flows,
             "Discount Rate": discount_rate,
             "Present Values": {
-                "Year 1": pv_year_1,
-                "Year 2": pv_year_2,
-                "Year 3": pv_year_3
+                f"Year {year}": pv for year, pv in enumerate(present_values, start=1)
             },
             "Total DCF": total_dcf_value
         }
@@ -52,12 +60,7 @@ def generate_report(prompt, data):
     #     api_key=os.getenv("hf_token"),
     # )
 
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+    client = get_azure_client()
 
     messages = [
         {"role": "system", "content": "You are a financial report expert."},
@@ -96,6 +99,13 @@ def main():
     with st.expander("View DCF Calculations"):
         st.json(json.loads(dcf_data))
 
+    with st.expander("Sensitivity: Discount Rate x Terminal Growth"):
+        dcf_inputs = json.loads(dcf_data)
+        discount_rates = np.round(np.linspace(0.08, 0.12, 5), 4)
+        growth_rates = np.round(np.linspace(0.01, 0.03, 5), 4)
+        table = calculator.sensitivity_table(dcf_inputs["Projected Cash Flows"], discount_rates, growth_rates)
+        st.dataframe(table.style.format("{:,.0f}"), use_container_width=True)
+
     # Default prompt template
     default_prompt = """
     <|begin_of_text|><|start_header_id|>system<|end_header_id|>
@@ -181,14 +191,7 @@ def main():
 
     <|eot_id|><|start_header_id|>assistant<|end_header_id|>
     """
-    query = text("SELECT [dcf] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0]['dcf']
-    else:
-        pass
+    default_prompt = get_prompt("dcf", default_prompt)
 
     # Allow user to customize prompt
     st.subheader("Customize Report Generation Prompt")
@@ -198,20 +201,12 @@ def main():
         height=400,
         key="prompt_input"
     )
+    st.caption("The saved prompt also guides the narrative of the Full Report. Its tables are rendered from the data, so table layouts in the prompt only apply on this page.")
+
     if st.button("Save promt"):
             #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text("""
-                UPDATE prompt_valuation_reports
-                SET [dcf] = :dcf
-                WHERE id = :id
-            """)
-            params = {
-                "dcf": user_prompt,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt("dcf", user_prompt)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -219,12 +214,10 @@ def main():
         st.rerun()
 
         try:
-            query = text("SELECT [dcf] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt("dcf")
+            if stored_prompt is not None:
                 st.write("Executive Summary:")
-                st.write(data[0]["dcf"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
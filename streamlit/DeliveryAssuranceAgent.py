@@ -1,11 +1,12 @@
 import streamlit as st
 from huggingface_hub import InferenceClient
-import PyPDF2
-import io
 from datetime import datetime
 import os
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
+from src.pdf_extraction import extract_pages, join_pages
+from src.document_store import document_store
+from src.retrieval import build_index, format_context, window_history
 load_dotenv()
 
 # --- Configuration & Secrets ---
@@ -28,29 +29,21 @@ class PDFChatbot:
             #     token=api_key
             # )
 
-            self.client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+            self.client = get_azure_client()
             self.model_name = model_name
         except Exception as e:
             st.error(f"Failed to initialize HuggingFace client: {e}")
             st.stop()
         self.pdf_text = ""
+        self.index = None
 
     def extract_text_from_pdf(self, pdf_file):
         """Extract text from uploaded PDF file."""
         try:
-            # Use BytesIO to handle the uploaded file in memory
-            pdf_file_bytes = io.BytesIO(pdf_file.getvalue())
-            pdf_reader = PyPDF2.PdfReader(pdf_file_bytes)
-            text = ""
-            for page_num, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                if page_text: # Add text only if extraction was successful
-                    text += f"--- Page {page_num+1} ---\n{page_text}\n\n"
+            # Re-uploads of the same file reuse the stored pages; pages without text are skipped, as before
+            _, pages = document_store.load_pages(pdf_file.getvalue(), extract_pages)
+            self.index = build_index(pages)
+            text = join_pages(pages, page_markers=True, skip_empty=True)
             return text if text else "Could not extract text from the PDF."
         except Exception as e:
             st.error(f"Error extracting text from PDF: {str(e)}")
@@ -69,18 +62,17 @@ class PDFChatbot:
         # Construct messages for the API call, including history
         messages = [{"role": "system", "content": system_prompt}]
 
-        # Add limited document context (e.g., first 4000 chars) to avoid exceeding limits
-        # A more robust solution would involve chunking/embeddings for large docs
-        context_limit = 8000
-        limited_pdf_text = self.pdf_text[:context_limit]
-        if len(self.pdf_text) > context_limit:
-             limited_pdf_text += "\n... [Document Content Truncated]"
+        # Send only the passages most relevant to this question, from anywhere in the document
+        hits = self.index.search(user_question) if self.index is not None else []
+        if hits:
+            document_context = format_context(hits)
+        else:
+            document_context = self.pdf_text[:8000]
 
-        messages.append({"role": "user", "content": f"Document Content:\n{limited_pdf_text}"})
+        messages.append({"role": "user", "content": f"Document Content (relevant excerpts):\n{document_context}"})
 
-        # Add previous chat history
-        for message in chat_history:
-             messages.append({"role": message["role"], "content": message["content"]})
+        # Add the most recent chat history only, so the prompt does not grow with the conversation
+        messages.extend(window_history(chat_history))
 
         # Add the current user question
         messages.append({"role": "user", "content": f"User's Question: {user_question}"})
@@ -1,18 +1,5 @@
 import streamlit as st
-# from src.report_generator import generate_full_report
-from src.executive_summary import generate_executive_summary_full
-from src.Page_3_about_industry import analyze_website
-from src.market_analysis import generate_market_analysis
-from src.Page_04_FNL import pnl_reports
-from src.Page_5BalanceSheetAnalysis import balancesheet
-from src.Page_6_cashFlow import cashflow
-from src.ValuationAnalyzer import valuationreports_
-from src.DCFCalculator import dcf_analysis_report
-from src.CCACalculator import cca_report
-from src.hc_assessment_app import hc_reports
-from src.OperationalAssessment import operationassessment
-from src.legal_comlince import legal_compliance_assessment
-from src.RiskAssessment import risk_assessment_report
+from src.report_generator import generate_full_report
 
 
 
@@ -373,114 +360,29 @@ def main():
         generate_all = st.button("Generate Complete Report", use_container_width=True)
     
     if generate_all:
+        orchestrator = generate_full_report(
+            website_url, industry,
+            selected_phase_hc, selected_task_hc,
+            selected_phase_operation, selected_task_operation, industry_context,
+            selected_phase_legal, selected_task_legal, company_type,
+            selected_phase_resk, selected_task_risk, industry_type,
+            company=company_name,
+        )
+        # Reserve a slot per section so the report keeps its order while sections finish out of order
+        placeholders = {section.key: st.empty() for section in orchestrator.sections}
+
         with st.spinner("Generating comprehensive report..."):
-            # Generate executive summary
-            executive_summary = generate_executive_summary_full()
-            
-            if executive_summary:
-                with st.container(border=True):
-                    st.header("Executive Summary", divider=True)
-                    st.markdown(executive_summary, unsafe_allow_html=True)
-                # st.markdown(f"<h2>Executive Summary""</h2>", unsafe_allow_html=True)
-                # st.markdown(executive_summary, unsafe_allow_html=True)
-            else:
-                st.error("Failed to generate executive summary. Please check your inputs.")
-            IndustryAnalyzer = analyze_website(website_url)
-            if IndustryAnalyzer:
-                with st.container(border=True):
-                    st.header(f"Industry Analysis for {website_url}", divider=True)
-                    st.markdown(IndustryAnalyzer, unsafe_allow_html=True)   
-            else:
-                st.error("Failed to analyze the website. Please check the URL.")
-
-            market_analysis_report = generate_market_analysis(industry)
-            if market_analysis_report:
-                with st.container(border=True):
-                    st.header(f"Market Analysis for {industry}", divider=True)
-                    st.markdown(market_analysis_report, unsafe_allow_html=True)
-            else:
-                st.error("Failed to generate market analysis report. Please check your inputs.")  
-
-            pnl_reports_ = pnl_reports()
-            if pnl_reports_:
-                with st.container(border=True):
-                    st.header("Profit & Loss Analysis", divider=True)
-                    st.markdown(pnl_reports_, unsafe_allow_html=True)
-
-
-            balancesheet_ = balancesheet()
-            if balancesheet_:   
-                with st.container(border=True):
-                    st.header("Balance Sheet Analysis", divider=True)
-                    st.markdown(balancesheet_, unsafe_allow_html=True)  
-
-            cashflow_reports_ = cashflow()
-            if cashflow_reports_:   
-                with st.container(border=True):
-                    st.header("Cash Flow Analysis", divider=True)
-                    st.markdown(cashflow_reports_, unsafe_allow_html=True)              
-
-            valuation_reports = valuationreports_()
-            if valuation_reports:
-                with st.container(border=True):
-                    st.header("Valuation Analysis", divider=True)
-                    st.markdown(valuation_reports, unsafe_allow_html=True)
-
-            dcf_analysis = dcf_analysis_report()
-            if dcf_analysis:
-                with st.container(border=True):
-                    st.header("Discounted Cash Flow Analysis", divider=True)
-                    st.markdown(dcf_analysis, unsafe_allow_html=True)
-            else:
-                st.error("Failed to generate DCF analysis report. Please check your inputs.")
-
-            cca_reprot_calculator = cca_report()
-            if cca_reprot_calculator:
-                with st.container(border=True):
-                    st.header("Comparable Company Analysis", divider=True)
-                    st.markdown(cca_reprot_calculator, unsafe_allow_html=True)
-            else:
-                st.error("Failed to generate CCA analysis report. Please check your inputs.")
-
-      
-        hc_reports_ = hc_reports(selected_phase_hc, 
-                        selected_task_hc)
-        if hc_reports_:
-            with st.container(border=True):
-                st.header("Human Capital Assessment", divider=True)
-                st.markdown(hc_reports_, unsafe_allow_html=True)
-        else:
-            st.error("Failed to generate Human Capital Assessment report. Please check your inputs.")
-
-
-        operationassessment_ = operationassessment(selected_phase_operation,
-                        selected_task_operation,
-                        industry_context)   
-        if operationassessment_:
-            with st.container(border=True):
-                st.header("Operational Assessment", divider=True)
-                st.markdown(operationassessment_, unsafe_allow_html=True)
-        else:
-            st.error("Failed to generate Operational Assessment report. Please check your inputs.")
-
-        legal_compliance_assessment_ = legal_compliance_assessment(selected_phase_legal, selected_task_legal,company_type)
-        if legal_compliance_assessment_:
-            with st.container(border=True):
-                st.header("Legal Compliance Assessment", divider=True)
-                st.markdown(legal_compliance_assessment_, unsafe_allow_html=True)
-        else:
-            st.error("Failed to generate Legal Compliance Assessment report. Please check your inputs.")  
-
-
-
-        risk_assessment_report_ = risk_assessment_report(selected_phase_resk, selected_task_risk, industry_type)
-        if risk_assessment_report_:
-            with st.container(border=True):
-                st.header("Risk Assessment Report", divider=True)
-                st.markdown(risk_assessment_report_, unsafe_allow_html=True)
-        else:
-            st.error("Failed to generate Risk Assessment report. Please check your inputs.")
-        
+            for section, report, error in orchestrator.run(placeholders):
+                with placeholders[section.key].container():
+                    if report:
+                        with st.container(border=True):
+                            st.header(section.title, divider=True)
+                            st.markdown(report, unsafe_allow_html=True)
+                    elif error is not None:
+                        st.error(f"{section.error_message} ({error})")
+                    else:
+                        st.error(section.error_message)
+
 
 
 
@@ -5,8 +5,9 @@ import json
 import os
 
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -16,12 +17,7 @@ class OperationalAssessment:
         #     provider="hf-inference",
         #     api_key=os.getenv("hf_token")
         # )
-        self.client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+        self.client = get_azure_client()
 
 
         self.phases = {
@@ -162,14 +158,7 @@ def main():
     elif selected_phase == "Section 4":
         OAT_Section_1 = "OAT_Section_4"
 
-    query = text(f"SELECT [{OAT_Section_1}] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0][f'{OAT_Section_1}']
-    else:
-        pass
+    default_prompt = get_prompt(OAT_Section_1, default_prompt)
 
     # Prompt customization
     st.subheader("Customize Analysis Prompt")
@@ -192,18 +181,8 @@ def main():
             OAT_Section_1 = "OAT_Section_4"
 
             #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text(f"""
-                UPDATE prompt_valuation_reports
-                SET [{OAT_Section_1}] = :{OAT_Section_1}
-                WHERE id = :id
-            """)
-            params = {
-                f"{OAT_Section_1}": user_prompt,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt(OAT_Section_1, user_prompt)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -211,12 +190,10 @@ def main():
         st.rerun()
 
         try:
-            query = text(f"SELECT [{OAT_Section_1}] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt(OAT_Section_1)
+            if stored_prompt is not None:
                 st.write(f"{OAT_Section_1}:")
-                st.write(data[0][f"{OAT_Section_1}"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
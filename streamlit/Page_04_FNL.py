@@ -3,23 +3,25 @@ from huggingface_hub import InferenceClient
 import json
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
+from src.statement_store import statement_store
+from src.ratios import year_ratios
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 # Function to calculate margins for P&L
 def calculate_margins_for_pnl(financial_data):
     """Calculate Gross Profit Margin and Net Profit Margin for the given financial data."""
+    ratios = year_ratios(financial_data, ["gross_margin", "net_margin"], percent=True, digits=2)
     margins = {}
     for year, data in financial_data.items():
-        gross_profit_margin = round(((data["Revenue"] - data["COGS"]) / data["Revenue"]) * 100, 2)
-        net_profit_margin = round((data["Net Profit"] / data["Revenue"]) * 100, 2)
         margins[year] = {
             "Revenue": data["Revenue"],
             "COGS": data["COGS"],
             "Net Profit": data["Net Profit"],
-            "Gross Profit Margin": gross_profit_margin,
-            "Net Profit Margin": net_profit_margin
+            "Gross Profit Margin": ratios[year]["gross_margin"],
+            "Net Profit Margin": ratios[year]["net_margin"]
         }
     return margins
 
@@ -32,12 +34,7 @@ def generate_report(prompt, metrics):
     #     api_key=os.getenv("hf_token"),
     # )
 
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+    client = get_azure_client()
 
 
 
@@ -232,16 +229,29 @@ DEFAULT_PROMPT = """
 """
 
 
+def load_pnl_data(company=None):
+    """Latest three years of P&L from the statement store for ``company``, else the sample figures."""
+    stored = statement_store.to_year_dict(company, ["Revenue", "COGS", "Net Income"], latest=3, complete=True) if company else {}
+    if stored:
+        return {
+            year: {"Revenue": values["Revenue"], "COGS": values["COGS"], "Net Profit": values["Net Income"]}
+            for year, values in stored.items()
+        }
+    return {
+        2023: {"Revenue": 10000000, "COGS": 6000000, "Net Profit": 1000000},
+        2022: {"Revenue": 9500000, "COGS": 5800000, "Net Profit": 900000},
+        2021: {"Revenue": 9000000, "COGS": 5500000, "Net Profit": 800000},
+    }
+
+
 # Streamlit App
 def main():
     st.title("Profit & Loss (P&L) Report Generator")
 
     # Input financial data
-    financial_data = {
-        2023: {"Revenue": 10000000, "COGS": 6000000, "Net Profit": 1000000},
-        2022: {"Revenue": 9500000, "COGS": 5800000, "Net Profit": 900000},
-        2021: {"Revenue": 9000000, "COGS": 5500000, "Net Profit": 800000},
-    }
+    companies = statement_store.companies
+    company = st.selectbox("Company", ["Sample data"] + companies) if companies else None
+    financial_data = load_pnl_data(None if company == "Sample data" else company)
 
     # Calculate margins
     pnl_data = calculate_margins_for_pnl(financial_data)
@@ -253,18 +263,7 @@ def main():
     # Allow user to customize prompt
     st.subheader("Customize the Prompt")
 
-    query = text("SELECT [fla] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    research_agent_prompt=""
-    
-    if data:
-        retrieved_scraping_prompt = data[0]['fla']
-        research_agent_prompt = retrieved_scraping_prompt
-        
-        
-    else:
-        research_agent_prompt=DEFAULT_PROMPT
+    research_agent_prompt = get_prompt("fla", DEFAULT_PROMPT)
 
 
     user_prompt = st.text_area(
@@ -275,25 +274,18 @@ def main():
 
 
 
+    st.caption("The saved prompt also guides the narrative of the Full Report. Its tables are rendered from the data, so table layouts in the prompt only apply on this page.")
+
     if st.button("Save Prompt"):
         try:
             # Corrected UPDATE query with WHERE clause
-            query = text("UPDATE prompt_valuation_reports SET [fla] = :fla WHERE id = :id")
-            params = {
-                "fla": user_prompt,
-                "id": 1  # Make sure this matches the record you want to update
-            }
-            execute_query(query, params)
+            save_prompt("fla", user_prompt)
             st.success("Prompt saved successfully!")
 
             # Retrieve the saved prompt for confirmation
-            query = text("SELECT [fla] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            
-            if data:
-                retrieved_scraping_prompt = data[0]['fla']
-                st.write(retrieved_scraping_prompt)
+            stored_prompt = get_prompt("fla")
+            if stored_prompt is not None:
+                st.write(stored_prompt)
             else:
                 st.warning("No data found for the given ID.")
         except Exception as e:
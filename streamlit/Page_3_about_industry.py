@@ -3,8 +3,9 @@ import json
 from huggingface_hub import InferenceClient
 from scrapegraph_py import Client # Assuming this is the correct import
 import os
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
 from sqlalchemy import text
 from dotenv import load_dotenv
 load_dotenv()
@@ -17,12 +18,7 @@ def initialize_clients():
     #     token=os.getenv("hf_token"),
     # )
 
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+    client = get_azure_client()
     return scrapegraph_client, client
 
 def scrape_website_data(client, website_url, user_prompt):
@@ -161,22 +157,13 @@ def main():
     if st.button("Save Prompt"):
         try:
             # Corrected UPDATE query with WHERE clause
-            query = text("UPDATE prompt_valuation_reports SET [about_company_webscraping] = :prompt WHERE id = :id")
-            params = {
-                "prompt": st.session_state.scraping_prompt,
-                "id": 1  # Make sure this matches the record you want to update
-            }
-            execute_query(query, params)
+            save_prompt("about_company_webscraping", st.session_state.scraping_prompt)
             st.success("Prompt saved successfully!")
 
             # Retrieve the saved prompt for confirmation
-            query = text("SELECT [about_company_webscraping] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            
-            if data:
-                retrieved_scraping_prompt = data[0]['about_company_webscraping']
-                st.write(retrieved_scraping_prompt)
+            stored_prompt = get_prompt("about_company_webscraping")
+            if stored_prompt is not None:
+                st.write(stored_prompt)
             else:
                 st.warning("No data found for the given ID.")
         except Exception as e:
@@ -370,22 +357,13 @@ For each of the following sections, gather and synthesize information to provide
     if st.button("Save company Prompt"):
         try:
             # Corrected UPDATE query with WHERE clause
-            query = text("UPDATE prompt_valuation_reports SET [about_company_report_generation] = :about_company_report_generation WHERE id = :id")
-            params = {
-                "about_company_report_generation": editable_report_prompt_body,
-                "id": 1  # Make sure this matches the record you want to update
-            }
-            execute_query(query, params)
+            save_prompt("about_company_report_generation", editable_report_prompt_body)
             st.success("Prompt saved successfully!")
 
             # Retrieve the saved prompt for confirmation
-            query = text("SELECT [about_company_report_generation] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            
-            if data:
-                retrieved_scraping_prompt = data[0]['about_company_report_generation']
-                st.write(retrieved_scraping_prompt)
+            stored_prompt = get_prompt("about_company_report_generation")
+            if stored_prompt is not None:
+                st.write(stored_prompt)
             else:
                 st.warning("No data found for the given ID.")
         except Exception as e:
@@ -5,11 +5,20 @@ from huggingface_hub import InferenceClient
 import json
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
+from src.statement_store import statement_store
+from src.ratios import year_ratios
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 
+# Line items the balance sheet ratios need from the statement store
+BALANCE_SHEET_ITEMS = [
+    "Current Assets", "Non-Current Assets", "Total Assets", "Current Liabilities",
+    "Non-Current Liabilities", "Total Liabilities", "Shareholders Equity",
+]
+
 class FinancialReportGenerator:
     def generate_dummy_financial_data(self, years):
         """Generate dummy financial data for given years."""
@@ -35,25 +44,22 @@ class FinancialReportGenerator:
             }
         return financial_data
 
+    def load_financial_data(self, company, years):
+        """Latest three complete years of stored balance sheets for ``company``, else dummy data for ``years``."""
+        stored = statement_store.to_year_dict(company, BALANCE_SHEET_ITEMS, latest=3, complete=True) if company else {}
+        return stored or self.generate_dummy_financial_data(years)
+
     def calculate_financial_ratios(self, financial_data):
         """Calculate financial ratios from the given data."""
+        ratios = year_ratios(financial_data, ["current_ratio", "liabilities_to_equity"], digits=2)
         results = {}
         for year, data in financial_data.items():
-            total_assets = data["Total Assets"]
-            total_liabilities = data["Total Liabilities"]
-            shareholders_equity = data["Shareholders Equity"]
-            current_assets = data["Current Assets"]
-            current_liabilities = data["Current Liabilities"]
-
-            current_ratio = current_assets / current_liabilities
-            debt_to_equity_ratio = total_liabilities / shareholders_equity
-
             results[year] = {
-                "Total Assets": total_assets,
-                "Total Liabilities": total_liabilities,
-                "Shareholders Equity": shareholders_equity,
-                "Current Ratio": round(current_ratio, 2),
-                "Debt-to-Equity Ratio": round(debt_to_equity_ratio, 2),
+                "Total Assets": data["Total Assets"],
+                "Total Liabilities": data["Total Liabilities"],
+                "Shareholders Equity": data["Shareholders Equity"],
+                "Current Ratio": ratios[year]["current_ratio"],
+                "Debt-to-Equity Ratio": ratios[year]["liabilities_to_equity"],
             }
         return results
 
@@ -64,12 +70,7 @@ def generate_report(prompt, data):
     #     api_key=os.getenv("hf_token"),
     # )
 
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+    client = get_azure_client()
 
     messages = [
         {"role": "system", "content": "You are a financial report expert."},
@@ -100,7 +101,9 @@ def main():
 
     # Generate dummy data for three years
     years = [2023, 2022, 2021]
-    financial_data = generator.generate_dummy_financial_data(years)
+    companies = statement_store.companies
+    company = st.selectbox("Company", ["Sample data"] + companies) if companies else None
+    financial_data = generator.load_financial_data(None if company == "Sample data" else company, years)
     
     # Calculate financial ratios
     financial_ratios = generator.calculate_financial_ratios(financial_data)
@@ -289,14 +292,7 @@ Additional Explanation of Calculations (MBB Style): Provide detailed explanation
     <|eot_id|><|start_header_id|>assistant<|end_header_id|>
     """
 
-    query = text("SELECT [balance_sheet] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0]['balance_sheet']
-    else:
-        pass
+    default_prompt = get_prompt("balance_sheet", default_prompt)
 
     # Allow user to customize prompt
     st.subheader("Customize Report Generation Prompt")
@@ -309,20 +305,12 @@ Additional Explanation of Calculations (MBB Style): Provide detailed explanation
 
 
 
+    st.caption("The saved prompt also guides the narrative of the Full Report. Its tables are rendered from the data, so table layouts in the prompt only apply on this page.")
+
     if st.button("Save promt"):
             #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text("""
-                UPDATE prompt_valuation_reports
-                SET [balance_sheet] = :summary
-                WHERE id = :id
-            """)
-            params = {
-                "summary": user_prompt,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt("balance_sheet", user_prompt)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -330,12 +318,10 @@ Additional Explanation of Calculations (MBB Style): Provide detailed explanation
         st.rerun()
 
         try:
-            query = text("SELECT [balance_sheet] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt("balance_sheet")
+            if stored_prompt is not None:
                 st.write("Executive Summary:")
-                st.write(data[0]["balance_sheet"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
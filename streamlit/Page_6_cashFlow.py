@@ -5,12 +5,22 @@ from huggingface_hub import InferenceClient
 import json
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
+from src.statement_store import statement_store
+from src.ratios import year_ratios
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 
 
+# Line items the cash flow metrics need from the statement store
+CASH_FLOW_ITEMS = [
+    "Net Income", "Adjustments for Non-Cash Items", "Changes in Working Capital",
+    "Cash from Operating Activities", "Cash from Investing Activities", "Cash from Financing Activities",
+    "Net Cash Flow", "Beginning Cash Balance", "Ending Cash Balance",
+]
+
 class CashFlowAnalyzer:
     def generate_dummy_cash_flow_data(self, years):
         """Generate dummy cash flow data for given years."""
@@ -57,20 +67,33 @@ class CashFlowAnalyzer:
             }
         return balance_sheet_data
 
+    def load_statements(self, company, years):
+        """(cash flow, balance sheet) dicts from the statement store for ``company``, else dummy data for ``years``."""
+        if company:
+            cash_flow = statement_store.to_year_dict(company, CASH_FLOW_ITEMS, latest=3, complete=True)
+            balance_sheet = statement_store.to_year_dict(company, ["Total Liabilities"], complete=True)
+            if cash_flow and all(year in balance_sheet for year in cash_flow):
+                return cash_flow, {year: balance_sheet[year] for year in cash_flow}
+        return self.generate_dummy_cash_flow_data(years), self.generate_dummy_balance_sheet(years)
+
     def calculate_cash_flow_metrics(self, cash_flow_data, balance_sheet_data):
         """Calculate cash flow metrics from the given data."""
+        statements = {
+            year: {
+                **data,
+                "Total Liabilities": balance_sheet_data[year]["Total Liabilities"],
+                # Cash flow statements carry no capex line yet, so it stays simulated
+                "Capital Expenditures": data.get("Capital Expenditures", random.uniform(100000, 500000)),
+            }
+            for year, data in cash_flow_data.items()
+        }
+        ratios = year_ratios(statements, ["free_cash_flow", "cash_flow_coverage"], digits=2)
         metrics = {}
-        for year in cash_flow_data.keys():
-            ocf = cash_flow_data[year]["Cash from Operating Activities"]
-            capital_expenditures = random.uniform(100000, 500000)
-            fcf = ocf - capital_expenditures
-            total_debt = balance_sheet_data[year]["Total Liabilities"]
-            cash_flow_coverage_ratio = ocf / total_debt
-            
+        for year, data in cash_flow_data.items():
             metrics[year] = {
-                "Operating Cash Flow (OCF)": round(ocf, 2),
-                "Free Cash Flow (FCF)": round(fcf, 2),
-                "Cash Flow Coverage Ratio": round(cash_flow_coverage_ratio, 2),
+                "Operating Cash Flow (OCF)": round(data["Cash from Operating Activities"], 2),
+                "Free Cash Flow (FCF)": ratios[year]["free_cash_flow"],
+                "Cash Flow Coverage Ratio": ratios[year]["cash_flow_coverage"],
             }
         return metrics
 
@@ -81,12 +104,7 @@ def generate_report(prompt, data):
     #     api_key=os.getenv("hf_token"),
     # )
 
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+    client = get_azure_client()
 
 
     messages = [
@@ -124,8 +142,9 @@ def main():
 
     # Generate data for three years
     years = [2023, 2022, 2021]
-    cash_flow_data = analyzer.generate_dummy_cash_flow_data(years)
-    balance_sheet_data = analyzer.generate_dummy_balance_sheet(years)
+    companies = statement_store.companies
+    company = st.selectbox("Company", ["Sample data"] + companies) if companies else None
+    cash_flow_data, balance_sheet_data = analyzer.load_statements(None if company == "Sample data" else company, years)
     
     # Calculate metrics
     cash_flow_metrics = analyzer.calculate_cash_flow_metrics(cash_flow_data, balance_sheet_data)
@@ -225,14 +244,7 @@ def main():
 
 
     """
-    query = text("SELECT [cash_flow] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0]['cash_flow']
-    else:
-        pass
+    default_prompt = get_prompt("cash_flow", default_prompt)
 
     # Allow user to customize prompt
     st.subheader("Customize Report Generation Prompt")
@@ -243,20 +255,12 @@ def main():
         key="prompt_input"
     )
 
+    st.caption("The saved prompt also guides the narrative of the Full Report. Its tables are rendered from the data, so table layouts in the prompt only apply on this page.")
+
     if st.button("Save promt"):
             #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text("""
-                UPDATE prompt_valuation_reports
-                SET [cash_flow] = :cash_flow
-                WHERE id = :id
-            """)
-            params = {
-                "cash_flow": user_prompt,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt("cash_flow", user_prompt)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -264,12 +268,10 @@ def main():
         st.rerun()
 
         try:
-            query = text("SELECT [cash_flow] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt("cash_flow")
+            if stored_prompt is not None:
                 st.write("Executive Summary:")
-                st.write(data[0]["cash_flow"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
@@ -9,7 +9,7 @@ from datetime import datetime
 import os
 from src.db.sql_operation import execute_query, fetch_query
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -23,12 +23,7 @@ class OperationalAssessment:
             #     model=os.getenv("hf_model"), # Added model here for clarity, though chat_completion needs it too
             #     token=os.getenv("hf_token") # Use token argument
             # )
-            self.client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+            self.client = get_azure_client()
 
 
             self.model_name = os.getenv("DEPLOYMENT_NAME")
@@ -4,13 +4,42 @@ from datetime import datetime
 from huggingface_hub import InferenceClient
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
+from src.comparables import comparable_analysis
+from src.monte_carlo import run_simulation
 load_dotenv()
 
 
 class ValuationAnalyzer:
+    def comparable_company(self, ebitda, revenue):
+        """Comparable company block from the peer universe, or the default peers when there is none."""
+        analysis = comparable_analysis({"ebitda": ebitda, "revenue": revenue})
+        if analysis is None or not analysis["multiples"]["ev_ebitda"]["count"]:
+            return {
+                "ebitda": ebitda,
+                "industry_ev_ebitda_multiple": 8,
+                "peer_companies": [
+                    {"name": "Peer1", "ev_ebitda": 7.8},
+                    {"name": "Peer2", "ev_ebitda": 8.2},
+                    {"name": "Peer3", "ev_ebitda": 7.9}
+                ],
+                "calculated_value": 12000000
+            }
+        statistics = analysis["multiples"]["ev_ebitda"]
+        return {
+            "ebitda": ebitda,
+            "industry_ev_ebitda_multiple": statistics["median"],
+            "multiple_statistics": statistics,
+            "peer_count": analysis["peer_count"],
+            "peer_companies": [
+                {"name": peer["name"], "ev_ebitda": peer["ev_ebitda"]} for peer in analysis["peers"]
+            ],
+            "calculated_value": round(ebitda * statistics["median"])
+        }
+
     def generate_valuation_dummy_data(self):
         """Generate dummy data for different valuation methods."""
         data = {
@@ -26,16 +55,7 @@ class ValuationAnalyzer:
                 "terminal_value": 45000000,
                 "total_dcf_value": 7380000
             },
-            "comparable_company": {
-                "ebitda": 1500000,
-                "industry_ev_ebitda_multiple": 8,
-                "peer_companies": [
-                    {"name": "Peer1", "ev_ebitda": 7.8},
-                    {"name": "Peer2", "ev_ebitda": 8.2},
-                    {"name": "Peer3", "ev_ebitda": 7.9}
-                ],
-                "calculated_value": 12000000
-            },
+            "comparable_company": self.comparable_company(ebitda=1500000, revenue=10000000),
             "rule_of_thumb": {
                 "annual_revenue": 10000000,
                 "industry_multiplier": 1.5,
@@ -46,12 +66,13 @@ class ValuationAnalyzer:
                 "pe_ratio": 12,
                 "calculated_value": 24000000
             },
-            "monte_carlo": {
-                "simulations": 1000,
-                "mean_value": 18500000,
-                "min_value": 16000000,
-                "max_value": 21000000
-            }
+            # Seeded, so the report (and its cached completion) is reproducible
+            "monte_carlo": run_simulation({
+                "base_revenue": 10000000,
+                "years": 3,
+                "margin": (0.25, 0.04),
+                "discount_rate": (0.10, 0.015),
+            })
         }
         return data
 
@@ -62,12 +83,7 @@ def generate_report(prompt, data):
     #     api_key=os.getenv("hf_token"),
     # )
 
-    client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+    client = get_azure_client()
 
     # Include timestamp and username in the context
     context = {
@@ -185,14 +201,7 @@ def main():
     #         )
 
     # Generate report button
-    query = text("SELECT [valuation_analyzer] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        prompt_templates= data[0]['valuation_analyzer']
-    else:
-        pass
+    prompt_templates = get_prompt("valuation_analyzer", prompt_templates)
     user_prompt = st.text_area(
                                                 "Modify the prompt template below:",
                                                 prompt_templates,
@@ -202,18 +211,8 @@ def main():
     
     if st.button("Save promt"):
             #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text("""
-                UPDATE prompt_valuation_reports
-                SET [valuation_analyzer] = :valuation_analyzer
-                WHERE id = :id
-            """)
-            params = {
-                "valuation_analyzer": user_prompt,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt("valuation_analyzer", user_prompt)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -221,12 +220,10 @@ def main():
         st.rerun()
 
         try:
-            query = text("SELECT [valuation_analyzer] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt("valuation_analyzer")
+            if stored_prompt is not None:
                 st.write("valuation_analyzer:")
-                st.write(data[0]["valuation_analyzer"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
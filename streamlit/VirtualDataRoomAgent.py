@@ -598,7 +598,6 @@
 # # ... (rest of the sidebar as before) ...
 
 import streamlit as st
-import PyPDF2
 from docx import Document as DocxDocument
 import openpyxl
 import io
@@ -607,17 +606,17 @@ import re
 import pandas as pd
 from huggingface_hub import InferenceClient
 import random
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
+from src.pdf_extraction import extract_pages, join_pages
+from src.document_store import document_store
 load_dotenv()
 
 # --- Helper Functions (from previous version, ensure they are here) ---
 def extract_text_from_pdf(file_bytes):
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        text = ""
-        for page_num in range(len(pdf_reader.pages)):
-            text += pdf_reader.pages[page_num].extract_text()
+        _, pages = document_store.load_pages(file_bytes, extract_pages)
+        text = join_pages(pages)
         if not text.strip():
             return "Text could not be extracted (possibly image-based PDF requiring OCR)."
         return text
@@ -685,12 +684,7 @@ def initialize_llm_client(api_token_value):
             #     provider="hf-inference", # This might be for specific HF libraries, usually token is enough
             #     token=api_token_value # Renamed from api_key for clarity with InferenceClient param
             # )
-            client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+            client = get_azure_client()
             # Test client (optional, can remove if it causes issues or delays)
             # client.get_model_status() # This is just an example, real method might vary or not exist
             return client
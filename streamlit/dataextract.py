@@ -4,17 +4,23 @@ from typing import List
 from pydantic import BaseModel, Field
 # from openai import AzureOpenAI
 # from azure.identity import DefaultAzureCredential, get_bearer_token_provider
-import PyPDF2  # Requires installation: pip install pypdf2
 import streamlit as st
-import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from agno.agent import Agent,RunResponse
 from agno.models.azure import AzureOpenAI
 from agno.team.team import Team
 from textwrap import dedent
 from dotenv import load_dotenv
 import os
+from src.Dataextraction.segmenter import segment_document
+from src.pdf_extraction import extract_pages, extract_text
+from src.document_store import document_key, document_store
+from src.statement_store import from_company_report, statement_store
+from src.Dataextraction.kpis import MarketShare, derive_kpis, market_share
 load_dotenv()
 
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+
 # Define the Pydantic models as provided
 
 
@@ -115,6 +121,18 @@ class CompanyReport(BaseModel):
     cash_flow : CashFlowData
 
 class PDFCompanyExtractor:
+    # (report key, status label, extractor method) for the sections the model extracts;
+    # KPIs are derived locally from the financial metrics and balance sheet
+    SECTIONS = [
+        ("company_info", "Company Info", "extract_company_info"),
+        ("financial_metrics", "Financial Metrics", "extract_financial_metrics"),
+        ("balance_sheet", "Balance Sheet", "extract_balance_sheet"),
+        ("valuation", "Valuation", "extract_valuation"),
+        ("industry_benchmarks", "Industry Benchmarks", "extract_industry_benchmarks"),
+        ("risk_factors", "Risk Factors", "extract_risk_factors"),
+        ("cash_flow", "Cash Flow Data", "extract_cash_flow"),
+    ]
+
     def __init__(self):
         endpoint = os.getenv("ENDPOINT_URL", "https://info-mdeiaw6z-eastus2.cognitiveservices.azure.com/")
         deployment = os.getenv("DEPLOYMENT_NAME", "gpt-4.1-mini")
@@ -134,6 +152,15 @@ class PDFCompanyExtractor:
 
         self.prompt = """You are an AI specialized in extracting data from financial docs like 10-Ks. Order newest to oldest. Output JSON only."""
 
+    def extract_pages_from_pdf(self, pdf_path) -> List[str]:
+        """
+        Reads a PDF file and extracts the text of each page.
+        
+        :param pdf_path: Path to the PDF file, or its raw bytes.
+        :return: List of page texts, in page order.
+        """
+        return extract_pages(pdf_path)
+
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """
         Reads a PDF file and extracts all text from it.
@@ -141,12 +168,7 @@ class PDFCompanyExtractor:
         :param pdf_path: Path to the PDF file.
         :return: Extracted text as a single string.
         """
-        text = ""
-        with open(pdf_path, "rb") as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+        return extract_text(pdf_path)
 
     def make_schema_strict(self, schema: dict) -> dict:
         """
@@ -295,54 +317,41 @@ class PDFCompanyExtractor:
         # Make the schema strict
         return r3
 
-    def extract_kpis(self, financial_doc: str) -> RunResponse:
+    def derive_kpis(self, financial_metrics: str, balance_sheet: str, financial_doc: str = "") -> str:
         """
-        Extracts KPIs from the provided text in the specified JSON format.
-        
-        :param text: Extracted text from the PDF.
-        :return: Dictionary containing the extracted KPIs.
+        Computes KPIs from the extracted financial metrics and balance sheet instead of asking the model.
+
+        :param financial_metrics: FinancialMetrics JSON from extract_financial_metrics.
+        :param balance_sheet: BalanceSheet JSON from extract_balance_sheet.
+        :param financial_doc: Document text, searched for the market share.
+        :return: KPIs as a JSON string.
         """
-        # Prepare the JSON schema for structured output
-        KPIsAgent = Agent(
-        name="KPIsExtractor",
+        share = market_share(financial_doc, fallback=self.extract_market_share)
+        yearly_data = derive_kpis(financial_metrics, balance_sheet, market_share=share)
+        return KPIs.model_validate({"yearly_data": yearly_data}).model_dump_json(indent=2)
+
+    def extract_market_share(self, passages: str) -> float:
+        """
+        Asks the model for the market share, given only the passages that discuss it.
+
+        :param passages: Document passages mentioning market share.
+        :return: Market share percentage, 0.0 if not stated.
+        """
+        MarketShareAgent = Agent(
+        name="MarketShareExtractor",
         model=self.client,
-        goal="Precisely parse and extract structured key performance indicators (KPIs) from provided financial documents, covering the most recent available years while accounting for inconsistencies in formatting, terminology, and reporting standards. Prioritize accuracy, completeness, and direct sourcing from the text to enable reliable financial analysis, setting any unavailable values to 0.0 for consistency.",
-        description="An AI agent designed to extract key performance indicators (KPIs) such as margins, ratios, growth rates, and market share from financial documents like annual reports, 10-K filings, or earnings statements. It parses lengthy texts to identify and structure KPI data for the most recent years available, using direct extraction where possible and calculations only if explicitly allowed in field descriptions.",
-        response_model=KPIs,
+        description="An AI agent that reads short passages of a financial document and reports the company's own market share.",
+        response_model=MarketShare,
         use_json_mode=True,
-        context={"financial_doc":financial_doc},
+        context={"passages": passages},
         add_context=True,
         instructions=dedent("""
-        You are KPIsExtractor, an AI agent specialized in parsing and extracting key performance indicators (KPIs) from lengthy financial documents such as annual reports, 10-K filings, or earnings statements, which may span 80-90 pages or more.
-
-            Agent Aim: Your primary goal is to accurately identify and extract KPIs for the last 3 years (or available years if fewer) from the provided text, handling variations in terminology, table formats, and document structures. Focus on sections like financial highlights, management's discussion and analysis (MD&A), or KPI summaries, cross-referencing with income statements, balance sheets, or notes for completeness. Extract values directly as stated; perform calculations only if the field description explicitly allows it (e.g., for revenue growth if not stated but revenues are available). If data for a field is incomplete or not found, set the value to 0.0 (do not leave blank or use null).
-
-            Instructions:
-            - Scan the entire text thoroughly, including tables, footnotes, and narrative sections, to locate relevant KPI data.
-            - Handle synonyms and variations: Fields may use different names across documents (e.g., 'Gross margin' could be 'Gross profit percentage' or 'GM%').
-            - Prioritize the most recent fiscal years, typically the last 3, and order them from newest to oldest in the output list.
-            - For percentages and ratios, report as floats (e.g., 25.5 for 25.5%, 1.5 for 1.5:1).
-            - For revenue_growth: If not directly stated, calculate as ((current revenue - previous revenue) / previous revenue) * 100 if revenues are available in the document; set to 0.0 for the earliest year or if unavailable.
-            - For other fields: Extract directly if stated; set to 0.0 if not available (do not calculate unless specified).
-            - Ensure the output strictly adheres to the JSON schema; do not add extra fields, explanations, or narrative text.
-            - If no KPI data is found for a year, do not include that year in the list.
-
-            Field Descriptions (use these to guide extraction):
-            - year: The fiscal or calendar year as a string (e.g., '2023'). Look for headers like 'Year Ended December 31, 2023' or 'FY2022'.
-            - gross_margin: Gross margin percentage as directly stated, in percent (e.g., 25.5).
-            - operating_margin: Operating margin percentage as directly stated, in percent (e.g., 15.2).
-            - debt_to_equity: Debt to equity ratio as directly stated, as a decimal (e.g., 1.5).
-            - current_ratio: Current ratio as directly stated, as a decimal (e.g., 2.0).
-            - revenue_growth: Revenue growth percentage as directly stated or calculated if possible, in percent (set to 0.0 for earliest year).
-            - market_share: Market share percentage if explicitly stated, in percent (e.g., 12.3).
+        Report the company's own market share percentage for the most recent year stated in the passages.
+        Report it as a percentage (e.g., 12.3 for 12.3%). Use 0.0 if no market share figure for the company is stated.
         """
     ))
-
-        r4 = ""
-        a4 = KPIsAgent.run(self.prompt)
-        r4 = KPIs.model_dump_json(a4.content, indent=2)
-
-        return r4
+        a4 = MarketShareAgent.run(self.prompt)
+        return a4.content.market_share
 
     def extract_valuation(self, financial_doc: str) -> RunResponse:
         """
@@ -519,6 +528,64 @@ class PDFCompanyExtractor:
         r8 = CashFlowData.model_dump_json(a8.content, indent=2)
         return r8
 
+    def section_documents(self, pages: List[str], sections: dict = None):
+        """
+        Segments the filing and returns the slice of text each extractor should see.
+
+        :param pages: Text of each PDF page.
+        :param sections: Previously detected section pages, to skip detection.
+        :return: Tuple of (DocumentSegments, {section key: text}).
+        """
+        segments = segment_document(pages, sections=sections)
+        return segments, segments.documents_for_extractors([key for key, _, _ in self.SECTIONS])
+
+    def extract_sections_parallel(self, financial_doc, max_workers: int = None, keys=None):
+        """
+        Runs every section extractor concurrently and yields results as they complete.
+
+        :param financial_doc: Extracted text from the PDF, or a dict of text per section key.
+        :param max_workers: Maximum number of extraction calls in flight at once.
+        :param keys: Only run these sections; defaults to all of them.
+        :return: Generator of (key, label, result, error) tuples in completion order.
+        """
+        sections = [section for section in self.SECTIONS if keys is None or section[0] in keys]
+        if not sections:
+            return
+        workers = max(1, min(max_workers or EXTRACTION_MAX_WORKERS, len(sections)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-extract") as executor:
+            futures = {
+                executor.submit(getattr(self, method), _document_for(financial_doc, key)): (key, label)
+                for key, label, method in sections
+            }
+            for future in as_completed(futures):
+                key, label = futures[future]
+                try:
+                    yield key, label, future.result(), None
+                except Exception as e:
+                    yield key, label, None, e
+
+def _document_for(financial_doc, key):
+    if isinstance(financial_doc, dict):
+        return financial_doc[key]
+    return financial_doc
+
+def _stored_results(record):
+    """Section results saved for this document.
+
+    A record not marked complete is partial: its extracted sections are reused
+    and the missing ones, with the KPIs derived from them, run again. Complete
+    results are dropped if they no longer match CompanyReport.
+    """
+    results = dict(record.get("results") or {})
+    if not record.get("complete"):
+        results.pop("kpis", None)
+        return results
+    try:
+        CompanyReport.model_validate({key: json.loads(value) for key, value in results.items()})
+    except Exception:
+        return {}
+    return results
+
 def main():
     # Streamlit app
     st.title("PDF Company Information Extractor")
@@ -527,65 +594,97 @@ def main():
 
     if uploaded_file is not None:
         try:
-            # Save uploaded file to a temporary location
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
+            file_bytes = uploaded_file.getvalue()
 
             # Initialize extractor
             extractor = PDFCompanyExtractor()
 
-            # Extract text once
-            # text = extractor.extract_text_from_pdf(tmp_path)
-            with st.spinner("Extracting text from PDF..."):
-                pdf_text = extractor.extract_text_from_pdf(tmp_path)
-            
-            st.success("Text extracted from PDF.")
+            # Extract text once; a repeat upload of the same file is served from the document store
+            doc_key = document_key(file_bytes)
+            record = document_store.get(doc_key) or {}
+            if record.get("pages") is not None:
+                pages = record["pages"]
+                segments, section_docs = extractor.section_documents(pages, record.get("sections"))
+                st.success("Loaded previously parsed document.")
+            else:
+                with st.spinner("Extracting text from PDF..."):
+                    pages = extractor.extract_pages_from_pdf(file_bytes)
+                    segments, section_docs = extractor.section_documents(pages)
+                    record = document_store.update(doc_key, pages=pages, sections=segments.sections)
+                st.success("Text extracted from PDF.")
+            with st.expander("Detected sections"):
+                for section in segments.sections:
+                    found = segments.page_numbers(section)
+                    st.write(f"**{section.replace('_', ' ').title()}**: "
+                             + (f"pages {', '.join(map(str, found))}" if found else "not found, using full document"))
+            parallel = st.toggle("Parallel extraction", value=True)
+            refresh = st.checkbox("Ignore stored extraction results")
+            stored = {} if refresh else _stored_results(record)
+            pending = [key for key, _, _ in extractor.SECTIONS if key not in stored]
             final_report = {}
-            with st.spinner("Extracting company information section by section..."):
-                
-                status = st.status("Processing...", expanded=True)
-                # prompt = """You are an AI specialized in extracting data from financial docs like 10-Ks. Order newest to oldest. Output JSON only."""
-
-                status.write("Extracting Company Info...")
-                final_report['company_info'] = extractor.extract_company_info(pdf_text)
-               
-
-
-                status.write("Extracting Financial Metrics...")
-                final_report['financial_metrics'] = extractor.extract_financial_metrics(pdf_text)
-               
-
-                status.write("Extracting Balance Sheet...")
-                final_report['balance_sheet'] = extractor.extract_balance_sheet(pdf_text)
-                
-
-                status.write("Extracting KPIs...")
-                final_report['kpis'] = extractor.extract_kpis(pdf_text)
-                 
-
-                status.write("Extracting Valuation...")
-                final_report['valuation'] = extractor.extract_valuation(pdf_text)
-                
-                status.write("Extracting Industry Benchmarks...")
-                final_report['industry_benchmarks'] = extractor.extract_industry_benchmarks(pdf_text)
-                
-
-                status.write("Extracting Risk Factors...")
-                final_report['risk_factors'] = extractor.extract_risk_factors(pdf_text)
-                
-
-                status.write("Extracting Cash Flow Data...")
-                final_report['cash_flow'] = extractor.extract_cash_flow(pdf_text)
-                
-
-                status.update(label="Extraction complete!", state="complete", expanded=False)
-
-            st.success("All sections extracted successfully!")
+            failed = []
+            if not pending:
+                final_report = {key: stored[key] for key, _, _ in extractor.SECTIONS}
+                st.info("All sections loaded from the document store.")
+            elif parallel:
+                with st.spinner("Extracting all sections in parallel..."):
+                    status = st.status("Processing...", expanded=True)
+                    results = dict(stored)
+                    for key, label, result, error in extractor.extract_sections_parallel(section_docs, keys=pending):
+                        if error is not None:
+                            failed.append(label)
+                            status.write(f"❌ {label} failed: {error}")
+                            continue
+                        results[key] = result
+                        status.write(f"✅ {label} extracted")
+                        status.json(result, expanded=False)
+
+                    # Keep the report in section order regardless of completion order
+                    final_report = {key: results[key] for key, _, _ in extractor.SECTIONS if key in results}
+                    if failed:
+                        status.update(label=f"Extraction finished with errors: {', '.join(failed)}", state="error", expanded=True)
+                    else:
+                        status.update(label="Extraction complete!", state="complete", expanded=False)
+            else:
+                with st.spinner("Extracting company information section by section..."):
+                    status = st.status("Processing...", expanded=True)
+                    for key, label, method in extractor.SECTIONS:
+                        if key in stored:
+                            final_report[key] = stored[key]
+                            continue
+                        status.write(f"Extracting {label}...")
+                        final_report[key] = getattr(extractor, method)(section_docs[key])
+
+                    status.update(label="Extraction complete!", state="complete", expanded=False)
+
+            # KPIs are arithmetic on the statements, so they are recomputed locally whenever those change
+            refresh_kpis = "kpis" not in stored or bool(pending)
+            if refresh_kpis and "financial_metrics" in final_report and "balance_sheet" in final_report:
+                final_report["kpis"] = extractor.derive_kpis(
+                    final_report["financial_metrics"], final_report["balance_sheet"], segments.full_text
+                )
+            elif "kpis" in stored:
+                final_report["kpis"] = stored["kpis"]
+            final_report = {key: final_report[key] for key in CompanyReport.model_fields if key in final_report}
+
+            if refresh_kpis:
+                # Partial results are kept so a rerun only retries the failed sections
+                document_store.update(doc_key, results=final_report, complete=not failed)
+            if failed:
+                st.warning(f"Extraction incomplete. These sections failed: {', '.join(failed)}. "
+                           "Upload the file again to retry them.")
+            else:
+                st.success("All sections extracted successfully!")
             
             # Display JSON result
             st.json(final_report)
 
+            company_name = json.loads(final_report["company_info"]).get("name") if "company_info" in final_report else None
+            if company_name and not failed and st.button(f"Save {company_name} statements for reports"):
+                statements = from_company_report(company_name, final_report)
+                statement_store.upsert(statements)
+                st.success(f"Saved {len(statements)} fiscal years for {company_name}.")
+
             # Extract each section one by one
             # company_info = extractor.extract_company_info(text)
             # financial_metrics = extractor.extract_financial_metrics(text)
@@ -614,10 +713,5 @@ def main():
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
 
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-
 if __name__ == "__main__":
     main()
@@ -1,26 +1,74 @@
 from src.EIn_lookup.ein_check import EIN_LOOKUP
+from src.EIn_lookup.batch import iter_validate_eins, read_eins, results_frame
+from src.EIn_lookup.ein_cache import cache_stats
 import json
 import streamlit as st
 import os
 
 
 
-def main():    
+def batch_lookup():
+    st.subheader("Batch EIN Validation")
+    st.caption("Upload a CSV or XLSX with an EIN column (or EINs in the first column).")
+    uploaded_file = st.file_uploader("EIN list", type=["csv", "xlsx"], key="ein_batch_file")
+    if uploaded_file is None:
+        return
+
+    try:
+        eins = read_eins(uploaded_file, filename=uploaded_file.name)
+    except Exception as e:
+        st.error(f"Could not read the file: {e}")
+        return
+    st.write(f"{len(eins)} unique EINs found.")
+
+    if st.button("Validate all", disabled=not eins):
+        progress = st.progress(0.0, text="Starting lookups...")
+        rows = [None] * len(eins)
+        for done, (index, row) in enumerate(iter_validate_eins(eins), start=1):
+            rows[index] = row
+            progress.progress(done / len(eins), text=f"Validated {done} of {len(eins)} EINs")
+        progress.empty()
+
+        df = results_frame(rows)
+        counts = df["status"].value_counts()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Found", int(counts.get("found", 0)))
+        col2.metric("Not found", int(counts.get("not_found", 0)))
+        col3.metric("Errors", int(counts.get("error", 0)))
+        col4.metric("Blacklisted", int((df["blacklist"] == "Blacklist").sum()))
+        stats = cache_stats()
+        st.caption(f"EIN cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate since the app started)")
+        st.dataframe(df, use_container_width=True)
+        st.download_button(
+            "Download results (CSV)",
+            df.to_csv(index=False).encode("utf-8"),
+            file_name=f"{os.path.splitext(uploaded_file.name)[0]}_validated.csv",
+            mime="text/csv",
+        )
+
+
+def main():
     st.title("EIN Lookup Tool")
 
-    # st.text("Enter the EIN number to look up the business information.")
-    ein_input = st.text_input("EIN Number", placeholder="Enter EIN (e.g., 12-3456789)")
-    if st.button("Lookup"):
-        if ein_input:
-            ein_lookup = EIN_LOOKUP(ein=ein_input)
-            result = ein_lookup.return_validation_json()
-            if result:
-                st.json(result)
+    single, batch = st.tabs(["Single Lookup", "Batch Validation"])
+
+    with single:
+        # st.text("Enter the EIN number to look up the business information.")
+        ein_input = st.text_input("EIN Number", placeholder="Enter EIN (e.g., 12-3456789)")
+        if st.button("Lookup"):
+            if ein_input:
+                ein_lookup = EIN_LOOKUP(ein=ein_input)
+                result = ein_lookup.return_validation_json()
+                if result:
+                    st.json(result)
+                else:
+                    st.error("No data found for the provided EIN.")
             else:
-                st.error("No data found for the provided EIN.")
-        else:
-            st.warning("Please enter a valid EIN number.")
-    
+                st.warning("Please enter a valid EIN number.")
+
+    with batch:
+        batch_lookup()
+
     # Input for EIN
 
 if __name__ == "__main__":
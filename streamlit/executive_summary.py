@@ -2,9 +2,11 @@
 import os
 import streamlit as st
 import json
-from huggingface_hub import InferenceClient
+from src.llm_gateway import get_hf_client
 from datetime import datetime
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
+from src.ratios import metric_ratios, ratio
 from sqlalchemy import text
 
 def get_default_financial_data():
@@ -64,21 +66,20 @@ def get_default_financial_data():
     }
 
 def calculate_key_metrics(data):
-    """Calculate additional metrics from the financial data"""
+    """Calculate additional metrics from the financial data for its most recent year"""
     try:
         metrics = {}
         
-        latest_revenue = data["financial_metrics"]["revenue"]["2023"]
-        previous_revenue = data["financial_metrics"]["revenue"]["2022"]
-        metrics["revenue_growth_rate"] = (latest_revenue - previous_revenue) / previous_revenue
+        yearly = metric_ratios(data["financial_metrics"], ["revenue_growth", "ebitda_margin"])
+        latest = yearly[max(yearly)]
+        metrics["revenue_growth_rate"] = latest["revenue_growth"]
         
         total_debt = (data["balance_sheet"]["debt"]["long_term"] + 
                      data["balance_sheet"]["debt"]["short_term"])
         equity = data["balance_sheet"]["equity"]
-        metrics["debt_to_equity"] = total_debt / equity
+        metrics["debt_to_equity"] = ratio(total_debt, equity)
         
-        metrics["ebitda_margin"] = (data["financial_metrics"]["ebitda"]["2023"] / 
-                                   latest_revenue)
+        metrics["ebitda_margin"] = latest["ebitda_margin"]
         
         return metrics
     except Exception as e:
@@ -87,11 +88,7 @@ def calculate_key_metrics(data):
 
 def generate_report(prompt, metrics):
     """Generate financial report using HuggingFace model"""
-    client = InferenceClient(
-        #  model=os.getenv["hf_model"],
-        provider="hf-inference",
-        api_key=os.getenv("hf_token"),
-    )
+    client = get_hf_client(os.getenv("hf_token"))
 
     messages = [
         {"role": "system", "content": "You are financial report expert."},
@@ -303,14 +300,9 @@ Key Principles for your response:
 
         # Prompt input
         if 'user_prompt' not in st.session_state:
-            query = text("SELECT [executive-summary] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            
-            if data:
-                st.session_state.user_prompt = data[0]['executive-summary']
-            else:
-                pass
+            stored_prompt = get_prompt("executive-summary")
+            if stored_prompt is not None:
+                st.session_state.user_prompt = stored_prompt
                # st.session_state.user_prompt = default_prompt   
             #st.session_state.user_prompt = default_prompt
 
@@ -324,18 +316,8 @@ Key Principles for your response:
         # Reset prompt button
         if st.button("Reset Prompt to Default"):
             #st.session_state.user_prompt = default_prompt
-            id = 1
             try:
-                update_query = text("""
-                    UPDATE prompt_valuation_reports
-                    SET [executive-summary] = :summary
-                    WHERE id = :id
-                """)
-                params = {
-                    "summary": st.session_state.user_prompt,
-                    "id": id
-                }
-                execute_query(update_query, params)
+                save_prompt("executive-summary", st.session_state.user_prompt)
                 st.success("Data updated successfully!")
             except Exception as e:
                 st.error(f"Update failed: {e}")
@@ -343,12 +325,10 @@ Key Principles for your response:
             st.rerun()
 
         try:
-            query = text("SELECT [executive-summary] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt("executive-summary")
+            if stored_prompt is not None:
                 st.write("Executive Summary:")
-                st.write(data[0]["executive-summary"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
@@ -4,8 +4,9 @@ from datetime import datetime
 import json
 import os
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -17,12 +18,7 @@ class MBBConsultant:
         #     api_key=os.getenv("hf_token")
         # )
 
-        self.client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+        self.client = get_azure_client()
 
     def generate_analysis(self, prompt, phase, task):
         """Generate analysis using HuggingFace model."""
@@ -142,14 +138,7 @@ def main():
     elif selected_phase == "Section 4":
         HCA_Section_1 = "HCA_Section_4"
 
-    query = text(f"SELECT [{HCA_Section_1}] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    
-    if data:
-        default_prompt= data[0][f'{HCA_Section_1}']
-    else:
-        pass
+    default_prompt = get_prompt(HCA_Section_1, default_prompt)
 
     # Allow user to customize prompt
     st.subheader("Customize Analysis Prompt")
@@ -171,18 +160,8 @@ def main():
             HCA_Section_1 = "HCA_Section_4"
 
             #st.session_state.user_prompt = default_prompt
-        id = 1
         try:
-            update_query = text(f"""
-                UPDATE prompt_valuation_reports
-                SET [{HCA_Section_1}] = :{HCA_Section_1}
-                WHERE id = :id
-            """)
-            params = {
-                f"{HCA_Section_1}": user_prompt,
-                "id": id
-            }
-            execute_query(update_query, params)
+            save_prompt(HCA_Section_1, user_prompt)
             st.success("Data updated successfully!")
         except Exception as e:
             st.error(f"Update failed: {e}")
@@ -190,12 +169,10 @@ def main():
         st.rerun()
 
         try:
-            query = text(f"SELECT [{HCA_Section_1}] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            if data:
+            stored_prompt = get_prompt(HCA_Section_1)
+            if stored_prompt is not None:
                 st.write(f"{HCA_Section_1}:")
-                st.write(data[0][f"{HCA_Section_1}"])
+                st.write(stored_prompt)
             else:
                 st.warning("No report found.")
         except Exception as e:
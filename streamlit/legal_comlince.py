@@ -4,7 +4,7 @@ from datetime import datetime
 import os
 from src.db.sql_operation import execute_query, fetch_query
 from sqlalchemy import text
-from openai import AzureOpenAI 
+from src.llm_gateway import get_azure_client
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -14,12 +14,7 @@ class LegalComplianceAssessment:
         #     provider="hf-inference",
         #     api_key=os.getenv("hf_token")
         # )
-        self.client = AzureOpenAI(
-        azure_endpoint= os.getenv("ENDPOINT_URL"),
-        azure_deployment=os.getenv("DEPLOYMENT_NAME"),
-        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version="2025-01-01-preview"
-    )
+        self.client = get_azure_client()
 
 
         self.phases = {
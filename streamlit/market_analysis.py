@@ -9,6 +9,7 @@ from agno.team import Team
 from agno.tools.serpapi import SerpApiTools
 from agno.tools.reasoning import ReasoningTools
 from src.db.sql_operation import execute_query, fetch_query
+from src.db.prompt_repository import get_prompt, save_prompt
 from sqlalchemy import text
 import os
 from dotenv import load_dotenv
@@ -88,18 +89,7 @@ def main():
 
     """
 
-    query = text("SELECT [market_analysis_research_agent] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    research_agent_prompt=""
-    
-    if data:
-        retrieved_scraping_prompt = data[0]['market_analysis_research_agent']
-        research_agent_prompt = retrieved_scraping_prompt
-        
-        
-    else:
-        research_agent_prompt=research_agent_prompt_
+    research_agent_prompt = get_prompt("market_analysis_research_agent", research_agent_prompt_)
 
     research_agent_prompt_txt = st.text_area(
         "Research Agent Instructions:",
@@ -110,22 +100,13 @@ def main():
     if st.button("Save Research Agent Prompt"):
         try:
             # Corrected UPDATE query with WHERE clause
-            query = text("UPDATE prompt_valuation_reports SET [market_analysis_research_agent] = :prompt WHERE id = :id")
-            params = {
-                "prompt": research_agent_prompt_txt,
-                "id": 1  # Make sure this matches the record you want to update
-            }
-            execute_query(query, params)
+            save_prompt("market_analysis_research_agent", research_agent_prompt_txt)
             st.success("Prompt saved successfully!")
 
             # Retrieve the saved prompt for confirmation
-            query = text("SELECT [market_analysis_research_agent] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            
-            if data:
-                retrieved_scraping_prompt = data[0]['market_analysis_research_agent']
-                st.write(retrieved_scraping_prompt)
+            stored_prompt = get_prompt("market_analysis_research_agent")
+            if stored_prompt is not None:
+                st.write(stored_prompt)
             else:
                 st.warning("No data found for the given ID.")
         except Exception as e:
@@ -209,18 +190,7 @@ Source: Link back to the relevant data.
 
  """
     
-    query = text("SELECT [market_analysis_writer_agent] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    writer_agent_prompt_=""
-    
-    if data:
-        retrieved_data = data[0]['market_analysis_writer_agent']
-        writer_agent_prompt_ = retrieved_data
-        
-        
-    else:
-        writer_agent_prompt_=writer_agent_prompt
+    writer_agent_prompt_ = get_prompt("market_analysis_writer_agent", writer_agent_prompt)
 
     
     writer_agent_prompt_txt = st.text_area(
@@ -238,22 +208,13 @@ Source: Link back to the relevant data.
     if st.button("Save Writer Agent Prompt"):
         try:
             # Corrected UPDATE query with WHERE clause
-            query = text("UPDATE prompt_valuation_reports SET [market_analysis_writer_agent] = :prompt WHERE id = :id")
-            params = {
-                "prompt": writer_agent_prompt_txt,
-                "id": 1  # Make sure this matches the record you want to update
-            }
-            execute_query(query, params)
+            save_prompt("market_analysis_writer_agent", writer_agent_prompt_txt)
             st.success("Prompt saved successfully!")
 
             # Retrieve the saved prompt for confirmation
-            query = text("SELECT [market_analysis_writer_agent] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            
-            if data:
-                retrieved_scraping_prompt = data[0]['market_analysis_writer_agent']
-                st.write(retrieved_scraping_prompt)
+            stored_prompt = get_prompt("market_analysis_writer_agent")
+            if stored_prompt is not None:
+                st.write(stored_prompt)
             else:
                 st.warning("No data found for the given ID.")
         except Exception as e:
@@ -307,18 +268,7 @@ The Finance Report Writer Agent will interpret, synthesize, and structure the in
     """
 
 
-    query = text("SELECT [market_analysis_team_agents] FROM prompt_valuation_reports WHERE id = :id")
-    params = {"id": 1}
-    data = fetch_query(query, params)
-    team_agent_prompt_=""
-    
-    if data:
-        retrieved_data = data[0]['market_analysis_team_agents']
-        team_agent_prompt_ = retrieved_data
-        
-        
-    else:
-        team_agent_prompt_=team_agent_prompt
+    team_agent_prompt_ = get_prompt("market_analysis_team_agents", team_agent_prompt)
 
 
 
@@ -333,22 +283,13 @@ The Finance Report Writer Agent will interpret, synthesize, and structure the in
     if st.button("Save Team Agent Prompt"):
         try:
             # Corrected UPDATE query with WHERE clause
-            query = text("UPDATE prompt_valuation_reports SET [market_analysis_team_agents] = :prompt WHERE id = :id")
-            params = {
-                "prompt": team_agent_prompt_txt,
-                "id": 1  # Make sure this matches the record you want to update
-            }
-            execute_query(query, params)
+            save_prompt("market_analysis_team_agents", team_agent_prompt_txt)
             st.success("Prompt saved successfully!")
 
             # Retrieve the saved prompt for confirmation
-            query = text("SELECT [market_analysis_team_agents] FROM prompt_valuation_reports WHERE id = :id")
-            params = {"id": 1}
-            data = fetch_query(query, params)
-            
-            if data:
-                retrieved_scraping_prompt = data[0]['market_analysis_team_agents']
-                st.write(retrieved_scraping_prompt)
+            stored_prompt = get_prompt("market_analysis_team_agents")
+            if stored_prompt is not None:
+                st.write(stored_prompt)
             else:
                 st.warning("No data found for the given ID.")
         except Exception as e:
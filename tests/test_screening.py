@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from src.EIn_lookup.fuzzy_index import SCREENING_MATCH_THRESHOLD, screen
+from src.EIn_lookup.screening import ScreeningList, _read_ffi_names
+
+
+@pytest.fixture
+def ffi_list(tmp_path):
+    csv_path = tmp_path / "ffi.csv"
+    pd.DataFrame({"FINm": ["Foo Bank PLC", "Bar Holdings Trust", "The Widget Company", "Acme Corp"]}).to_csv(
+        csv_path, index=False
+    )
+    return ScreeningList("ffi", str(csv_path), _read_ffi_names, snapshot_dir=str(tmp_path / "snapshots"))
+
+
+@pytest.mark.parametrize("name", ["Foo Bank Ltd", "Bar Holdings Fund", "Widget Co"])
+def test_legal_form_variant_is_a_possible_match_not_exact(ffi_list, name):
+    hits = screen(ffi_list, name)
+
+    assert not ffi_list.contains(name)
+    assert hits
+    assert all(hit["score"] < 1.0 for hit in hits)
+    assert hits[0]["score"] >= SCREENING_MATCH_THRESHOLD
+
+
+@pytest.mark.parametrize("name", ["ACME CORP", "acme, corp."])
+def test_normalised_exact_match_scores_one(ffi_list, name):
+    hits = screen(ffi_list, name)
+
+    assert ffi_list.contains(name)
+    assert hits[0]["score"] == 1.0
+    assert sum(hit["score"] == 1.0 for hit in hits) == 1